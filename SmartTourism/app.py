@@ -7,7 +7,11 @@ recommendation system with onboarding questionnaire and recommendations display.
 
 import streamlit as st
 import pandas as pd
+from datetime import datetime
+from typing import Optional
 from recommend_places import PlaceRecommendationSystem
+from recommendation_export import safe_file_stem, similar_places_file_name
+from recommendation_metrics import METRICS
 
 # Page configuration
 st.set_page_config(
@@ -17,26 +21,96 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Number of request timing breakdowns shown on the Home page
+RECENT_TIMINGS = 20
+
 # Initialize session state
-if 'system' not in st.session_state:
-    st.session_state.system = None
 if 'initialized' not in st.session_state:
     st.session_state.initialized = False
 
 
+@st.cache_resource(show_spinner="Loading recommendation system...")
+def load_system() -> PlaceRecommendationSystem:
+    """
+    Load the recommendation system once per process
+    
+    The instance is shared by all browser sessions and reruns; new model
+    versions are hot-swapped in by its model registry. Stage timings of
+    every request go to the process-wide metrics registry.
+    """
+    return PlaceRecommendationSystem(hot_reload=True, metrics=METRICS)
+
+
 def initialize_system():
     """Initialize the recommendation system"""
-    if not st.session_state.initialized:
-        try:
-            with st.spinner("Loading recommendation system..."):
-                st.session_state.system = PlaceRecommendationSystem()
-                st.session_state.initialized = True
-            return True
-        except Exception as e:
-            st.error(f"Error initializing system: {str(e)}")
-            st.info("Make sure 'cbf_model.pkl' exists. Run the notebook to train the model first.")
-            return False
-    return True
+    try:
+        load_system()
+        st.session_state.initialized = True
+        return True
+    except Exception as e:
+        st.error(f"Error initializing system: {str(e)}")
+        st.info("Make sure the 'cbf_model' artifact (or 'cbf_model.pkl') exists. Run the notebook to train the model first.")
+        return False
+
+
+def process_memory_mb() -> Optional[float]:
+    """Resident memory of this process in MB (None where /proc is unavailable)"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+# Display names and number formats of the recommendation columns
+RECOMMENDATION_COLUMN_CONFIG = {
+    'place_id': st.column_config.NumberColumn('Place ID'),
+    'name': st.column_config.TextColumn('Place Name'),
+    'province_name': st.column_config.TextColumn('Province'),
+    'category_name': st.column_config.TextColumn('Category'),
+    'ratings': st.column_config.NumberColumn('Rating', format='%.2f'),
+    'reviews_count': st.column_config.NumberColumn('Reviews', format='%d'),
+    'similarity_score': st.column_config.NumberColumn('Similarity Score', format='%.4f'),
+}
+
+
+def show_recommendations(recommendations: pd.DataFrame):
+    """Display recommendations; columns are renamed and rounded for display only, without a copy"""
+    st.dataframe(
+        recommendations,
+        column_config=RECOMMENDATION_COLUMN_CONFIG,
+        use_container_width=True,
+        hide_index=True
+    )
+    
+    timings = recommendations.attrs.get('timings')
+    if timings:
+        stages = ', '.join(
+            f"{name[:-3]} {ms:.2f}" for name, ms in timings.items() if name != 'total_ms'
+        )
+        st.caption(f"Computed in {timings['total_ms']:.2f} ms ({stages})")
+
+
+def download_recommendations(
+    system: PlaceRecommendationSystem,
+    recommendations: pd.DataFrame,
+    label: str,
+    file_name: str
+):
+    """CSV download button, streamed from the place ids and scores of the recommendations"""
+    rows = system.recommender.iter_export_rows(
+        recommendations['place_id'].to_numpy(),
+        recommendations['similarity_score'].to_numpy()
+    )
+    st.download_button(
+        label=label,
+        data=''.join(rows),
+        file_name=file_name,
+        mime="text/csv"
+    )
 
 
 def home_page():
@@ -47,7 +121,7 @@ def home_page():
     if not initialize_system():
         return
     
-    system = st.session_state.system
+    system = load_system()
     
     # System Information
     st.header("📊 System Information")
@@ -65,6 +139,61 @@ def home_page():
         training_date = system.recommender.model_package['metadata']['training_date']
         st.metric("Training Date", training_date.split()[0])
     
+    # Model runtime (shared by all sessions of this process)
+    status = system.model_status()
+    footprint = system.recommender.memory_footprint()
+    rss_mb = process_memory_mb()
+    
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.metric("Model Version", status['version'])
+    
+    with col2:
+        st.metric("Model Load Time", f"{status['load_seconds'] * 1000:.0f} ms")
+    
+    with col3:
+        st.metric(
+            "Model Memory",
+            f"{footprint['total_bytes'] / 1024 / 1024:.1f} MB",
+            help=f"{footprint['mapped_bytes'] / 1024 / 1024:.1f} MB memory-mapped (shared between processes)"
+        )
+    
+    with col4:
+        st.metric("Process Memory (RSS)", f"{rss_mb:.0f} MB" if rss_mb is not None else "n/a")
+    
+    st.caption(f"Loaded {status['loaded_at']} from {status['artifact']}")
+    
+    # Per-stage latency of the last requests served by this process
+    st.subheader("⏱️ Recommendation Latency")
+    recent = METRICS.recent(RECENT_TIMINGS)
+    if recent:
+        breakdowns = pd.DataFrame([
+            {
+                'Time': datetime.fromtimestamp(request['time']).strftime('%H:%M:%S'),
+                'Method': request['method'],
+                **request['timings'],
+            }
+            for request in recent
+        ])
+        st.dataframe(
+            breakdowns,
+            column_config={
+                column: st.column_config.NumberColumn(column[:-3].capitalize() + ' (ms)', format='%.2f')
+                for column in breakdowns.columns if column.endswith('_ms')
+            },
+            use_container_width=True,
+            hide_index=True
+        )
+        
+        stage_means = pd.DataFrame(METRICS.summary()).pivot(
+            index='stage', columns='method', values='mean_ms'
+        )
+        st.write("**Mean time per stage (ms, all requests):**")
+        st.bar_chart(stage_means)
+    else:
+        st.info("No recommendation requests yet. Timings of the last requests appear here.")
+    
     # Dataset Statistics
     st.subheader("Dataset Statistics")
     places_data = system.recommender.model_package['places_data']
@@ -105,7 +234,7 @@ def onboarding_page():
     if not initialize_system():
         return
     
-    system = st.session_state.system
+    system = load_system()
     questionnaire = system.get_onboarding_questions()
     
     with st.form("onboarding_form"):
@@ -194,6 +323,16 @@ def onboarding_page():
             key="num_recs"
         )
         
+        diversity = st.slider(
+            "Diversity:",
+            min_value=0.0,
+            max_value=1.0,
+            value=0.0,
+            step=0.1,
+            help="Trade similarity for variety: higher values avoid recommending near-identical places",
+            key="diversity"
+        )
+        
         submitted = st.form_submit_button("Get Recommendations", type="primary")
     
     if submitted:
@@ -211,7 +350,8 @@ def onboarding_page():
                     
                     recommendations = system.get_recommendations(
                         preferences,
-                        top_n=num_recommendations
+                        top_n=num_recommendations,
+                        diversity=diversity
                     )
                 
                 st.success("Recommendations generated successfully!")
@@ -223,35 +363,12 @@ def onboarding_page():
                 # Display recommendations
                 st.subheader("🎯 Your Recommendations")
                 
-                # Format the dataframe for better display
-                display_df = recommendations.copy()
-                display_df['ratings'] = display_df['ratings'].round(2)
-                display_df['similarity_score'] = display_df['similarity_score'].round(4)
-                display_df['reviews_count'] = display_df['reviews_count'].astype(int)
-                
-                # Rename columns for better display
-                display_df = display_df.rename(columns={
-                    'name': 'Place Name',
-                    'province_name': 'Province',
-                    'category_name': 'Category',
-                    'ratings': 'Rating',
-                    'reviews_count': 'Reviews',
-                    'similarity_score': 'Similarity Score'
-                })
-                
-                st.dataframe(
-                    display_df,
-                    use_container_width=True,
-                    hide_index=True
-                )
+                show_recommendations(recommendations)
                 
                 # Download button
-                csv = recommendations.to_csv(index=False)
-                st.download_button(
-                    label="📥 Download Recommendations as CSV",
-                    data=csv,
-                    file_name="recommendations.csv",
-                    mime="text/csv"
+                download_recommendations(
+                    system, recommendations, "📥 Download Recommendations as CSV",
+                    "recommendations.csv"
                 )
                 
             except Exception as e:
@@ -266,22 +383,26 @@ def place_based_page():
     if not initialize_system():
         return
     
-    system = st.session_state.system
+    system = load_system()
     places_data = system.recommender.model_package['places_data']
     
     # Place selection
     st.subheader("Select a Place")
-    place_names = sorted(places_data['name'].unique().tolist())
+    # Places are selected by id; the same name can exist in several provinces
+    place_ids = places_data.sort_values(['name', 'province_name'])['place_id'].tolist()
     
     selected_place = st.selectbox(
         "Choose a place:",
-        place_names,
+        place_ids,
+        format_func=lambda place_id: (
+            f"{places_data.at[place_id, 'name']} ({places_data.at[place_id, 'province_name']})"
+        ),
         key="place_select"
     )
     
-    if selected_place:
+    if selected_place is not None:
         # Show place information
-        place_info = places_data[places_data['name'] == selected_place].iloc[0]
+        place_info = places_data.iloc[selected_place]
         
         col1, col2, col3, col4 = st.columns(4)
         with col1:
@@ -334,6 +455,16 @@ def place_based_page():
         key="place_num_recs"
     )
     
+    place_diversity = st.slider(
+        "Diversity:",
+        min_value=0.0,
+        max_value=1.0,
+        value=0.0,
+        step=0.1,
+        help="Trade similarity for variety: higher values avoid recommending near-identical places",
+        key="place_diversity"
+    )
+    
     if st.button("Find Similar Places", type="primary"):
         try:
             with st.spinner("Finding similar places..."):
@@ -347,10 +478,11 @@ def place_based_page():
                         provinces=None
                     )
                 
-                recommendations = system.recommender.get_recommendations_for_place(
+                recommendations = system.recommender.get_recommendations_for_place_id(
                     selected_place,
                     top_n=num_recommendations,
-                    preferences=preferences
+                    preferences=preferences,
+                    diversity=place_diversity
                 )
             
             if isinstance(recommendations, str):
@@ -358,35 +490,12 @@ def place_based_page():
             else:
                 st.success(f"Found {len(recommendations)} similar places!")
                 
-                # Format the dataframe
-                display_df = recommendations.copy()
-                display_df['ratings'] = display_df['ratings'].round(2)
-                display_df['similarity_score'] = display_df['similarity_score'].round(4)
-                display_df['reviews_count'] = display_df['reviews_count'].astype(int)
-                
-                # Rename columns
-                display_df = display_df.rename(columns={
-                    'name': 'Place Name',
-                    'province_name': 'Province',
-                    'category_name': 'Category',
-                    'ratings': 'Rating',
-                    'reviews_count': 'Reviews',
-                    'similarity_score': 'Similarity Score'
-                })
-                
-                st.dataframe(
-                    display_df,
-                    use_container_width=True,
-                    hide_index=True
-                )
+                show_recommendations(recommendations)
                 
                 # Download button
-                csv = recommendations.to_csv(index=False)
-                st.download_button(
-                    label="📥 Download Recommendations as CSV",
-                    data=csv,
-                    file_name=f"similar_to_{selected_place.replace(' ', '_')}.csv",
-                    mime="text/csv"
+                download_recommendations(
+                    system, recommendations, "📥 Download Recommendations as CSV",
+                    similar_places_file_name(places_data['name'], selected_place)
                 )
         
         except Exception as e:
@@ -401,7 +510,7 @@ def quick_tests_page():
     if not initialize_system():
         return
     
-    system = st.session_state.system
+    system = load_system()
     
     # Pre-configured test scenarios (using subcategories for Tourist Attractions)
     all_subcategories = list(system.onboarding.TOURIST_ATTRACTION_SUBCATEGORIES.keys())
@@ -504,27 +613,7 @@ def quick_tests_page():
                 # Display recommendations
                 st.subheader("📊 Test Results")
                 
-                # Format the dataframe
-                display_df = recommendations.copy()
-                display_df['ratings'] = display_df['ratings'].round(2)
-                display_df['similarity_score'] = display_df['similarity_score'].round(4)
-                display_df['reviews_count'] = display_df['reviews_count'].astype(int)
-                
-                # Rename columns
-                display_df = display_df.rename(columns={
-                    'name': 'Place Name',
-                    'province_name': 'Province',
-                    'category_name': 'Category',
-                    'ratings': 'Rating',
-                    'reviews_count': 'Reviews',
-                    'similarity_score': 'Similarity Score'
-                })
-                
-                st.dataframe(
-                    display_df,
-                    use_container_width=True,
-                    hide_index=True
-                )
+                show_recommendations(recommendations)
                 
                 # Statistics
                 st.subheader("📈 Statistics")
@@ -543,12 +632,9 @@ def quick_tests_page():
                     st.metric("Total Reviews", f"{total_reviews:,}")
                 
                 # Download button
-                csv = recommendations.to_csv(index=False)
-                st.download_button(
-                    label="📥 Download Results as CSV",
-                    data=csv,
-                    file_name=f"{selected_scenario_name.replace(' ', '_')}_results.csv",
-                    mime="text/csv"
+                download_recommendations(
+                    system, recommendations, "📥 Download Results as CSV",
+                    f"{safe_file_stem(selected_scenario_name)}_results.csv"
                 )
             
             except Exception as e:
@@ -0,0 +1,78 @@
+"""
+Batch Recommendation Benchmark
+
+Compares the throughput of get_recommendations_batch against calling
+PlaceRecommendationSystem.get_recommendations once per user.
+
+Usage (from the SmartTourism directory):
+    python benchmarks/bench_batch.py --users 2000 --top-n 10
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model_artifact import DEFAULT_MODEL_PATH
+from recommend_places import PlaceRecommendationSystem
+
+
+def random_preferences(onboarding, n_users: int, seed: int = 0):
+    """Generate random but valid onboarding answers"""
+    rng = random.Random(seed)
+    subcategories = list(onboarding.TOURIST_ATTRACTION_SUBCATEGORIES.keys())
+    ratings = list(onboarding.RATING_OPTIONS.values())
+    preferences_list = []
+    for _ in range(n_users):
+        # Most users skip the optional location question
+        provinces = None
+        if onboarding.provinces and rng.random() < 0.2:
+            provinces = [rng.choice(onboarding.provinces)]
+        preferences_list.append(onboarding.create_user_preferences(
+            subcategories=rng.sample(subcategories, rng.randint(1, 4)),
+            min_rating=rng.choice(ratings),
+            popularity_preference=rng.choice(onboarding.POPULARITY_OPTIONS),
+            provinces=provinces
+        ))
+    return preferences_list
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--model-path', default=DEFAULT_MODEL_PATH)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--top-n', type=int, default=10)
+    parser.add_argument('--cache-size', type=int, default=4096,
+                        help="Profile cache size (covers the onboarding answer space)")
+    args = parser.parse_args()
+
+    system = PlaceRecommendationSystem(args.model_path, cache_size=args.cache_size)
+    preferences_list = random_preferences(system.onboarding, args.users)
+
+    # Cold profile cache: batch pays for filtering every new signature
+    start = time.perf_counter()
+    system.get_recommendations_batch(preferences_list, args.top_n)
+    cold_batch_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for preferences in preferences_list:
+        system.get_recommendations(preferences, top_n=args.top_n)
+    loop_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    system.get_recommendations_batch(preferences_list, args.top_n)
+    batch_seconds = time.perf_counter() - start
+
+    print(f"Users: {args.users}, top_n: {args.top_n}")
+    print(f"  Loop:  {loop_seconds:.3f}s ({args.users / loop_seconds:,.0f} users/s)")
+    print(f"  Batch (cold cache): {cold_batch_seconds:.3f}s "
+          f"({args.users / cold_batch_seconds:,.0f} users/s)")
+    print(f"  Batch (warm cache): {batch_seconds:.3f}s ({args.users / batch_seconds:,.0f} users/s)")
+    print(f"  Speedup (warm): {loop_seconds / batch_seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
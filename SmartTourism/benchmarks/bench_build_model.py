@@ -0,0 +1,162 @@
+"""
+Model Build Benchmark
+
+Builds the CBF model with build_model.py from synthetic places CSVs of
+several sizes and reports build time, peak RSS, artifact size and the
+tie-aware recall of the neighbour table against exact neighbour lists
+for a sample of places. Each build runs in its own process so peak RSS
+is measured per catalog size. With several --workers counts, each size is
+built once per count to show how neighbour scoring scales with cores.
+
+Usage (from the SmartTourism directory):
+    python benchmarks/bench_build_model.py --sizes 4000,100000,1000000
+    python benchmarks/bench_build_model.py --sizes 1000000 --workers 1,2,4,8
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+SMARTTOURISM_DIR = os.path.dirname(BENCHMARKS_DIR)
+sys.path.insert(0, SMARTTOURISM_DIR)
+
+from bench_neighbor_index import CATEGORY_IDS, CATEGORY_SHARES, N_PROVINCES
+from cbf_recommender import neighbor_rows
+from model_artifact import load_model_package
+
+CATEGORY_NAMES = {1: 'Tourist Attraction', 2: 'Hotel', 3: 'Restaurant', 7: 'Shopping'}
+
+
+# Name words per category, for catalogs whose names matter (name tokens)
+CATEGORY_WORDS = {
+    1: ['Wat', 'Temple', 'Pagoda', 'Museum', 'Park', 'Garden', 'Market', 'Waterfall',
+        'Beach', 'Monument', 'Palace', 'Phnom', 'Prasat', 'Lake'],
+    2: ['Hotel', 'Guesthouse', 'Resort', 'Villa', 'Boutique', 'Hostel', 'Residence', 'Inn'],
+    3: ['Restaurant', 'Cafe', 'Kitchen', 'Grill', 'Noodle', 'Bar', 'Bistro', 'Bakery', 'BBQ'],
+    7: ['Mall', 'Market', 'Shop', 'Store', 'Mart', 'Boutique', 'Plaza', 'Gallery'],
+}
+SHARED_WORDS = ['Angkor', 'Royal', 'Golden', 'Lotus', 'Mekong', 'Khmer', 'Riverside',
+                'Central', 'Sunset', 'Green', 'Night', 'Old', 'New', 'Little', 'Grand']
+SYLLABLES = ['ka', 'ro', 'sa', 'mey', 'tha', 'vi', 'chan', 'bo', 'lin', 'sok', 'na', 'rith',
+             'pov', 'da', 'kim', 'sre', 'leak', 'mony', 'pich', 'vy']
+
+
+def synthetic_names(rng: np.random.Generator, category_id: np.ndarray) -> list:
+    """Place names built from category words, shared words and a proper name"""
+    names = []
+    for category in category_id.tolist():
+        words = CATEGORY_WORDS[category]
+        proper = ''.join(rng.choice(SYLLABLES, size=2)).capitalize()
+        name = [proper, str(rng.choice(words))]
+        if rng.random() < 0.5:
+            name.insert(0, str(rng.choice(SHARED_WORDS)))
+        names.append(' '.join(name))
+    return names
+
+
+def write_synthetic_csv(
+    path: str,
+    n_places: int,
+    seed: int = 0,
+    chunk_rows: int = 200_000,
+    word_names: bool = False
+):
+    """Write a places CSV shaped like clean_place_for_ml.csv, chunk by chunk"""
+    rng = np.random.default_rng(seed)
+    for start in range(0, n_places, chunk_rows):
+        n = min(chunk_rows, n_places - start)
+        category_id = rng.choice(CATEGORY_IDS, size=n, p=CATEGORY_SHARES)
+        province_id = rng.integers(1, N_PROVINCES + 1, size=n)
+        if word_names:
+            names = synthetic_names(rng, category_id)
+        else:
+            names = [f"Place {i}" for i in range(start, start + n)]
+        chunk = pd.DataFrame({
+            'name': names,
+            'province_id': province_id,
+            'province_name': [f"Province {p}" for p in province_id],
+            'category_id': category_id,
+            'category_name': [CATEGORY_NAMES[c] for c in category_id],
+            'ratings': np.clip(np.round(rng.normal(4.2, 0.6, n), 1), 0.0, 5.0),
+            'reviews_count': np.floor(rng.lognormal(3.0, 1.8, n)),
+        })
+        chunk.to_csv(path, mode='w' if start == 0 else 'a', header=start == 0, index=False)
+
+
+def neighbor_recall(artifact_dir: str, sample: int, seed: int = 0) -> float:
+    """Tie-aware recall of stored neighbour lists against exact lists"""
+    package = load_model_package(artifact_dir)
+    unit_features = np.asarray(package['unit_features'])
+    stored_scores = package['neighbor_scores']
+    k = stored_scores.shape[1]
+
+    rng = np.random.default_rng(seed)
+    rows = np.sort(rng.choice(len(unit_features), size=min(sample, len(unit_features)), replace=False))
+    _, exact_scores = neighbor_rows(unit_features, rows, k)
+
+    threshold = exact_scores[:, -1:] - 1e-6
+    hits = np.sum(np.asarray(stored_scores[rows]) >= threshold, axis=1)
+    return float(np.mean(np.minimum(hits, k) / k))
+
+
+def directory_mb(path: str) -> float:
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return total / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='4000,100000,1000000')
+    parser.add_argument('--memory-budget-mb', type=int, default=256)
+    parser.add_argument('--workers', default='1', help="Comma-separated worker counts")
+    parser.add_argument('--recall-sample', type=int, default=200)
+    parser.add_argument('--workdir', default=None, help="Directory for CSVs and models (temporary by default)")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='bench_build_model_')
+    os.makedirs(workdir, exist_ok=True)
+    env = dict(os.environ, PYTHONPATH=SMARTTOURISM_DIR)
+
+    print(f"{os.cpu_count()} CPUs")
+    print(f"{'places':>10} {'distinct':>9} {'method':>6} {'workers':>7} {'build s':>8} {'neighbors s':>12} "
+          f"{'peak RSS MB':>12} {'worker MB':>10} {'artifact MB':>12} {'recall@K':>9}")
+    try:
+        for n_places in [int(size) for size in args.sizes.split(',')]:
+            csv_path = os.path.join(workdir, f'places_{n_places}.csv')
+            write_synthetic_csv(csv_path, n_places, args.seed)
+
+            for workers in [int(count) for count in args.workers.split(',')]:
+                model_path = os.path.join(workdir, f'cbf_model_{n_places}_{workers}')
+                result = subprocess.run(
+                    [sys.executable, os.path.join(SMARTTOURISM_DIR, 'build_model.py'), csv_path,
+                     '--output', model_path, '--memory-budget-mb', str(args.memory_budget_mb),
+                     '--workers', str(workers), '--json'],
+                    env=env, capture_output=True, text=True, check=True
+                )
+                summary = json.loads(result.stdout.strip().splitlines()[-1])
+                recall = neighbor_recall(summary['artifact'], args.recall_sample, args.seed)
+
+                print(f"{n_places:>10,} {summary['distinct_vectors']:>9,} {summary['method']:>6} "
+                      f"{workers:>7} {summary['seconds']:>8.2f} {summary['timings']['neighbors']:>12.2f} "
+                      f"{summary['peak_rss_mb']:>12.0f} {summary['worker_peak_rss_mb']:>10.0f} "
+                      f"{directory_mb(summary['artifact']):>12.1f} "
+                      f"{recall:>9.4f}")
+                shutil.rmtree(summary['artifact'], ignore_errors=True)
+    finally:
+        if args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
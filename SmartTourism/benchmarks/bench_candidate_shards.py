@@ -0,0 +1,101 @@
+"""
+Candidate Shard Benchmark
+
+Times cold-start recommendations on a synthetic catalog when candidates
+come from the category/province/subcategory shards, and when the
+preference filter scans every place instead (SHARD_MAX_SHARE = 0). The
+profile cache is disabled so every query filters its candidates.
+
+Usage (from the SmartTourism directory):
+    python benchmarks/bench_candidate_shards.py --places 1000000 --queries 300
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+
+import cbf_recommender
+from bench_build_model import write_synthetic_csv
+from build_model import build_model
+from cbf_recommender import CBFRecommender
+
+
+def query_mixes(onboarding, n_queries: int, seed: int = 0) -> dict:
+    """Onboarding answers grouped by how much of the catalog they select"""
+    rng = random.Random(seed)
+    subcategories = list(onboarding.TOURIST_ATTRACTION_SUBCATEGORIES.keys())
+    province_ids = sorted(set(onboarding.province_id_map.values()))
+
+    def preferences(categories, n_subcategories, n_provinces):
+        return {
+            'categories': categories,
+            'subcategories': rng.sample(subcategories, n_subcategories) or None,
+            'min_rating': rng.choice([3.0, 3.5, 4.0, 4.5]),
+            'popularity_preference': rng.choice(onboarding.POPULARITY_OPTIONS),
+            'province_ids': rng.sample(province_ids, n_provinces) or None,
+        }
+
+    return {
+        'all attractions': [preferences([1], 0, 0) for _ in range(n_queries)],
+        'restaurants, 2 provinces': [preferences([3], 0, 2) for _ in range(n_queries)],
+        '2 subcategories': [preferences([1], 2, 0) for _ in range(n_queries)],
+        '1 province + subcats': [preferences([1], 2, 1) for _ in range(n_queries)],
+    }
+
+
+def time_new_user(recommender: CBFRecommender, preferences_list: list, top_n: int) -> np.ndarray:
+    seconds = []
+    for preferences in preferences_list:
+        start = time.perf_counter()
+        recommender.get_recommendations_for_new_user(preferences, top_n)
+        seconds.append(time.perf_counter() - start)
+    return np.array(seconds) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--places', type=int, default=1_000_000)
+    parser.add_argument('--queries', type=int, default=300)
+    parser.add_argument('--top-n', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_candidate_shards_')
+    try:
+        csv_path = os.path.join(workdir, 'places.csv')
+        write_synthetic_csv(csv_path, args.places, args.seed, word_names=True)
+        summary = build_model(csv_path, os.path.join(workdir, 'cbf_model'))
+        recommender = CBFRecommender(summary['artifact'], cache_size=0)
+        mixes = query_mixes(recommender.onboarding, args.queries, args.seed)
+
+        print(f"\nPlaces: {args.places:,}, queries per mix: {args.queries}, top_n: {args.top_n}")
+        print(f"{'query mix':>26} {'candidates':>11} {'scan p50':>9} {'shard p50':>10} "
+              f"{'scan p99':>9} {'shard p99':>10} {'speedup':>8}")
+        share = cbf_recommender.SHARD_MAX_SHARE
+        for name, preferences_list in mixes.items():
+            candidates = np.mean([
+                len(recommender._preference_rows(preferences)) for preferences in preferences_list
+            ])
+            cbf_recommender.SHARD_MAX_SHARE = 0.0
+            scan = time_new_user(recommender, preferences_list, args.top_n)
+            cbf_recommender.SHARD_MAX_SHARE = share
+            shard = time_new_user(recommender, preferences_list, args.top_n)
+            print(f"{name:>26} {candidates:>11,.0f} {np.percentile(scan, 50):>9.2f} "
+                  f"{np.percentile(shard, 50):>10.2f} {np.percentile(scan, 99):>9.2f} "
+                  f"{np.percentile(shard, 99):>10.2f} "
+                  f"{np.median(scan) / np.median(shard):>7.1f}x")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Diversity Re-ranking Benchmark
+
+Measures what the maximal marginal relevance re-ranking of cold-start
+recommendations buys and costs on a synthetic catalog: for each
+diversity weight, the intra-list similarity (mean pairwise cosine of the
+recommended places; lower is more diverse), the number of distinct
+provinces in the list, the mean similarity to the user profile, and the
+latency. A second table times the re-ranking alone for growing candidate
+pools (MMR_POOL_SIZE). The profile cache is warm, so latency differences
+come from the larger candidate search and the re-ranking.
+
+Usage (from the SmartTourism directory):
+    python benchmarks/bench_diversity.py --places 100000 --queries 300
+    python benchmarks/bench_diversity.py --feature-space dense
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+
+import cbf_recommender
+from bench_batch import random_preferences
+from bench_build_model import write_synthetic_csv
+from build_model import build_model
+from cbf_recommender import CBFRecommender
+from neighbor_index import mmr_rerank, normalize_rows
+
+
+def place_vectors(recommender: CBFRecommender, place_ids: np.ndarray) -> np.ndarray:
+    """Normalized feature vectors of places (sparse ones over the columns they use)"""
+    if recommender._feature_space is not None:
+        return recommender._neighbor_index.row_vectors(place_ids)
+    return recommender._unit_features[place_ids]
+
+
+def intra_list_similarity(vectors: np.ndarray) -> float:
+    """Mean cosine similarity over the pairs of a recommendation list"""
+    n = len(vectors)
+    if n < 2:
+        return float('nan')
+    similarity = vectors @ vectors.T
+    return float((similarity.sum() - np.trace(similarity)) / (n * (n - 1)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--places', type=int, default=100_000)
+    parser.add_argument('--queries', type=int, default=300)
+    parser.add_argument('--top-n', type=int, default=10)
+    parser.add_argument('--diversities', default='0,0.1,0.3,0.5,0.7,0.9')
+    parser.add_argument('--pool-sizes', default='50,100,200,500,1000')
+    parser.add_argument('--feature-space', choices=['dense', 'sparse'], default='sparse')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_diversity_')
+    try:
+        csv_path = os.path.join(workdir, 'places.csv')
+        write_synthetic_csv(csv_path, args.places, args.seed, word_names=True)
+        summary = build_model(
+            csv_path, os.path.join(workdir, 'cbf_model'), feature_space=args.feature_space
+        )
+        recommender = CBFRecommender(summary['artifact'], cache_size=args.queries)
+        preferences_list = random_preferences(recommender.onboarding, args.queries, args.seed)
+        for preferences in preferences_list:
+            recommender.get_recommendations_for_new_user(preferences, args.top_n)
+
+        print(f"\nPlaces: {args.places:,} ({args.feature_space} features), queries: {args.queries}, "
+              f"top_n: {args.top_n}, pool: {cbf_recommender.MMR_POOL_SIZE}")
+        print(f"{'diversity':>9} {'ILS':>7} {'provinces':>9} {'similarity':>10} "
+              f"{'p50 ms':>7} {'p99 ms':>7}")
+        for diversity in [float(value) for value in args.diversities.split(',')]:
+            seconds, ils, provinces, similarity = [], [], [], []
+            for preferences in preferences_list:
+                start = time.perf_counter()
+                recommendations = recommender.get_recommendations_for_new_user(
+                    preferences, args.top_n, diversity=diversity
+                )
+                seconds.append(time.perf_counter() - start)
+
+                place_ids = recommendations['place_id'].to_numpy()
+                ils.append(intra_list_similarity(place_vectors(recommender, place_ids)))
+                provinces.append(recommendations['province_name'].nunique())
+                similarity.append(recommendations['similarity_score'].mean())
+
+            milliseconds = np.array(seconds) * 1000
+            print(f"{diversity:>9g} {np.nanmean(ils):>7.4f} {np.mean(provinces):>9.2f} "
+                  f"{np.nanmean(similarity):>10.4f} {np.percentile(milliseconds, 50):>7.2f} "
+                  f"{np.percentile(milliseconds, 99):>7.2f}")
+
+        # Re-ranking alone: N picks over pools of M candidates
+        print(f"\n{'pool M':>7} {'mmr p50 ms':>11} {'mmr p99 ms':>11}")
+        for pool_size in [int(value) for value in args.pool_sizes.split(',')]:
+            seconds = []
+            for preferences in preferences_list:
+                candidates, profile = recommender._get_candidates_and_profile(preferences)
+                positions, scores = recommender._neighbor_index.search(
+                    normalize_rows(profile)[0], pool_size, candidates if len(candidates) else None
+                )
+                vectors = place_vectors(recommender, positions)
+                start = time.perf_counter()
+                mmr_rerank(vectors, scores, args.top_n, 0.5)
+                seconds.append(time.perf_counter() - start)
+            milliseconds = np.array(seconds) * 1000
+            print(f"{pool_size:>7} {np.percentile(milliseconds, 50):>11.3f} "
+                  f"{np.percentile(milliseconds, 99):>11.3f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
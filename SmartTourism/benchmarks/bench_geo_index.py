@@ -0,0 +1,85 @@
+"""
+Geo Index Benchmark
+
+Compares radius queries on GeoGridIndex with a full haversine scan over
+every place, on synthetic coordinates spread over Cambodia with places
+clustered around towns. Results are checked to be identical.
+
+Usage (from the SmartTourism directory):
+    python benchmarks/bench_geo_index.py --places 1000000 --queries 200
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from geo_index import GeoGridIndex, haversine_km
+
+# Bounding box of Cambodia (degrees)
+LATITUDE_RANGE = (10.4, 14.7)
+LONGITUDE_RANGE = (102.3, 107.6)
+
+
+def synthetic_coordinates(n_places: int, n_towns: int = 200, seed: int = 0):
+    """Place coordinates: 80% around towns (about 5 km spread), 20% uniform"""
+    rng = np.random.default_rng(seed)
+    town_lat = rng.uniform(*LATITUDE_RANGE, n_towns)
+    town_lon = rng.uniform(*LONGITUDE_RANGE, n_towns)
+    town = rng.integers(0, n_towns, n_places)
+    latitudes = town_lat[town] + rng.normal(0, 0.045, n_places)
+    longitudes = town_lon[town] + rng.normal(0, 0.045, n_places)
+    uniform = rng.random(n_places) < 0.2
+    latitudes[uniform] = rng.uniform(*LATITUDE_RANGE, uniform.sum())
+    longitudes[uniform] = rng.uniform(*LONGITUDE_RANGE, uniform.sum())
+    return latitudes, longitudes, town_lat, town_lon
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--places', type=int, default=1_000_000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--radii', default='1,10,50', help="Comma-separated radii in km")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    latitudes, longitudes, town_lat, town_lon = synthetic_coordinates(args.places, seed=args.seed)
+    start = time.perf_counter()
+    index = GeoGridIndex(latitudes, longitudes)
+    build_seconds = time.perf_counter() - start
+
+    # Users are near towns, where most places are
+    rng = np.random.default_rng(args.seed + 1)
+    town = rng.integers(0, len(town_lat), args.queries)
+    query_lat = town_lat[town] + rng.normal(0, 0.05, args.queries)
+    query_lon = town_lon[town] + rng.normal(0, 0.05, args.queries)
+
+    print(f"Places: {args.places:,}, grid build: {build_seconds:.2f}s, "
+          f"{len(index.cell_keys):,} cells of {index.n_rows} x {index.n_cols}")
+    print(f"{'radius km':>9} {'found':>9} {'grid p50':>9} {'grid p99':>9} {'scan p50':>9} {'speedup':>8}")
+    for radius_km in [float(radius) for radius in args.radii.split(',')]:
+        grid_ms, scan_ms, found = [], [], []
+        for lat, lon in zip(query_lat, query_lon):
+            start = time.perf_counter()
+            ids, _ = index.query_radius(lat, lon, radius_km)
+            grid_ms.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            expected = np.flatnonzero(haversine_km(lat, lon, latitudes, longitudes) <= radius_km)
+            scan_ms.append((time.perf_counter() - start) * 1000)
+
+            if not np.array_equal(ids, expected):
+                raise AssertionError(f"Grid and scan disagree at ({lat}, {lon}), {radius_km} km")
+            found.append(len(ids))
+
+        print(f"{radius_km:>9g} {np.mean(found):>9,.0f} {np.percentile(grid_ms, 50):>9.3f} "
+              f"{np.percentile(grid_ms, 99):>9.3f} {np.percentile(scan_ms, 50):>9.3f} "
+              f"{np.median(scan_ms) / np.median(grid_ms):>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
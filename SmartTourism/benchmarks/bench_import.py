@@ -0,0 +1,151 @@
+"""
+Import Time Benchmark
+
+Measures what a fresh process (a worker, a CLI call, a Streamlit reload)
+pays before its first recommendation:
+
+- import time of the recommender modules, from `python -X importtime`
+  (median over runs), with the third-party packages that dominate it
+- the extra time sklearn.metrics.pairwise takes on top of the first
+  module, as a reference for what importing it on the query path adds
+- import, model load and first query of a published artifact in a fresh
+  process, and whether scikit-learn or SciPy got imported along the way
+
+Usage (from the SmartTourism directory):
+    python benchmarks/bench_import.py
+    python benchmarks/bench_import.py --model-path cbf_model --runs 7
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+SMARTTOURISM_DIR = os.path.dirname(BENCHMARKS_DIR)
+sys.path.insert(0, SMARTTOURISM_DIR)
+
+DEFAULT_MODULES = 'cbf_recommender,recommend_places'
+REFERENCE_MODULE = 'sklearn.metrics.pairwise'
+
+# Packages the query path must not import
+TRAINING_PACKAGES = ('sklearn', 'scipy')
+
+
+def import_times(modules: str) -> dict:
+    """Self and cumulative import time (microseconds) of each module imported by `import modules`"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {modules}'],
+        cwd=SMARTTOURISM_DIR, capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def measure_first_query(model_path: str) -> dict:
+    """Import, load and query in this (fresh) process"""
+    start = time.perf_counter()
+    from contextlib import redirect_stdout
+    from recommend_places import PlaceRecommendationSystem
+    imported = time.perf_counter()
+    with redirect_stdout(sys.stderr):
+        system = PlaceRecommendationSystem(model_path)
+    loaded = time.perf_counter()
+    system.get_recommendations(None, top_n=10)
+    queried = time.perf_counter()
+
+    packages = {name.split('.')[0] for name in sys.modules}
+    return {
+        'import_seconds': imported - start,
+        'load_seconds': loaded - imported,
+        'first_query_seconds': queried - loaded,
+        'training_packages': sorted(packages.intersection(TRAINING_PACKAGES)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--modules', default=DEFAULT_MODULES, help="Comma-separated modules to time")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=8, help="Packages listed per module")
+    parser.add_argument('--model-path', default=None,
+                        help="Published model (a synthetic 4,000-place one is built if omitted)")
+    parser.add_argument('--first-query', default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.first_query:
+        # Child process: report on stdout
+        print(json.dumps(measure_first_query(args.first_query)))
+        return
+
+    print(f"Import time (median of {args.runs} runs, python -X importtime):")
+    modules = [module for module in args.modules.split(',') if module]
+    for module in modules + [REFERENCE_MODULE]:
+        # The reference is imported after the first module, so only its
+        # extra modules are timed
+        statement = f"{modules[0]}, {module}" if module == REFERENCE_MODULE else module
+        label = f"+ {module} (reference)" if module == REFERENCE_MODULE else module
+        try:
+            runs = [import_times(statement) for _ in range(args.runs)]
+        except subprocess.CalledProcessError:
+            print(f"  {label:<40} not installed")
+            continue
+        total_ms = statistics.median(run[module][1] for run in runs) / 1000
+        print(f"  {label:<40} {total_ms:>8.1f} ms")
+
+        if module != REFERENCE_MODULE:
+            # Self time summed per top-level package, median over runs
+            per_package = defaultdict(list)
+            for run in runs:
+                sums = defaultdict(int)
+                for name, (self_us, _) in run.items():
+                    sums[name.split('.')[0]] += self_us
+                for package, self_us in sums.items():
+                    per_package[package].append(self_us)
+            top = sorted(per_package.items(), key=lambda item: -statistics.median(item[1]))
+            for package, values in top[:args.top]:
+                print(f"      {package:<32} {statistics.median(values) / 1000:>8.1f} ms")
+
+    workdir = None
+    try:
+        model_path = args.model_path
+        if model_path is None:
+            from bench_build_model import write_synthetic_csv
+            from build_model import build_model
+
+            workdir = tempfile.mkdtemp(prefix='bench_import_')
+            csv_path = os.path.join(workdir, 'places.csv')
+            write_synthetic_csv(csv_path, 4000, 0, word_names=True)
+            model_path = build_model(csv_path, os.path.join(workdir, 'cbf_model'))['artifact']
+
+        results = []
+        for _ in range(args.runs):
+            child = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--first-query', os.path.abspath(model_path)],
+                cwd=SMARTTOURISM_DIR, capture_output=True, text=True, check=True
+            )
+            results.append(json.loads(child.stdout.strip().splitlines()[-1]))
+    finally:
+        if workdir is not None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"\nFresh process, median of {args.runs} runs:")
+    for key in ('import_seconds', 'load_seconds', 'first_query_seconds'):
+        print(f"  {key.replace('_seconds', ''):<12} {statistics.median(r[key] for r in results) * 1000:>8.1f} ms")
+    training_packages = sorted({package for r in results for package in r['training_packages']})
+    print(f"  scikit-learn / SciPy imported: {', '.join(training_packages) if training_packages else 'no'}")
+
+
+if __name__ == "__main__":
+    main()
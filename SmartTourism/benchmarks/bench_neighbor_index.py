@@ -0,0 +1,120 @@
+"""
+Neighbour Index Benchmark
+
+Measures recall@K and query latency (p50/p99) of the IVF index against
+exact brute-force search on a synthetic catalog shaped like
+clean_place_for_ml.csv (category, rating, review-count features), with
+and without category/province pre-filters.
+
+Recall is tie-aware: a returned place counts as a hit when its score is
+at least the exact K-th best score, since many places share a feature
+vector.
+
+Usage (from the SmartTourism directory):
+    python benchmarks/bench_neighbor_index.py --places 1000000 --queries 200
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from neighbor_index import BruteForceIndex, IVFIndex, normalize_rows
+
+
+# Category mix of clean_place_for_ml.csv
+CATEGORY_IDS = np.array([1, 2, 3, 7])
+CATEGORY_SHARES = np.array([0.12, 0.25, 0.38, 0.25])
+N_PROVINCES = 26
+
+
+def synthetic_catalog(n_places: int, seed: int = 0):
+    """Generate min-max scaled place features plus category/province ids"""
+    rng = np.random.default_rng(seed)
+    category_id = rng.choice(CATEGORY_IDS, size=n_places, p=CATEGORY_SHARES)
+    province_id = rng.integers(1, N_PROVINCES + 1, size=n_places)
+    ratings = np.clip(np.round(rng.normal(4.2, 0.6, n_places), 1), 0.0, 5.0)
+    reviews_count = np.floor(rng.lognormal(3.0, 1.8, n_places))
+
+    features = np.column_stack([category_id, ratings, reviews_count]).astype(np.float32)
+    span = features.max(axis=0) - features.min(axis=0)
+    span[span == 0] = 1.0
+    features = (features - features.min(axis=0)) / span
+    return normalize_rows(features), category_id, province_id
+
+
+def tie_aware_recall(exact_scores: np.ndarray, approx_scores: np.ndarray, k: int) -> float:
+    """Fraction of the top-K found, counting ties with the K-th score as hits"""
+    if len(exact_scores) == 0:
+        return 1.0
+    threshold = exact_scores[min(k, len(exact_scores)) - 1] - 1e-6
+    hits = min(int(np.sum(approx_scores >= threshold)), len(exact_scores))
+    return hits / len(exact_scores)
+
+
+def run_case(name, exact_index, index, queries, candidate_sets, k):
+    """Time one index on one filter case and report recall against brute force"""
+    latencies = []
+    recalls = []
+    for query, candidates in zip(queries, candidate_sets):
+        _, exact_scores = exact_index.search(query, k, candidates)
+        start = time.perf_counter()
+        _, scores = index.search(query, k, candidates)
+        latencies.append((time.perf_counter() - start) * 1000)
+        recalls.append(tie_aware_recall(exact_scores, scores, k))
+
+    latencies = np.array(latencies)
+    print(f"  {name:<28} {index.index_type:<12} recall@{k}: {np.mean(recalls):.4f}  "
+          f"p50: {np.percentile(latencies, 50):7.3f} ms  p99: {np.percentile(latencies, 99):7.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--places', type=int, default=1_000_000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--n-probe', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    unit_features, category_id, province_id = synthetic_catalog(args.places, args.seed)
+
+    start = time.perf_counter()
+    ivf = IVFIndex.build(unit_features, n_probe=args.n_probe, seed=args.seed)
+    build_seconds = time.perf_counter() - start
+    brute = BruteForceIndex(unit_features)
+
+    # Queries: jittered place vectors (profiles look like places)
+    rng = np.random.default_rng(args.seed + 1)
+    query_ids = rng.integers(0, args.places, size=args.queries)
+    queries = normalize_rows(
+        unit_features[query_ids] + rng.normal(0, 0.05, (args.queries, unit_features.shape[1]))
+    )
+
+    def candidate_sets(mask_fn):
+        return [np.flatnonzero(mask_fn(i)) for i in range(args.queries)]
+
+    query_categories = rng.choice(CATEGORY_IDS, size=args.queries)
+    query_provinces = rng.integers(1, N_PROVINCES + 1, size=args.queries)
+    cases = {
+        'no filter': [None] * args.queries,
+        'category': candidate_sets(lambda i: category_id == query_categories[i]),
+        'province': candidate_sets(lambda i: province_id == query_provinces[i]),
+        'category + province': candidate_sets(
+            lambda i: (category_id == query_categories[i]) & (province_id == query_provinces[i])
+        ),
+    }
+
+    print(f"Places: {args.places:,}, queries: {args.queries}, k: {args.k}")
+    print(f"  IVF build: {build_seconds:.2f}s ({ivf.n_lists} lists, n_probe={ivf.n_probe})")
+    for name, candidates in cases.items():
+        run_case(name, brute, brute, queries, candidates, args.k)
+        run_case(name, brute, ivf, queries, candidates, args.k)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Profile Statistics Benchmark
+
+Compares the two ways a cold-start profile gets its popularity
+statistics: looking them up in the table precomputed at model load
+(popularity_stats.py) and computing quantiles over the filtered places.
+For random onboarding preferences it reports the share served by the
+table and the time of both paths on those preferences (candidate
+filtering excluded), and checks that they give the same profile vector.
+The table's build time and size are printed first.
+
+Usage (from the SmartTourism directory):
+    python benchmarks/bench_profile_stats.py --places 1000000 --queries 1000
+    python benchmarks/bench_profile_stats.py --model-path cbf_model
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+
+from bench_batch import random_preferences
+from bench_build_model import write_synthetic_csv
+from build_model import build_model
+from cbf_recommender import TOURIST_ATTRACTION_CATEGORY_ID, CBFRecommender
+from popularity_stats import build_popularity_table
+from user_onboarding import UserOnboarding
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--places', type=int, default=1_000_000)
+    parser.add_argument('--queries', type=int, default=1000)
+    parser.add_argument('--model-path', default=None, help="Existing model (a synthetic one is built if omitted)")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    workdir = None
+    try:
+        model_path = args.model_path
+        if model_path is None:
+            workdir = tempfile.mkdtemp(prefix='bench_profile_stats_')
+            csv_path = os.path.join(workdir, 'places.csv')
+            write_synthetic_csv(csv_path, args.places, args.seed, word_names=True)
+            model_path = build_model(csv_path, os.path.join(workdir, 'cbf_model'))['artifact']
+        recommender = CBFRecommender(model_path, cache_size=0)
+        filter_index = recommender._filter_index
+
+        start = time.perf_counter()
+        table = build_popularity_table(
+            filter_index, list(UserOnboarding.RATING_OPTIONS.values()), TOURIST_ATTRACTION_CATEGORY_ID
+        )
+        build_ms = (time.perf_counter() - start) * 1000
+        table_kb = sum(value.nbytes for value in table.values() if isinstance(value, np.ndarray)) / 1024
+        print(f"\nPlaces: {len(filter_index['ratings']):,}, table build: {build_ms:.1f} ms, "
+              f"size: {table_kb:.0f} KB, groups: {table['count'].size:,}")
+
+        preferences_list = random_preferences(recommender.onboarding, args.queries, args.seed)
+        looked_up = [
+            preferences for preferences in preferences_list
+            if recommender._lookup_user_profile(preferences) is not None
+        ]
+        print(f"Served by the table: {len(looked_up)}/{len(preferences_list)} preferences")
+
+        lookup_seconds, exact_seconds, mismatches = [], [], 0
+        for preferences in looked_up:
+            start = time.perf_counter()
+            lookup_vector = recommender._scale_user_profile(
+                preferences, recommender._lookup_user_profile(preferences)
+            )
+            lookup_seconds.append(time.perf_counter() - start)
+
+            rows = recommender._preference_rows(preferences)
+            rows = rows if len(rows) > 0 else slice(None)
+            start = time.perf_counter()
+            exact_vector = recommender._build_profile_vector(
+                preferences, filter_index['category_id'][rows],
+                filter_index['ratings'][rows], filter_index['reviews_count'][rows]
+            )
+            exact_seconds.append(time.perf_counter() - start)
+            mismatches += not np.array_equal(np.asarray(lookup_vector), np.asarray(exact_vector))
+
+        print(f"{'path':>7} {'p50 ms':>8} {'p99 ms':>8}")
+        for name, seconds in (('lookup', lookup_seconds), ('exact', exact_seconds)):
+            milliseconds = np.array(seconds) * 1000
+            print(f"{name:>7} {np.percentile(milliseconds, 50):>8.3f} {np.percentile(milliseconds, 99):>8.3f}")
+        print(f"Profile vectors differing between the paths: {mismatches}")
+    finally:
+        if workdir is not None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
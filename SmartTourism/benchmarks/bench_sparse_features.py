@@ -0,0 +1,107 @@
+"""
+Sparse Feature Benchmark
+
+Builds the same synthetic catalog with the dense feature space
+(category_id, ratings, reviews_count) and with the sparse one (one-hot
+category and province, log reviews, hashed name tokens), then compares
+query latency (p50/p99) of cold-start and place-based recommendations.
+
+Usage (from the SmartTourism directory):
+    python benchmarks/bench_sparse_features.py --places 100000 --queries 500
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+
+from bench_batch import random_preferences
+from bench_build_model import write_synthetic_csv
+from build_model import build_model
+from cbf_recommender import CBFRecommender
+from neighbor_index import normalize_rows
+
+
+def percentiles_ms(seconds: list) -> str:
+    values = np.array(seconds) * 1000
+    return f"{np.percentile(values, 50):>8.3f} {np.percentile(values, 99):>8.3f}"
+
+
+def time_queries(recommender: CBFRecommender, preferences_list: list, place_ids: np.ndarray, top_n: int):
+    """Latencies of the search step, full cold-start and place-based recommendations"""
+    # Warm the profile cache so every mode times the same work
+    for preferences in preferences_list:
+        recommender._get_candidates_and_profile(preferences)
+
+    search_times = []
+    for preferences in preferences_list:
+        candidates, profile = recommender._get_candidates_and_profile(preferences)
+        start = time.perf_counter()
+        recommender._neighbor_index.search(
+            normalize_rows(profile)[0], top_n, candidates if len(candidates) else None
+        )
+        search_times.append(time.perf_counter() - start)
+
+    new_user_times = []
+    for preferences in preferences_list:
+        start = time.perf_counter()
+        recommender.get_recommendations_for_new_user(preferences, top_n)
+        new_user_times.append(time.perf_counter() - start)
+
+    place_times = []
+    for place_id in place_ids:
+        start = time.perf_counter()
+        recommender.get_recommendations_for_place_id(int(place_id), top_n)
+        place_times.append(time.perf_counter() - start)
+
+    return search_times, new_user_times, place_times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--places', type=int, default=100_000)
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--top-n', type=int, default=10)
+    parser.add_argument('--k', type=int, default=100, help="Neighbours stored per place")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_sparse_features_')
+    try:
+        csv_path = os.path.join(workdir, 'places.csv')
+        write_synthetic_csv(csv_path, args.places, args.seed, word_names=True)
+
+        results = {}
+        for feature_space in ('dense', 'sparse'):
+            summary = build_model(
+                csv_path, os.path.join(workdir, f'cbf_model_{feature_space}'), k=args.k,
+                feature_space=feature_space
+            )
+            recommender = CBFRecommender(summary['artifact'], cache_size=args.queries)
+            preferences_list = random_preferences(recommender.onboarding, args.queries, args.seed)
+            place_ids = np.random.default_rng(args.seed).integers(0, args.places, args.queries)
+            results[feature_space] = (summary, time_queries(recommender, preferences_list, place_ids, args.top_n))
+
+        print(f"\nPlaces: {args.places:,}, queries: {args.queries}, top_n: {args.top_n}")
+        print(f"{'features':>8} {'build s':>8} {'mode':>10} {'p50 ms':>8} {'p99 ms':>8}")
+        for feature_space, (summary, timings) in results.items():
+            for mode, seconds in zip(('search', 'new-user', 'place'), timings):
+                print(f"{feature_space:>8} {summary['seconds']:>8.1f} {mode:>10} {percentiles_ms(seconds)}")
+
+        dense, sparse = results['dense'][1], results['sparse'][1]
+        for mode, dense_times, sparse_times in zip(('search', 'new-user', 'place'), dense, sparse):
+            ratio = np.median(sparse_times) / np.median(dense_times)
+            print(f"  {mode}: sparse/dense p50 = {ratio:.2f}x")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""
+Recommender Benchmark Suite
+
+Builds synthetic catalogs shaped like clean_place_for_ml.csv (4k, 50k,
+500k and 1M places by default) and measures for each size:
+
+- model build time, peak RSS and artifact size (build_model.py)
+- model load time and memory (process RSS, memory_footprint())
+- cold-start latency with a cold and a warm profile cache
+- place-based latency
+- batch throughput
+- mean time per recommendation stage (recommendation_metrics)
+
+Each model is loaded and measured in a fresh process, so load time and
+RSS do not depend on the sizes measured before it. Results are written
+as JSON with the commit and library versions; --compare prints the
+relative change of every metric against an earlier results file.
+
+Usage (from the SmartTourism directory):
+    python benchmarks/bench_suite.py --output bench_results.json
+    python benchmarks/bench_suite.py --sizes 4000,50000 --compare bench_results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+SMARTTOURISM_DIR = os.path.dirname(BENCHMARKS_DIR)
+sys.path.insert(0, SMARTTOURISM_DIR)
+
+from bench_batch import random_preferences
+from bench_build_model import directory_mb, write_synthetic_csv
+
+DEFAULT_SIZES = '4000,50000,500000,1000000'
+
+
+def process_rss_mb() -> float:
+    """Current resident set size of this process in MB (0 where /proc is unavailable)"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def latency_stats(seconds: list) -> dict:
+    """Mean and p50/p95/p99 of request latencies, in milliseconds"""
+    values = np.array(seconds) * 1000
+    return {
+        'mean_ms': float(values.mean()),
+        'p50_ms': float(np.percentile(values, 50)),
+        'p95_ms': float(np.percentile(values, 95)),
+        'p99_ms': float(np.percentile(values, 99)),
+    }
+
+
+def measure_model(model_path: str, queries: int, batch_users: int, top_n: int, seed: int) -> dict:
+    """Load a model in this process and time its recommendation paths"""
+    from cbf_recommender import CBFRecommender
+    from recommendation_metrics import MetricsRegistry
+
+    metrics = MetricsRegistry()
+    rss_before = process_rss_mb()
+    start = time.perf_counter()
+    recommender = CBFRecommender(model_path, cache_size=max(queries, batch_users), metrics=metrics)
+    load_seconds = time.perf_counter() - start
+    rss_after = process_rss_mb()
+
+    preferences_list = random_preferences(recommender.onboarding, queries, seed)
+    n_places = len(recommender.model_package['places_data'])
+    place_ids = random.Random(seed).sample(range(n_places), min(queries, n_places))
+
+    # Cold profile cache: every query filters its candidates and builds its profile
+    cold = []
+    for preferences in preferences_list:
+        recommender.clear_cache()
+        start = time.perf_counter()
+        recommender.get_recommendations_for_new_user(preferences, top_n)
+        cold.append(time.perf_counter() - start)
+
+    for preferences in preferences_list:
+        recommender.get_recommendations_for_new_user(preferences, top_n)
+    warm = []
+    for preferences in preferences_list:
+        start = time.perf_counter()
+        recommender.get_recommendations_for_new_user(preferences, top_n)
+        warm.append(time.perf_counter() - start)
+
+    place = []
+    for place_id in place_ids:
+        start = time.perf_counter()
+        recommender.get_recommendations_for_place_id(place_id, top_n)
+        place.append(time.perf_counter() - start)
+
+    batch_preferences = random_preferences(recommender.onboarding, batch_users, seed + 1)
+    recommender.get_recommendations_batch(batch_preferences, top_n)
+    start = time.perf_counter()
+    recommender.get_recommendations_batch(batch_preferences, top_n)
+    batch_seconds = time.perf_counter() - start
+
+    return {
+        'load_seconds': load_seconds,
+        'load_rss_mb': rss_after - rss_before,
+        'rss_mb': rss_after,
+        'memory_footprint_mb': {
+            key: value / 1024 / 1024 for key, value in recommender.memory_footprint().items()
+        },
+        'new_user_cold_cache': latency_stats(cold),
+        'new_user_warm_cache': latency_stats(warm),
+        'place': latency_stats(place),
+        'batch_users_per_second': batch_users / batch_seconds,
+        'stage_mean_ms': {
+            f"{series['method']}.{series['stage']}": series['mean_ms']
+            for series in metrics.summary() if series['method'] != 'batch'
+        },
+    }
+
+
+def git_commit() -> Optional[str]:
+    """Commit of the working tree (None outside a git checkout)"""
+    try:
+        result = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=SMARTTOURISM_DIR,
+            capture_output=True, text=True, check=True
+        )
+        dirty = subprocess.run(
+            ['git', 'status', '--porcelain', '--untracked-files=no'], cwd=SMARTTOURISM_DIR,
+            capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip() + ('-dirty' if dirty.stdout.strip() else '')
+
+
+def flatten(results: dict) -> dict:
+    """Numeric metrics of a results file keyed by '<places>.path.to.metric'"""
+    metrics = {}
+
+    def walk(prefix, value):
+        if isinstance(value, dict):
+            for key, item in value.items():
+                walk(f"{prefix}.{key}" if prefix else key, item)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            metrics[prefix] = value
+
+    for result in results['results']:
+        walk(str(result['n_places']), {k: v for k, v in result.items() if k != 'n_places'})
+    return metrics
+
+
+def print_comparison(baseline: dict, current: dict):
+    """Print the relative change of every metric present in both results"""
+    old, new = flatten(baseline), flatten(current)
+    print(f"\nChange against {baseline['meta'].get('commit')} ({baseline['meta'].get('timestamp')}):")
+    print(f"{'metric':<52} {'baseline':>12} {'current':>12} {'change':>8}")
+    for key in [key for key in new if key in old]:
+        change = (new[key] - old[key]) / old[key] * 100 if old[key] else float('nan')
+        print(f"{key:<52} {old[key]:>12.4g} {new[key]:>12.4g} {change:>+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help="Comma-separated catalog sizes")
+    parser.add_argument('--queries', type=int, default=300, help="Cold-start and place queries per size")
+    parser.add_argument('--batch-users', type=int, default=1000)
+    parser.add_argument('--top-n', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Worker processes of the model builds")
+    parser.add_argument('--output', default=None, help="JSON results file (printed if omitted)")
+    parser.add_argument('--compare', default=None, help="Earlier JSON results file to compare against")
+    parser.add_argument('--workdir', default=None, help="Directory for CSVs and models (temporary by default)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--measure', default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        # Child process: measure one model and report on stdout
+        print(json.dumps(measure_model(
+            args.measure, args.queries, args.batch_users, args.top_n, args.seed
+        )))
+        return
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='bench_suite_')
+    os.makedirs(workdir, exist_ok=True)
+    env = dict(os.environ, PYTHONPATH=SMARTTOURISM_DIR)
+    results = []
+
+    print(f"{'places':>10} {'build s':>8} {'load s':>7} {'RSS MB':>7} {'cold p50':>9} {'warm p50':>9} "
+          f"{'warm p99':>9} {'place p50':>10} {'place p99':>10} {'batch users/s':>14}")
+    try:
+        for n_places in [int(size) for size in args.sizes.split(',')]:
+            csv_path = os.path.join(workdir, f'places_{n_places}.csv')
+            write_synthetic_csv(csv_path, n_places, args.seed, word_names=True)
+
+            build = subprocess.run(
+                [sys.executable, os.path.join(SMARTTOURISM_DIR, 'build_model.py'), csv_path,
+                 '--output', os.path.join(workdir, f'cbf_model_{n_places}'),
+                 '--workers', str(args.workers), '--json'],
+                env=env, capture_output=True, text=True, check=True
+            )
+            summary = json.loads(build.stdout.strip().splitlines()[-1])
+
+            measure = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--measure', summary['artifact'],
+                 '--queries', str(args.queries), '--batch-users', str(args.batch_users),
+                 '--top-n', str(args.top_n), '--seed', str(args.seed)],
+                env=env, capture_output=True, text=True, check=True
+            )
+            result = {
+                'n_places': n_places,
+                'build': {
+                    'seconds': summary['seconds'],
+                    'peak_rss_mb': summary['peak_rss_mb'],
+                    'artifact_mb': directory_mb(summary['artifact']),
+                    'method': summary['method'],
+                },
+                **json.loads(measure.stdout.strip().splitlines()[-1]),
+            }
+            results.append(result)
+            shutil.rmtree(summary['artifact'], ignore_errors=True)
+            os.remove(csv_path)
+
+            print(f"{n_places:>10,} {result['build']['seconds']:>8.2f} {result['load_seconds']:>7.2f} "
+                  f"{result['rss_mb']:>7.0f} {result['new_user_cold_cache']['p50_ms']:>9.2f} "
+                  f"{result['new_user_warm_cache']['p50_ms']:>9.2f} "
+                  f"{result['new_user_warm_cache']['p99_ms']:>9.2f} {result['place']['p50_ms']:>10.2f} "
+                  f"{result['place']['p99_ms']:>10.2f} {result['batch_users_per_second']:>14,.0f}")
+    finally:
+        if args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'args': {key: value for key, value in vars(args).items() if key not in ('measure', 'workdir', 'output', 'compare')},
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✓ Results written to '{args.output}'")
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            print_comparison(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,700 @@
+"""
+Model Build Module
+
+This module builds the CBF model from a places file without the training
+notebook. The file (clean_place_for_ml.csv, or a backend CSV/NDJSON
+export of the places table) is read in chunks, features are min-max
+scaled in float32, neighbour lists are computed block by block within a
+memory budget, and the result is published as a versioned model artifact.
+The dense N x N similarity matrix is never materialized.
+
+Places with identical feature vectors have identical neighbours, so
+neighbour lists are computed once per distinct vector and then expanded
+to places. Catalogs repeat category/rating/review combinations a lot, so
+this keeps exact builds fast. Above exact_max_vectors distinct vectors,
+candidates come from the nearest IVF lists instead (approximate).
+
+Scoring is split into row tiles. With workers > 1, tiles are scored in a
+process pool: the distinct vectors and the output lists live in shared
+memory, and each worker reduces its tile to top-K before writing it back.
+
+With feature_space='sparse', places are described by one-hot category
+and province, scaled rating and log review count, and hashed TF-IDF name
+tokens (see sparse_features.py); neighbour lists are exact in that space.
+
+Latitude/longitude columns are kept in places_data when the file has
+them, for nearby recommendations (see geo_index.py).
+
+CSV files are streamed with pyarrow when it is installed, otherwise with
+pandas.
+"""
+
+import os
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import shared_memory
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from cbf_recommender import DEFAULT_NEIGHBORS_K
+from geo_index import COORDINATE_COLUMNS
+from model_artifact import DEFAULT_MODEL_PATH, fit_scaler_params, publish_model_artifact
+from neighbor_index import BRUTE_FORCE_MAX_PLACES, DEFAULT_N_PROBE, IVFIndex, normalize_rows
+from sparse_features import DEFAULT_HASH_FEATURES, SparseFeatureSpace, sparse_neighbor_lists
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+    pa_csv = None
+
+
+FEATURE_COLUMNS = ['category_id', 'ratings', 'reviews_count']
+REQUIRED_COLUMNS = ['name'] + FEATURE_COLUMNS
+
+# Optional columns and the value used when a source does not have them
+OPTIONAL_COLUMNS = {'province_id': -1, 'province_name': '', 'category_name': ''}
+
+# Low-cardinality text columns, kept as categoricals while reading
+CATEGORICAL_COLUMNS = ['province_name', 'category_name']
+
+PLACES_COLUMNS = [
+    'place_id', 'name', 'province_id', 'province_name', 'category_id',
+    'category_name', 'ratings', 'reviews_count'
+]
+
+DEFAULT_CHUNK_ROWS = 100_000
+DEFAULT_MEMORY_BUDGET_MB = 256
+
+# Distinct feature vectors up to which neighbour lists are exact
+EXACT_MAX_VECTORS = 100_000
+
+# Bytes per scored pair while selecting neighbours (score, negated copy,
+# argpartition index)
+_BYTES_PER_SCORE = 16
+
+
+def peak_rss_mb(children: bool = False) -> float:
+    """Peak resident set size of this process (or of its largest finished child) in MB"""
+    if not children:
+        # getrusage() keeps the high-water mark of the process that started
+        # this one across fork/exec; /proc has this process's own
+        try:
+            with open('/proc/self/status') as f:
+                for line in f:
+                    if line.startswith('VmHWM:'):
+                        return int(line.split()[1]) / 1024
+        except OSError:
+            pass
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    return resource.getrusage(who).ru_maxrss / 1024
+
+
+def _iter_chunks(source: str, chunksize: int, encoding: str) -> Iterator[pd.DataFrame]:
+    """Yield the rows of a CSV or NDJSON file as DataFrame chunks"""
+    if source.endswith(('.ndjson', '.jsonl')):
+        yield from pd.read_json(source, lines=True, chunksize=chunksize, encoding=encoding)
+        return
+
+    if pa_csv is not None and encoding.replace('-', '').lower() == 'utf8':
+        text_columns = ['name'] + CATEGORICAL_COLUMNS
+        reader = pa_csv.open_csv(
+            source,
+            read_options=pa_csv.ReadOptions(block_size=64 << 20),
+            convert_options=pa_csv.ConvertOptions(
+                column_types={column: pa.string() for column in text_columns}
+            )
+        )
+        for batch in reader:
+            yield batch.to_pandas()
+        return
+
+    yield from pd.read_csv(
+        source, chunksize=chunksize, encoding=encoding,
+        dtype={column: str for column in ['name'] + CATEGORICAL_COLUMNS}
+    )
+
+
+def _prepare_chunk(chunk: pd.DataFrame) -> Tuple[pd.DataFrame, np.ndarray]:
+    """Normalize one chunk to the places_data columns and its raw features"""
+    missing = [column for column in REQUIRED_COLUMNS if column not in chunk.columns]
+    if missing:
+        raise ValueError(f"Places file is missing columns: {missing}")
+
+    places = pd.DataFrame(index=pd.RangeIndex(len(chunk)))
+    places['name'] = chunk['name'].fillna('').astype(str).to_numpy()
+    for column, default in OPTIONAL_COLUMNS.items():
+        values = chunk[column] if column in chunk.columns else pd.Series(default, index=chunk.index)
+        places[column] = values.fillna(default).to_numpy()
+    places['province_id'] = places['province_id'].astype(np.int64)
+    places['category_id'] = chunk['category_id'].fillna(0).astype(np.int64).to_numpy()
+    places['ratings'] = chunk['ratings'].fillna(0).astype(np.float64).to_numpy()
+    places['reviews_count'] = chunk['reviews_count'].fillna(0).astype(np.float64).to_numpy()
+    for column in CATEGORICAL_COLUMNS:
+        places[column] = places[column].astype(str).astype('category')
+    for column in COORDINATE_COLUMNS:
+        if column in chunk.columns:
+            places[column] = pd.to_numeric(chunk[column], errors='coerce').astype(np.float64).to_numpy()
+        else:
+            places[column] = np.nan
+
+    features = places[FEATURE_COLUMNS].to_numpy(dtype=np.float32)
+    return places, features
+
+
+def read_places(
+    source: str,
+    chunksize: int = DEFAULT_CHUNK_ROWS,
+    encoding: str = 'utf-8'
+) -> Tuple[pd.DataFrame, np.ndarray]:
+    """
+    Stream a places file into places_data and a raw feature matrix
+
+    Args:
+        source: CSV or NDJSON (.ndjson/.jsonl) file with at least the
+            name, category_id, ratings and reviews_count columns
+        chunksize: Rows per chunk
+        encoding: Text encoding of the file
+
+    Returns:
+        Tuple of (places_data with dense place ids, float32 raw features)
+    """
+    place_chunks = []
+    feature_chunks = []
+    for chunk in _iter_chunks(source, chunksize, encoding):
+        places, features = _prepare_chunk(chunk)
+        place_chunks.append(places)
+        feature_chunks.append(features)
+    if not place_chunks:
+        raise ValueError(f"No places found in '{source}'")
+
+    columns = {}
+    for column in place_chunks[0].columns:
+        parts = [places[column] for places in place_chunks]
+        if column in CATEGORICAL_COLUMNS:
+            columns[column] = pd.api.types.union_categoricals(parts, ignore_order=True)
+        else:
+            columns[column] = np.concatenate([part.to_numpy() for part in parts])
+    del place_chunks
+
+    n_places = len(columns['name'])
+    columns['place_id'] = np.arange(n_places)
+
+    # Coordinates (latitude/longitude of the backend places table) are kept
+    # when the source has any; missing values stay NaN
+    place_columns = PLACES_COLUMNS + [
+        column for column in COORDINATE_COLUMNS if not np.isnan(columns[column]).all()
+    ]
+    places_data = pd.DataFrame({column: columns[column] for column in place_columns})
+    return places_data, np.concatenate(feature_chunks)
+
+
+def group_identical_rows(unit_features: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Group places with identical feature vectors
+
+    Args:
+        unit_features: L2-normalized place vectors
+
+    Returns:
+        Dictionary with 'vectors' (distinct vectors), 'inverse' (group of
+        each place), 'counts', 'offsets' and 'members' (place ids grouped
+        by group, ascending within a group) and 'rank' (position of each
+        place within its group)
+    """
+    vectors, inverse = np.unique(unit_features, axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    counts = np.bincount(inverse, minlength=len(vectors))
+    offsets = np.zeros(len(vectors) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(counts)
+    members = np.argsort(inverse, kind='stable')
+    rank = np.empty(len(inverse), dtype=np.int64)
+    rank[members] = np.arange(len(inverse)) - np.repeat(offsets[:-1], counts)
+    return {
+        'vectors': vectors, 'inverse': inverse, 'counts': counts,
+        'offsets': offsets, 'members': members, 'rank': rank,
+    }
+
+
+def _block_rows(n_columns: int, memory_budget: int) -> int:
+    """Rows per scoring block so one block stays within the memory budget"""
+    return max(1, memory_budget // max(1, n_columns * _BYTES_PER_SCORE))
+
+
+def _top_groups(
+    vectors: np.ndarray,
+    rows: np.ndarray,
+    candidates: Optional[np.ndarray],
+    width: int,
+    memory_budget: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Best-scoring groups for some groups, each row's own group first
+
+    Args:
+        vectors: Distinct unit vectors (row = group)
+        rows: Groups to find neighbours for
+        candidates: Sorted candidate groups containing all rows (None for all)
+        width: Groups kept per row
+        memory_budget: Bytes available for one scoring block
+
+    Returns:
+        Tuple of (group ids, scores) with shape (len(rows), width), sorted
+        by score descending and padded with -1 / -inf
+    """
+    candidate_vectors = vectors if candidates is None else vectors[candidates]
+    n_candidates = len(candidate_vectors)
+    keep = min(width, n_candidates)
+    group_ids = np.full((len(rows), width), -1, dtype=np.int64)
+    group_scores = np.full((len(rows), width), -np.inf, dtype=np.float32)
+
+    own_columns = rows if candidates is None else np.searchsorted(candidates, rows)
+    block = _block_rows(n_candidates, memory_budget)
+    for start in range(0, len(rows), block):
+        stop = min(start + block, len(rows))
+        local = np.arange(stop - start)
+        scores = vectors[rows[start:stop]] @ candidate_vectors.T
+
+        # Own group first (it also holds the best possible score)
+        own_scores = scores[local, own_columns[start:stop]].copy()
+        scores[local, own_columns[start:stop]] = np.inf
+
+        top = np.argpartition(-scores, keep - 1, axis=1)[:, :keep]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        top_scores[:, 0] = own_scores
+
+        group_ids[start:stop, :keep] = top if candidates is None else candidates[top]
+        group_scores[start:stop, :keep] = top_scores
+    return group_ids, group_scores
+
+
+# Shared-memory arrays attached by a pool worker, by name
+_worker_arrays: Dict[str, np.ndarray] = {}
+_worker_handles = []
+
+
+def _share_array(array: np.ndarray, handles: list) -> Tuple[np.ndarray, Tuple[str, Tuple[int, ...], str]]:
+    """
+    Copy an array into a new shared memory block
+
+    Returns:
+        Tuple of (view of the shared copy, spec a worker attaches it by)
+    """
+    shm = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+    handles.append(shm)
+    shared = np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)
+    shared[...] = array
+    return shared, (shm.name, array.shape, array.dtype.str)
+
+
+def _attach_shared_arrays(specs: Dict[str, Tuple[str, Tuple[int, ...], str]]):
+    """Pool initializer: map the shared arrays into this worker"""
+    for key, (name, shape, dtype) in specs.items():
+        # Pool workers share the parent's resource tracker, and the parent
+        # unlinks the blocks once the pool is done
+        shm = shared_memory.SharedMemory(name=name)
+        _worker_handles.append(shm)
+        _worker_arrays[key] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+def _score_shared_tile(
+    rows: np.ndarray,
+    candidates: Optional[np.ndarray],
+    width: int,
+    memory_budget: int
+) -> int:
+    """Pool task: top groups of one tile, written into the shared output lists"""
+    group_ids, group_scores = _top_groups(
+        _worker_arrays['vectors'], rows, candidates, width, memory_budget
+    )
+    _worker_arrays['group_ids'][rows] = group_ids
+    _worker_arrays['group_scores'][rows] = group_scores
+    return len(rows)
+
+
+def _score_tiles(
+    vectors: np.ndarray,
+    tiles: List[Tuple[np.ndarray, Optional[np.ndarray]]],
+    width: int,
+    memory_budget: int,
+    workers: int = 1
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Best-scoring groups for every group, tile by tile
+
+    Args:
+        vectors: Distinct unit vectors (row = group)
+        tiles: (rows, candidates) pairs covering every group once
+        width: Groups kept per row
+        memory_budget: Bytes available for scoring, shared by all workers
+        workers: Worker processes (1 scores in this process)
+
+    Returns:
+        Tuple of (group ids, scores) with shape (len(vectors), width)
+    """
+    group_ids = np.full((len(vectors), width), -1, dtype=np.int64)
+    group_scores = np.full((len(vectors), width), -np.inf, dtype=np.float32)
+    if workers <= 1 or len(tiles) <= 1:
+        for rows, candidates in tiles:
+            group_ids[rows], group_scores[rows] = _top_groups(
+                vectors, rows, candidates, width, memory_budget
+            )
+        return group_ids, group_scores
+
+    handles = []
+    shared = {}
+    try:
+        specs = {}
+        for key, array in (('vectors', vectors), ('group_ids', group_ids), ('group_scores', group_scores)):
+            shared[key], specs[key] = _share_array(array, handles)
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_attach_shared_arrays, initargs=(specs,)
+        ) as pool:
+            futures = [
+                pool.submit(_score_shared_tile, rows, candidates, width, memory_budget // workers)
+                for rows, candidates in tiles
+            ]
+            for future in futures:
+                future.result()
+        group_ids[...] = shared['group_ids']
+        group_scores[...] = shared['group_scores']
+    finally:
+        # Views must be released before the blocks can be closed
+        shared.clear()
+        for shm in handles:
+            shm.close()
+            shm.unlink()
+    return group_ids, group_scores
+
+
+def exact_group_neighbors(
+    vectors: np.ndarray,
+    width: int,
+    memory_budget: int,
+    workers: int = 1
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Best-scoring groups of every group, scanning all groups in row tiles"""
+    n_vectors = len(vectors)
+    # Several tiles per worker so a slow tile does not hold up the pool
+    tile_rows = _block_rows(n_vectors, memory_budget // max(1, workers))
+    if workers > 1:
+        tile_rows = min(tile_rows, -(-n_vectors // (4 * workers)))
+    tiles = [
+        (np.arange(start, min(start + tile_rows, n_vectors)), None)
+        for start in range(0, n_vectors, max(1, tile_rows))
+    ]
+    return _score_tiles(vectors, tiles, width, memory_budget, workers)
+
+
+def ivf_group_neighbors(
+    vectors: np.ndarray,
+    counts: np.ndarray,
+    width: int,
+    memory_budget: int,
+    n_probe: int = DEFAULT_N_PROBE,
+    seed: int = 0,
+    workers: int = 1
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Approximate best-scoring groups of every group
+
+    Groups are clustered into IVF lists; the groups of one list are scored
+    against the n_probe lists nearest to its centroid (more if those hold
+    fewer than width places). Each list is one tile.
+    """
+    index = IVFIndex.build(vectors, n_probe=n_probe, seed=seed)
+    offsets = index.list_offsets
+    list_members = [np.sort(index.list_ids[offsets[j]:offsets[j + 1]]) for j in range(index.n_lists)]
+    list_places = np.array([counts[members].sum() for members in list_members])
+    centroid_scores = index.centroids @ index.centroids.T
+
+    tiles = []
+    for j, rows in enumerate(list_members):
+        if len(rows) == 0:
+            continue
+        centroid_scores[j, j] = np.inf
+        order = np.argsort(-centroid_scores[j], kind='stable')
+        covered = np.cumsum(list_places[order])
+        n_scan = max(index.n_probe, int(np.searchsorted(covered, width)) + 1)
+        tiles.append((rows, np.sort(np.concatenate([list_members[i] for i in order[:n_scan]]))))
+    return _score_tiles(vectors, tiles, width, memory_budget, workers)
+
+
+def expand_group_neighbors(
+    groups: Dict[str, np.ndarray],
+    group_ids: np.ndarray,
+    group_scores: np.ndarray,
+    k: int,
+    block_size: int = 65536
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Turn group neighbour lists into the per-place neighbour table
+
+    Each group's list is expanded to its first k + 1 member places (own
+    group first); a place then drops itself from its group's list.
+
+    Returns:
+        Tuple of (neighbor_ids, neighbor_scores) with shape (n_places, k),
+        laid out like cbf_recommender.build_neighbor_table
+    """
+    counts, offsets, members = groups['counts'], groups['offsets'], groups['members']
+    n_groups, n_columns = group_ids.shape
+    width = k + 1
+
+    expanded_ids = np.full((n_groups, width), -1, dtype=np.int32)
+    expanded_scores = np.full((n_groups, width), -np.inf, dtype=np.float32)
+    filled = np.zeros(n_groups, dtype=np.int64)
+    all_rows = np.arange(n_groups)
+    for column in range(n_columns):
+        group = group_ids[:, column]
+        take = np.where(group >= 0, np.minimum(counts[np.maximum(group, 0)], width - filled), 0)
+        total = int(take.sum())
+        if total == 0:
+            break
+        rows = np.repeat(all_rows, take)
+        within = np.arange(total) - np.repeat(np.cumsum(take) - take, take)
+        target = filled[rows] + within
+        expanded_ids[rows, target] = members[offsets[group[rows]] + within]
+        expanded_scores[rows, target] = group_scores[rows, column]
+        filled += take
+
+    inverse, rank = groups['inverse'], groups['rank']
+    n_places = len(inverse)
+    neighbor_ids = np.empty((n_places, k), dtype=np.int32)
+    neighbor_scores = np.empty((n_places, k), dtype=np.float32)
+    columns = np.arange(width)
+    for start in range(0, n_places, block_size):
+        stop = min(start + block_size, n_places)
+        group = inverse[start:stop]
+
+        # A place sits at column `rank` of its group's list when rank < width
+        drop = np.minimum(rank[start:stop], width - 1)
+        keep = columns[None, :] != drop[:, None]
+        neighbor_ids[start:stop] = expanded_ids[group][keep].reshape(-1, k)
+        neighbor_scores[start:stop] = expanded_scores[group][keep].reshape(-1, k)
+    return neighbor_ids, neighbor_scores
+
+
+def build_neighbor_lists(
+    unit_features: np.ndarray,
+    k: int = DEFAULT_NEIGHBORS_K,
+    memory_budget_mb: int = DEFAULT_MEMORY_BUDGET_MB,
+    exact_max_vectors: int = EXACT_MAX_VECTORS,
+    n_probe: int = DEFAULT_N_PROBE,
+    workers: int = 1
+) -> Tuple[np.ndarray, np.ndarray, Dict[str, Any]]:
+    """
+    Build the top-K neighbour table of a catalog within a memory budget
+
+    Args:
+        unit_features: L2-normalized place vectors
+        k: Number of neighbours per place
+        memory_budget_mb: Memory for scoring blocks (all workers together), in MB
+        exact_max_vectors: Distinct vectors up to which the lists are exact
+        n_probe: IVF lists scanned per group above exact_max_vectors
+        workers: Worker processes scoring tiles in parallel
+
+    Returns:
+        Tuple of (neighbor_ids, neighbor_scores, info) where info has
+        'distinct_vectors' and 'method' ('exact' or 'ivf')
+    """
+    n_places = unit_features.shape[0]
+    k = max(0, min(k, n_places - 1))
+    groups = group_identical_rows(unit_features)
+    vectors = groups['vectors']
+    memory_budget = memory_budget_mb << 20
+
+    if len(vectors) <= exact_max_vectors:
+        method = 'exact'
+        group_ids, group_scores = exact_group_neighbors(vectors, k + 1, memory_budget, workers)
+    else:
+        method = 'ivf'
+        group_ids, group_scores = ivf_group_neighbors(
+            vectors, groups['counts'], k + 1, memory_budget, n_probe, workers=workers
+        )
+
+    neighbor_ids, neighbor_scores = expand_group_neighbors(groups, group_ids, group_scores, k)
+    return neighbor_ids, neighbor_scores, {'distinct_vectors': int(len(vectors)), 'method': method}
+
+
+def build_model(
+    source: str,
+    output_path: str = DEFAULT_MODEL_PATH,
+    k: int = DEFAULT_NEIGHBORS_K,
+    chunksize: int = DEFAULT_CHUNK_ROWS,
+    memory_budget_mb: int = DEFAULT_MEMORY_BUDGET_MB,
+    encoding: str = 'utf-8',
+    ivf: Optional[bool] = None,
+    exact_max_vectors: int = EXACT_MAX_VECTORS,
+    workers: int = 1,
+    feature_space: str = 'dense',
+    hash_features: int = DEFAULT_HASH_FEATURES
+) -> Dict[str, Any]:
+    """
+    Build the CBF model from a places file and publish it
+
+    Args:
+        source: Places CSV or NDJSON file
+        output_path: Published model path (writes <path>.v<N>/ and <path>.version)
+        k: Number of neighbours per place
+        chunksize: Rows read per chunk
+        memory_budget_mb: Memory for neighbour scoring blocks (all workers together), in MB
+        encoding: Text encoding of the file
+        ivf: Store an IVF query index (default: above BRUTE_FORCE_MAX_PLACES places)
+        exact_max_vectors: Distinct vectors up to which neighbour lists are exact
+        workers: Worker processes for neighbour scoring (1 scores in this process)
+        feature_space: 'dense' (category_id, ratings, reviews_count) or
+            'sparse' (one-hot, log reviews and name tokens)
+        hash_features: Token hash buckets of the sparse feature space
+
+    Returns:
+        Build summary with the published version, stage timings and peak RSS
+    """
+    if feature_space not in ('dense', 'sparse'):
+        raise ValueError(f"Unknown feature space '{feature_space}' (expected 'dense' or 'sparse')")
+    if feature_space == 'sparse':
+        # Sparse neighbour lists are built in this process
+        workers = 1
+
+    timings = {}
+    start = time.perf_counter()
+
+    places_data, raw_features = read_places(source, chunksize, encoding)
+    timings['read'] = time.perf_counter() - start
+
+    stage = time.perf_counter()
+    scaler_params = fit_scaler_params(raw_features.astype(np.float64))
+    features = raw_features * scaler_params['scale'].astype(np.float32)
+    features += scaler_params['min'].astype(np.float32)
+    del raw_features
+    unit_features = normalize_rows(features)
+    timings['scale'] = time.perf_counter() - stage
+
+    n_places = len(places_data)
+    sparse_arrays = {}
+    if feature_space == 'sparse':
+        stage = time.perf_counter()
+        space = SparseFeatureSpace.fit(places_data, hash_features)
+        data, indices, indptr = space.transform(places_data)
+        sparse_arrays = {
+            'sparse_data': data, 'sparse_indices': indices,
+            'sparse_indptr': indptr, 'sparse_idf': space.idf,
+            'feature_space': space.to_header(),
+        }
+        timings['sparse_features'] = time.perf_counter() - stage
+
+        stage = time.perf_counter()
+        neighbor_ids, neighbor_scores = sparse_neighbor_lists(
+            data, indices, indptr, space.n_features, space.text_offset, k, memory_budget_mb << 20
+        )
+        neighbor_info = {'distinct_vectors': n_places, 'method': 'exact'}
+        timings['neighbors'] = time.perf_counter() - stage
+    else:
+        stage = time.perf_counter()
+        neighbor_ids, neighbor_scores, neighbor_info = build_neighbor_lists(
+            unit_features, k, memory_budget_mb, exact_max_vectors, workers=workers
+        )
+        timings['neighbors'] = time.perf_counter() - stage
+
+    model_package = {
+        'neighbor_ids': neighbor_ids,
+        'neighbor_scores': neighbor_scores,
+        'places_data': places_data,
+        'feature_data': pd.DataFrame(
+            features, index=pd.RangeIndex(n_places, name='place_id'), columns=FEATURE_COLUMNS
+        ),
+        'unit_features': unit_features,
+        'scaler_params': scaler_params,
+        'feature_columns': list(FEATURE_COLUMNS),
+        'metadata': {
+            'training_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'n_places': n_places,
+            'features_used': list(FEATURE_COLUMNS),
+            'neighbors_k': int(neighbor_ids.shape[1]),
+            'model_type': 'Content-Based Filtering (Cosine Similarity)',
+            'source': os.path.basename(source),
+            'neighbor_build': neighbor_info['method'],
+            'feature_space': feature_space,
+        }
+    }
+    model_package.update(sparse_arrays)
+
+    if ivf is None:
+        # Sparse models are searched by column, not through an IVF index
+        ivf = feature_space == 'dense' and n_places > BRUTE_FORCE_MAX_PLACES
+    if ivf:
+        stage = time.perf_counter()
+        model_package.update(IVFIndex.build(unit_features).to_arrays())
+        timings['ivf'] = time.perf_counter() - stage
+
+    stage = time.perf_counter()
+    pointer = publish_model_artifact(model_package, output_path)
+    timings['write'] = time.perf_counter() - stage
+
+    return {
+        'version': pointer['version'],
+        'artifact': pointer['artifact'],
+        'n_places': n_places,
+        'neighbors_k': int(neighbor_ids.shape[1]),
+        **neighbor_info,
+        'feature_space': feature_space,
+        'workers': workers,
+        'ivf_index': bool(ivf),
+        'timings': timings,
+        'seconds': time.perf_counter() - start,
+        'peak_rss_mb': peak_rss_mb(),
+        'worker_peak_rss_mb': peak_rss_mb(children=True) if workers > 1 else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Build and publish the CBF model from a places file")
+    parser.add_argument('source', nargs='?', default='clean_place_for_ml.csv',
+                        help="Places CSV or NDJSON export")
+    parser.add_argument('--output', default=DEFAULT_MODEL_PATH,
+                        help="Published model path (writes <path>.v<N>/ and <path>.version)")
+    parser.add_argument('--k', type=int, default=DEFAULT_NEIGHBORS_K)
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument('--memory-budget-mb', type=int, default=DEFAULT_MEMORY_BUDGET_MB)
+    parser.add_argument('--encoding', default='utf-8')
+    parser.add_argument('--ivf', action='store_true', default=None,
+                        help="Store an IVF query index (default: large catalogs only)")
+    parser.add_argument('--exact-max-vectors', type=int, default=EXACT_MAX_VECTORS)
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Worker processes for neighbour scoring (default: 1)")
+    parser.add_argument('--feature-space', choices=['dense', 'sparse'], default='dense',
+                        help="Feature space (sparse adds one-hot, log reviews and name tokens)")
+    parser.add_argument('--hash-features', type=int, default=DEFAULT_HASH_FEATURES,
+                        help="Token hash buckets of the sparse feature space")
+    parser.add_argument('--json', action='store_true', help="Print the build summary as JSON")
+    args = parser.parse_args()
+
+    summary = build_model(
+        args.source, args.output, args.k, args.chunksize, args.memory_budget_mb,
+        args.encoding, args.ivf, args.exact_max_vectors, args.workers,
+        args.feature_space, args.hash_features
+    )
+
+    if args.json:
+        print(json.dumps(summary))
+    else:
+        print(f"✓ Model version {summary['version']} published to '{summary['artifact']}'")
+        print(f"  Places: {summary['n_places']:,} ({summary['distinct_vectors']:,} distinct feature vectors)")
+        print(f"  Neighbour lists: top-{summary['neighbors_k']} ({summary['feature_space']} features, "
+              f"{summary['method']}, "
+              f"{summary['workers']} worker{'s' if summary['workers'] != 1 else ''})")
+        print(f"  Build time: {summary['seconds']:.2f}s "
+              f"({', '.join(f'{stage} {seconds:.2f}s' for stage, seconds in summary['timings'].items())})")
+        print(f"  Peak RSS: {summary['peak_rss_mb']:.0f} MB", end='')
+        print(f" (largest worker {summary['worker_peak_rss_mb']:.0f} MB)" if summary['workers'] > 1 else '')
@@ -5,34 +5,354 @@ This module provides content-based filtering recommendations that work
 with user preferences collected during onboarding for cold-start users.
 """
 
+import mmap
 import pandas as pd
 import numpy as np
-import pickle
-from typing import Dict, List, Optional, Any, Union
-from sklearn.metrics.pairwise import cosine_similarity
+from typing import Dict, Iterator, List, Optional, Any, Tuple, Union
 from user_onboarding import UserOnboarding
+from recommendation_cache import LRUCache, preference_signature
+from neighbor_index import normalize_rows, select_top_n, build_neighbor_index, mmr_rerank
+from sparse_features import SparseFeatureSpace, SparseIndex
+from geo_index import COORDINATE_COLUMNS, DEFAULT_RADIUS_KM, GeoGridIndex
+from recommendation_export import batch_row_columns, iter_export_rows
+from recommendation_metrics import NULL_TIMER, MetricsRegistry, StageTimer
+from popularity_stats import (
+    STATISTIC_COLUMNS, build_popularity_table, lookup_profile_statistics,
+    reviews_count_statistic
+)
+from model_artifact import (
+    DEFAULT_MODEL_PATH, ensure_place_ids, get_scaler_params,
+    load_model_package, resolve_model_path
+)
+
+
+# Number of precomputed neighbours kept per place in the model package
+DEFAULT_NEIGHBORS_K = 100
+
+# Subcategory filters only apply to Tourist Attractions
+TOURIST_ATTRACTION_CATEGORY_ID = 1
+
+# Shards holding more than this share of the catalog are not worth
+# materializing; the preference filter scans all places instead
+SHARD_MAX_SHARE = 1 / 8
+
+# Columns returned by every recommendation method
+RECOMMENDATION_COLUMNS = [
+    'place_id', 'name', 'province_name', 'category_name', 'ratings',
+    'reviews_count', 'similarity_score'
+]
+
+# Columns added by nearby recommendations
+NEARBY_COLUMNS = ['distance_km', 'combined_score']
+
+# Candidates re-ranked for diversity (maximal marginal relevance) when a
+# recommendation asks for diversity > 0
+MMR_POOL_SIZE = 200
+
+# Share of the nearby ranking score given to closeness (the rest is
+# content similarity)
+DEFAULT_DISTANCE_WEIGHT = 0.3
+
+
+def build_neighbor_table(
+    feature_matrix: np.ndarray,
+    k: int = DEFAULT_NEIGHBORS_K,
+    block_size: int = 1024
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Build a compact top-K neighbour table from scaled place features
+    
+    Similarities are computed one block of rows at a time, so the full
+    N x N cosine matrix is never materialized.
+    
+    Args:
+        feature_matrix: 2D array of scaled place features (one row per place)
+        k: Number of neighbours to keep per place
+        block_size: Number of rows scored per block
+        
+    Returns:
+        Tuple of (neighbor_ids, neighbor_scores) with shape (n_places, k):
+        int32 place ids and float32 cosine scores, sorted by score
+        descending. A place is never listed as its own neighbour.
+    """
+    unit_features = normalize_rows(feature_matrix)
+    return neighbor_rows(unit_features, np.arange(unit_features.shape[0]), k, block_size)
+
+
+def neighbor_rows(
+    unit_features: np.ndarray,
+    rows: np.ndarray,
+    k: int = DEFAULT_NEIGHBORS_K,
+    block_size: int = 1024
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute the top-K neighbour lists of selected places
+    
+    Args:
+        unit_features: L2-normalized place vectors (row = place id)
+        rows: Place ids whose neighbour lists are computed
+        k: Number of neighbours to keep per place
+        block_size: Number of rows scored per block
+        
+    Returns:
+        Tuple of (neighbor_ids, neighbor_scores) with shape (len(rows), k),
+        laid out like build_neighbor_table
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    n_places = unit_features.shape[0]
+    k = max(0, min(k, n_places - 1))
+    
+    neighbor_ids = np.empty((len(rows), k), dtype=np.int32)
+    neighbor_scores = np.empty((len(rows), k), dtype=np.float32)
+    if k == 0:
+        return neighbor_ids, neighbor_scores
+    
+    for start in range(0, len(rows), block_size):
+        block_rows = rows[start:start + block_size]
+        block_scores = unit_features[block_rows] @ unit_features.T
+        
+        # Exclude each place from its own neighbour list
+        block_scores[np.arange(len(block_rows)), block_rows] = -np.inf
+        
+        top = np.argpartition(-block_scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(block_scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        
+        stop = start + len(block_rows)
+        neighbor_ids[start:stop] = np.take_along_axis(top, order, axis=1)
+        neighbor_scores[start:stop] = np.take_along_axis(top_scores, order, axis=1)
+    
+    return neighbor_ids, neighbor_scores
+
+
+def build_filter_index(
+    places_data: pd.DataFrame,
+    subcategory_defs: Dict[str, Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    Precompute the columns needed to filter places by preferences
+    
+    Subcategory membership is stored as one bitmask per place (bit j set
+    when the place name matches subcategory j), and category/province
+    values are integer-coded, so a preference filter is a handful of
+    vectorized mask operations instead of repeated substring scans.
+    
+    Places are also sharded by category, province and subcategory: each
+    shard is a sorted posting list of place ids, so a query restricted to
+    a few provinces or subcategories only touches the rows of its shard.
+    
+    Args:
+        places_data: Places DataFrame
+        subcategory_defs: Subcategory definitions (keywords per subcategory)
+        
+    Returns:
+        Dictionary of filter arrays aligned with the rows of places_data
+    """
+    subcategory_ids = list(subcategory_defs.keys())
+    if len(subcategory_ids) > 32:
+        raise ValueError("At most 32 subcategories are supported by the membership bitmap")
+    
+    names = places_data['name'].astype(str).str.lower()
+    keyword_matches = {}
+    for subcat_id, subcat in subcategory_defs.items():
+        match = np.zeros(len(places_data), dtype=bool)
+        for keyword in subcat.get('keywords', []):
+            match |= names.str.contains(keyword.lower(), na=False, regex=False).values
+        keyword_matches[subcat_id] = match
+    
+    subcategory_bits = np.zeros(len(places_data), dtype=np.uint32)
+    for bit, subcat_id in enumerate(subcategory_ids):
+        if subcat_id == 'other_attractions':
+            # "Other" matches places that match no other subcategory
+            member = np.ones(len(places_data), dtype=bool)
+            for other_id, other_match in keyword_matches.items():
+                if other_id != 'other_attractions':
+                    member &= ~other_match
+        else:
+            member = keyword_matches[subcat_id]
+        subcategory_bits[member] |= np.uint32(1 << bit)
+    
+    category_codes, category_values = pd.factorize(places_data['category_id'])
+    province_codes, province_values = pd.factorize(places_data['province_id'])
+    category_rows, category_offsets = _posting_lists(category_codes, len(category_values))
+    province_rows, province_offsets = _posting_lists(province_codes, len(province_values))
+    
+    # Subcategory shards list Tourist Attractions only (other categories are
+    # never filtered by subcategory)
+    tourist_attraction = places_data['category_id'].values == TOURIST_ATTRACTION_CATEGORY_ID
+    subcategory_lists = [
+        np.flatnonzero(tourist_attraction & ((subcategory_bits & np.uint32(1 << bit)) != 0))
+        for bit in range(len(subcategory_ids))
+    ]
+    subcategory_offsets = np.zeros(len(subcategory_ids) + 1, dtype=np.int64)
+    subcategory_offsets[1:] = np.cumsum([len(rows) for rows in subcategory_lists])
+    
+    return {
+        'subcategory_bit': {subcat_id: 1 << bit for bit, subcat_id in enumerate(subcategory_ids)},
+        'subcategory_bits': subcategory_bits,
+        'category_codes': category_codes.astype(np.int32),
+        'category_values': np.asarray(category_values),
+        'province_codes': province_codes.astype(np.int32),
+        'province_values': np.asarray(province_values),
+        'tourist_attraction': tourist_attraction,
+        'category_rows': category_rows,
+        'category_offsets': category_offsets,
+        'province_rows': province_rows,
+        'province_offsets': province_offsets,
+        'subcategory_rows': np.concatenate(subcategory_lists + [np.empty(0, dtype=np.int64)]),
+        'subcategory_offsets': subcategory_offsets,
+        'category_id': places_data['category_id'].values,
+        'ratings': places_data['ratings'].values,
+        'reviews_count': places_data['reviews_count'].values,
+    }
+
+
+def _posting_lists(codes: np.ndarray, n_codes: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Place ids grouped by code: code c's ids are rows[offsets[c]:offsets[c + 1]], ascending"""
+    rows = np.argsort(codes, kind='stable')
+    offsets = np.zeros(n_codes + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(np.bincount(codes, minlength=n_codes))
+    return rows, offsets
+
+
+def _sorted_isin(values: np.ndarray, sorted_ids: np.ndarray) -> np.ndarray:
+    """Membership of values in sorted ids by binary search (O(n log m), no catalog-wide mask)"""
+    if len(sorted_ids) == 0:
+        return np.zeros(len(values), dtype=bool)
+    return sorted_ids.take(np.searchsorted(sorted_ids, values), mode='clip') == values
+
+
+def _code_lookup(values: np.ndarray, selected: List[Any]) -> np.ndarray:
+    """Boolean lookup table over the distinct values of an integer-coded column"""
+    selected = set(selected)
+    return np.array([value in selected for value in values.tolist()], dtype=bool)
+
+
+def _coded_isin(codes: np.ndarray, values: np.ndarray, selected: List[Any]) -> np.ndarray:
+    """Vectorized isin over an integer-coded column via a per-code lookup table"""
+    return _code_lookup(values, selected)[codes]
+
+
+def _shard_rows(
+    filter_index: Dict[str, Any],
+    preferences: Dict[str, Any]
+) -> Optional[np.ndarray]:
+    """
+    Smallest precomputed shard holding every place that matches preferences
+    
+    The category, province and subcategory selections each pick a union
+    of posting lists; the smallest union is materialized. Subcategory
+    shards only apply when Tourist Attractions are the only category.
+    
+    Args:
+        filter_index: Filter arrays from build_filter_index
+        preferences: User preferences dictionary
+        
+    Returns:
+        Sorted place ids, or None when no selection narrows the catalog
+        below SHARD_MAX_SHARE of its places
+    """
+    selections = []
+    if preferences.get('categories'):
+        codes = np.flatnonzero(_code_lookup(filter_index['category_values'], preferences['categories']))
+        selections.append(('category', codes))
+    if preferences.get('province_ids'):
+        codes = np.flatnonzero(_code_lookup(filter_index['province_values'], preferences['province_ids']))
+        selections.append(('province', codes))
+    categories = set(preferences.get('categories') or [])
+    if preferences.get('subcategories') and categories == {TOURIST_ATTRACTION_CATEGORY_ID}:
+        bits = filter_index['subcategory_bit']
+        codes = np.array(sorted({
+            bits[subcat_id].bit_length() - 1
+            for subcat_id in preferences['subcategories'] if subcat_id in bits
+        }), dtype=np.int64)
+        selections.append(('subcategory', codes))
+    
+    best = None
+    for shard, codes in selections:
+        offsets = filter_index[f'{shard}_offsets']
+        size = int(np.sum(offsets[codes + 1] - offsets[codes]))
+        if best is None or size < best[2]:
+            best = (shard, codes, size)
+    
+    n_places = len(filter_index['ratings'])
+    if best is None or best[2] > n_places * SHARD_MAX_SHARE:
+        return None
+    
+    shard, codes, _ = best
+    rows, offsets = filter_index[f'{shard}_rows'], filter_index[f'{shard}_offsets']
+    parts = [rows[offsets[code]:offsets[code + 1]] for code in codes]
+    if len(parts) == 1:
+        return parts[0].astype(np.int64)
+    merged = np.sort(np.concatenate(parts + [np.empty(0, dtype=np.int64)]))
+    if shard == 'subcategory' and len(merged) > 1:
+        # A place can belong to several subcategories
+        merged = merged[np.concatenate([[True], merged[1:] != merged[:-1]])]
+    return merged
+
+
+def _check_diversity(diversity: float):
+    """Raise ValueError unless diversity is between 0 and 1"""
+    if not 0.0 <= diversity <= 1.0:
+        raise ValueError(f"diversity must be between 0 and 1, got {diversity}")
+
+
+def _pool_size(top_n: int, diversity: float) -> int:
+    """Number of ranked candidates to fetch before the diversity re-ranking"""
+    return max(top_n, MMR_POOL_SIZE) if diversity > 0 else top_n
 
 
 class CBFRecommender:
     """Content-Based Filtering Recommender with user preference support"""
     
-    def __init__(self, model_path: str = 'cbf_model.pkl'):
+    def __init__(
+        self,
+        model_path: str = DEFAULT_MODEL_PATH,
+        cache_size: int = 256,
+        index_type: str = 'auto',
+        metrics: Optional[MetricsRegistry] = None
+    ):
         """
         Initialize the CBF recommender
         
         Args:
-            model_path: Path to the saved CBF model pickle file
+            model_path: Path to the saved CBF model (published model path,
+                artifact directory or legacy pickle file; '<path>.pkl' is used
+                if nothing else exists)
+            cache_size: Maximum number of preference signatures whose candidate
+                sets and profile vectors are memoized (0 disables the cache)
+            index_type: Neighbour index for similarity search: 'brute_force',
+                'ivf', or 'auto' (chosen by catalog size)
+            metrics: Registry receiving per-stage timings of every request
+                (e.g. recommendation_metrics.METRICS); None disables timing
         """
-        self.model_path = model_path
+        self.model_path = resolve_model_path(model_path)
+        self.index_type = index_type
+        self.metrics = metrics
+        self.model_version = 0
+        # Set by ModelRegistry (see model_registry.model_fingerprint)
+        self.model_fingerprint = None
         self.model_package = None
         self.onboarding = None
+        self._unit_features = None
+        self._neighbor_index = None
+        self._scaler_params = None
+        self._feature_space = None
+        self._filter_index = None
+        self._popularity_table = None
+        self._geo_index = None
+        self._export_columns = None
+        self._name_to_ids = {}
+        self._profile_cache = LRUCache(cache_size)
         self._load_model()
     
     def _load_model(self):
-        """Load the trained CBF model"""
+        """Load the trained CBF model (artifact directory or legacy pickle)"""
         try:
-            with open(self.model_path, 'rb') as f:
-                self.model_package = pickle.load(f)
+            self.model_package = load_model_package(self.model_path)
+            self.model_version = int(self.model_package.get('model_version', 0))
+            self._scaler_params = get_scaler_params(self.model_package)
+            self._prepare_place_ids()
             
             # Initialize onboarding with places data
             if 'places_data' in self.model_package:
@@ -45,15 +365,92 @@ class CBFRecommender:
                 except FileNotFoundError:
                     self.onboarding = UserOnboarding()
             
+            self._prepare_neighbor_index()
+            self._filter_index = build_filter_index(
+                self.model_package['places_data'],
+                UserOnboarding.TOURIST_ATTRACTION_SUBCATEGORIES
+            )
+            self._popularity_table = build_popularity_table(
+                self._filter_index,
+                list(UserOnboarding.RATING_OPTIONS.values()),
+                TOURIST_ATTRACTION_CATEGORY_ID
+            )
+            self._prepare_geo_index()
+            
             print(f"✓ CBF Model loaded successfully")
             print(f"  Model type: {self.model_package['metadata']['model_type']}")
             print(f"  Training date: {self.model_package['metadata']['training_date']}")
             print(f"  Total places: {self.model_package['metadata']['n_places']}")
+            print(f"  Model version: {self.model_version}")
         except FileNotFoundError:
             raise FileNotFoundError(f"Model file not found: {self.model_path}")
         except Exception as e:
             raise Exception(f"Error loading model: {str(e)}")
     
+    def _prepare_place_ids(self):
+        """Key the model by dense integer place ids and build the name lookup"""
+        places_data = ensure_place_ids(self.model_package)['places_data']
+        
+        # name -> place ids (several places can share a name)
+        name_codes, unique_names = pd.factorize(places_data['name'])
+        order = np.argsort(name_codes, kind='stable')
+        bounds = np.searchsorted(name_codes[order], np.arange(len(unique_names) + 1))
+        self._name_to_ids = {
+            name: order[bounds[i]:bounds[i + 1]]
+            for i, name in enumerate(unique_names)
+        }
+    
+    def get_place_ids(self, place_name: str) -> List[int]:
+        """
+        Look up the ids of all places with a given name
+        
+        Args:
+            place_name: Place name
+            
+        Returns:
+            List of place ids (empty if the name is unknown)
+        """
+        return self._name_to_ids.get(place_name, np.empty(0, dtype=np.int64)).tolist()
+    
+    def _prepare_neighbor_index(self):
+        """Prepare normalized features, the neighbour index and the top-K table"""
+        feature_data = self.model_package['feature_data']
+        if 'unit_features' in self.model_package:
+            self._unit_features = self.model_package['unit_features']
+        else:
+            self._unit_features = normalize_rows(feature_data.values)
+        
+        if self.model_package.get('feature_space', {}).get('type') == 'sparse':
+            # Models built with sparse features are searched in that space
+            self._feature_space = SparseFeatureSpace.from_header(
+                self.model_package['feature_space'], self.model_package['sparse_idf']
+            )
+            self._neighbor_index = SparseIndex(
+                self.model_package['sparse_data'], self.model_package['sparse_indices'],
+                self.model_package['sparse_indptr'], self._feature_space.n_features
+            )
+        else:
+            self._neighbor_index = build_neighbor_index(
+                self._unit_features, self.index_type, arrays=self.model_package
+            )
+        
+        if 'neighbor_ids' not in self.model_package:
+            # Legacy models ship a dense N x N similarity matrix; derive the
+            # compact neighbour table from the features and drop the matrix
+            neighbor_ids, neighbor_scores = build_neighbor_table(feature_data.values)
+            self.model_package['neighbor_ids'] = neighbor_ids
+            self.model_package['neighbor_scores'] = neighbor_scores
+            self.model_package.pop('similarity_matrix', None)
+            print(f"  Built top-{neighbor_ids.shape[1]} neighbour table from legacy model")
+    
+    def _prepare_geo_index(self):
+        """Index place coordinates for nearby recommendations (models with coordinates only)"""
+        places_data = self.model_package['places_data']
+        if all(column in places_data.columns for column in COORDINATE_COLUMNS):
+            self._geo_index = GeoGridIndex(
+                *(places_data[column].to_numpy(dtype=np.float64) for column in COORDINATE_COLUMNS)
+            )
+    
     def filter_places_by_preferences(
         self,
         preferences: Dict[str, Any],
@@ -69,77 +466,94 @@ class CBFRecommender:
         Returns:
             Filtered DataFrame
         """
-        if places_data is None:
-            places_data = self.model_package['places_data'].copy()
-        else:
-            places_data = places_data.copy()
+        model_places = self.model_package['places_data']
+        if places_data is None or places_data is model_places:
+            return model_places.iloc[self._preference_rows(preferences)]
         
-        # Filter by categories
-        if preferences.get('categories'):
-            places_data = places_data[places_data['category_id'].isin(preferences['categories'])]
+        filter_index = build_filter_index(
+            places_data, UserOnboarding.TOURIST_ATTRACTION_SUBCATEGORIES
+        )
+        return places_data.iloc[self._preference_rows(preferences, filter_index)]
+    
+    def _preference_rows(
+        self,
+        preferences: Dict[str, Any],
+        filter_index: Optional[Dict[str, Any]] = None
+    ) -> np.ndarray:
+        """
+        Find the place ids matching user preferences
         
-        # Filter by subcategories (for Tourist Attractions)
-        if preferences.get('subcategories') and self.onboarding:
-            subcategories = preferences['subcategories']
-            subcat_defs = self.onboarding.TOURIST_ATTRACTION_SUBCATEGORIES
-            
-            # Only apply subcategory filtering to Tourist Attractions (category_id == 1)
-            tourist_attractions_mask = places_data['category_id'] == 1
-            
-            # Build a mask for matching subcategories
-            subcategory_match_mask = pd.Series(False, index=places_data.index)
+        Only the rows of the smallest matching shard are filtered when the
+        preferences select few categories, provinces or subcategories.
+        
+        Args:
+            preferences: User preferences dictionary
+            filter_index: Filter arrays from build_filter_index (defaults to
+                the index precomputed for the model's places)
             
-            # For each selected subcategory, find matching places
-            for subcat_id in subcategories:
-                if subcat_id in subcat_defs:
-                    subcat = subcat_defs[subcat_id]
-                    keywords = subcat.get('keywords', [])
-                    
-                    if subcat_id == 'other_attractions':
-                        # For "other", match places that don't match any other subcategory
-                        # First, get all keywords from other subcategories
-                        all_other_keywords = []
-                        for other_subcat_id, other_subcat in subcat_defs.items():
-                            if other_subcat_id != 'other_attractions':
-                                all_other_keywords.extend(other_subcat.get('keywords', []))
-                        
-                        # Match tourist attractions that don't contain any of the other keywords
-                        if all_other_keywords:
-                            ta_names = places_data.loc[tourist_attractions_mask, 'name'].str.lower()
-                            other_mask = pd.Series(True, index=places_data.loc[tourist_attractions_mask].index)
-                            for keyword in all_other_keywords:
-                                other_mask = other_mask & ~ta_names.str.contains(
-                                    keyword.lower(), na=False, regex=False
-                                )
-                            subcategory_match_mask[other_mask.index] = subcategory_match_mask[other_mask.index] | other_mask
-                        else:
-                            # If no keywords defined, match all tourist attractions
-                            subcategory_match_mask[tourist_attractions_mask] = True
-                    else:
-                        # Match tourist attractions that contain any of the keywords
-                        if keywords:
-                            ta_names = places_data.loc[tourist_attractions_mask, 'name'].str.lower()
-                            keyword_mask = pd.Series(False, index=places_data.loc[tourist_attractions_mask].index)
-                            for keyword in keywords:
-                                keyword_mask = keyword_mask | ta_names.str.contains(
-                                    keyword.lower(), na=False, regex=False
-                                )
-                            subcategory_match_mask[keyword_mask.index] = subcategory_match_mask[keyword_mask.index] | keyword_mask
+        Returns:
+            Sorted int64 place ids
+        """
+        if filter_index is None:
+            filter_index = self._filter_index
+        
+        rows = _shard_rows(filter_index, preferences)
+        if rows is None:
+            return np.flatnonzero(self._preference_mask(preferences, filter_index))
+        return rows[self._preference_mask(preferences, filter_index, rows)]
+    
+    def _preference_mask(
+        self,
+        preferences: Dict[str, Any],
+        filter_index: Optional[Dict[str, Any]] = None,
+        rows: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Compute the boolean mask of places matching user preferences
+        
+        Args:
+            preferences: User preferences dictionary
+            filter_index: Filter arrays from build_filter_index (defaults to
+                the index precomputed for the model's places)
+            rows: Optional place ids to evaluate (defaults to all places)
             
-            # Keep non-tourist attractions (they pass through)
-            # Only filter tourist attractions by subcategory
-            final_mask = ~tourist_attractions_mask | subcategory_match_mask
-            places_data = places_data[final_mask]
+        Returns:
+            Boolean array aligned with rows (or with the rows of places_data)
+        """
+        if filter_index is None:
+            filter_index = self._filter_index
+        
+        def column(name: str) -> np.ndarray:
+            return filter_index[name] if rows is None else filter_index[name][rows]
         
         # Filter by minimum rating
         min_rating = preferences.get('min_rating', 0.0)
-        places_data = places_data[places_data['ratings'] >= min_rating]
+        mask = column('ratings') >= min_rating
+        
+        # Filter by categories
+        if preferences.get('categories'):
+            mask &= _coded_isin(
+                column('category_codes'), filter_index['category_values'],
+                preferences['categories']
+            )
+        
+        # Filter by subcategories (only Tourist Attractions are filtered,
+        # other categories pass through)
+        if preferences.get('subcategories') and self.onboarding:
+            selected_bits = 0
+            for subcat_id in preferences['subcategories']:
+                selected_bits |= filter_index['subcategory_bit'].get(subcat_id, 0)
+            subcategory_match = (column('subcategory_bits') & np.uint32(selected_bits)) != 0
+            mask &= ~column('tourist_attraction') | subcategory_match
         
         # Filter by provinces (if specified)
         if preferences.get('province_ids'):
-            places_data = places_data[places_data['province_id'].isin(preferences['province_ids'])]
+            mask &= _coded_isin(
+                column('province_codes'), filter_index['province_values'],
+                preferences['province_ids']
+            )
         
-        return places_data
+        return mask
     
     def create_user_profile_vector(
         self,
@@ -156,8 +570,10 @@ class CBFRecommender:
         Returns:
             User profile vector (numpy array) matching the feature space
         """
-        if places_data is None:
-            places_data = self.model_package['places_data']
+        model_places = self.model_package['places_data']
+        if places_data is None or places_data is model_places:
+            _, profile_vector = self._get_candidates_and_profile(preferences)
+            return profile_vector.copy()
         
         # Filter places by preferences
         filtered_places = self.filter_places_by_preferences(preferences, places_data)
@@ -166,9 +582,80 @@ class CBFRecommender:
             # If no places match, use defaults
             filtered_places = places_data
         
-        # Get feature columns
-        feature_cols = self.model_package['feature_columns']
+        return self._build_profile_vector(
+            preferences,
+            filtered_places['category_id'].values,
+            filtered_places['ratings'].values,
+            filtered_places['reviews_count'].values
+        )
+    
+    def _get_candidates_and_profile(
+        self,
+        preferences: Dict[str, Any],
+        timer: StageTimer = NULL_TIMER
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the filtered candidate rows and scaled profile vector for preferences
+        
+        Results are memoized per canonical preference signature, since
+        onboarding answers come from a small finite space.
         
+        Args:
+            preferences: User preferences dictionary
+            timer: Stage timer of the request ('filter' and 'profile' laps)
+            
+        Returns:
+            Tuple of (candidate place ids, scaled profile vector); both
+            arrays are shared with the cache and must not be modified
+        """
+        key = preference_signature(preferences)
+        cached = self._profile_cache.get(key)
+        if cached is not None:
+            timer.lap('filter')
+            return cached
+        
+        filter_index = self._filter_index
+        candidates = self._preference_rows(preferences)
+        timer.lap('filter')
+        
+        user_profile = self._lookup_user_profile(preferences)
+        if user_profile is not None:
+            profile_vector = self._scale_user_profile(preferences, user_profile)
+        else:
+            # If no places match, build the profile from all places
+            profile_rows = candidates if len(candidates) > 0 else slice(None)
+            profile_vector = self._build_profile_vector(
+                preferences,
+                filter_index['category_id'][profile_rows],
+                filter_index['ratings'][profile_rows],
+                filter_index['reviews_count'][profile_rows]
+            )
+        
+        candidates.setflags(write=False)
+        profile_vector.setflags(write=False)
+        self._profile_cache.put(key, (candidates, profile_vector))
+        timer.lap('profile')
+        return candidates, profile_vector
+    
+    def _build_profile_vector(
+        self,
+        preferences: Dict[str, Any],
+        category_ids: np.ndarray,
+        ratings: np.ndarray,
+        reviews_count: np.ndarray
+    ) -> np.ndarray:
+        """
+        Build the scaled profile vector from the columns of the filtered places
+        
+        Args:
+            preferences: User preferences dictionary
+            category_ids: category_id values of the filtered places
+            ratings: ratings values of the filtered places
+            reviews_count: reviews_count values of the filtered places
+            
+        Returns:
+            Scaled profile vector with shape (1, n_features)
+        """
         # Calculate average values for selected categories
         user_profile = {}
         
@@ -176,40 +663,176 @@ class CBFRecommender:
         if preferences.get('categories'):
             avg_category = np.mean(preferences['categories'])
         else:
-            avg_category = filtered_places['category_id'].mean()
+            avg_category = np.mean(category_ids)
         user_profile['category_id'] = avg_category
         
         # Rating: Use minimum rating preference
-        user_profile['ratings'] = preferences.get('min_rating', filtered_places['ratings'].mean())
+        user_profile['ratings'] = preferences.get('min_rating', np.mean(ratings))
+        
+        # Reviews count: Based on popularity preference (upper quartile for
+        # 'popular', lower quartile for 'hidden_gems', median otherwise)
+        user_profile['reviews_count'] = reviews_count_statistic(
+            reviews_count, preferences.get('popularity_preference', 'balanced')
+        )
+        
+        return self._scale_user_profile(preferences, user_profile, category_ids)
+    
+    def _lookup_user_profile(self, preferences: Dict[str, Any]) -> Optional[Dict[str, float]]:
+        """
+        Get the profile values of preferences from the precomputed popularity table
+        
+        Args:
+            preferences: User preferences dictionary
+            
+        Returns:
+            Dictionary with 'category_id', 'ratings' and 'reviews_count', or
+            None when the table has no group for the preferences (they are
+            then computed from the filtered places)
+        """
+        # Sparse profiles without selected categories mix the categories of
+        # the filtered places, which the table does not hold
+        if self._feature_space is not None and not preferences.get('categories'):
+            return None
+        
+        statistics = lookup_profile_statistics(
+            self._popularity_table, self._filter_index, preferences,
+            filter_subcategories=bool(self.onboarding)
+        )
+        if statistics is None:
+            return None
         
-        # Reviews count: Based on popularity preference
         popularity_pref = preferences.get('popularity_preference', 'balanced')
-        if popularity_pref == 'popular':
-            # Prefer places with high review counts
-            user_profile['reviews_count'] = filtered_places['reviews_count'].quantile(0.75)
-        elif popularity_pref == 'hidden_gems':
-            # Prefer places with low review counts
-            user_profile['reviews_count'] = filtered_places['reviews_count'].quantile(0.25)
-        else:  # balanced
-            # Use median
-            user_profile['reviews_count'] = filtered_places['reviews_count'].median()
+        if popularity_pref not in STATISTIC_COLUMNS[1:]:
+            popularity_pref = 'balanced'
+        return {
+            'category_id': (
+                np.mean(preferences['categories']) if preferences.get('categories')
+                else statistics[0]
+            ),
+            'ratings': preferences['min_rating'],
+            'reviews_count': statistics[STATISTIC_COLUMNS.index(popularity_pref)],
+        }
+    
+    def _scale_user_profile(
+        self,
+        preferences: Dict[str, Any],
+        user_profile: Dict[str, float],
+        category_ids: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Turn profile values into a scaled vector of the model's feature space
+        
+        Args:
+            preferences: User preferences dictionary
+            user_profile: Dictionary with 'category_id', 'ratings' and
+                'reviews_count'
+            category_ids: category_id values of the filtered places (the
+                sparse category mix when no category is selected)
+            
+        Returns:
+            Scaled profile vector with shape (1, n_features)
+        """
+        # Get feature columns
+        feature_cols = self.model_package['feature_columns']
+        
+        if self._feature_space is not None:
+            # Sparse features: category mix instead of an averaged id, plus
+            # provinces and subcategory keywords matched against name tokens
+            subcategories = UserOnboarding.TOURIST_ATTRACTION_SUBCATEGORIES
+            keywords = [
+                keyword
+                for subcat_id in preferences.get('subcategories') or []
+                for keyword in subcategories.get(subcat_id, {}).get('keywords', [])
+            ]
+            return self._feature_space.profile_vector(
+                preferences['categories'] if preferences.get('categories') else category_ids,
+                preferences.get('province_ids'),
+                user_profile['ratings'],
+                user_profile['reviews_count'],
+                keywords
+            )
         
         # Create vector in same order as feature columns
         profile_vector = np.array([
             user_profile[col] for col in feature_cols
-        ]).reshape(1, -1)
+        ], dtype=np.float64).reshape(1, -1)
         
-        # Scale using the same scaler from training
-        scaler = self.model_package['scaler']
-        profile_vector_scaled = scaler.transform(profile_vector)
+        # Scale using the same min-max parameters as training
+        profile_vector_scaled = (
+            profile_vector * self._scaler_params['scale'] + self._scaler_params['min']
+        )
         
         return profile_vector_scaled
     
+    def cache_stats(self) -> Dict[str, int]:
+        """
+        Get hit/miss/eviction counters of the preference profile cache
+        
+        Returns:
+            Dictionary with hits, misses, evictions, size and maxsize
+        """
+        return self._profile_cache.stats()
+    
+    def clear_cache(self):
+        """Drop all memoized candidate sets and profile vectors"""
+        self._profile_cache.clear()
+    
+    def memory_footprint(self) -> Dict[str, int]:
+        """
+        Estimate the memory held by the loaded model
+        
+        Returns:
+            Dictionary with 'array_bytes' (numpy arrays), 'mapped_bytes' (the
+            part of array_bytes memory-mapped from the artifact, shared with
+            other processes), 'places_bytes' (places DataFrame) and
+            'total_bytes'
+        """
+        arrays = [
+            value for value in self.model_package.values() if isinstance(value, np.ndarray)
+        ]
+        arrays.append(self.model_package['feature_data'].values)
+        arrays.append(self._unit_features)
+        arrays.extend(
+            value for value in vars(self._neighbor_index).values() if isinstance(value, np.ndarray)
+        )
+        arrays.extend(
+            value for value in self._filter_index.values() if isinstance(value, np.ndarray)
+        )
+        arrays.extend(
+            value for value in self._popularity_table.values() if isinstance(value, np.ndarray)
+        )
+        if self._geo_index is not None:
+            arrays.extend(
+                value for value in vars(self._geo_index).values() if isinstance(value, np.ndarray)
+            )
+        
+        # Count each underlying buffer once (views share their base)
+        buffers = {}
+        for array in arrays:
+            base = array
+            mapped = isinstance(array, np.memmap)
+            while isinstance(base, np.ndarray) and base.base is not None:
+                base = base.base
+                mapped = mapped or isinstance(base, (np.memmap, mmap.mmap))
+            if id(base) not in buffers:
+                buffers[id(base)] = (array.nbytes, mapped)
+        
+        array_bytes = sum(nbytes for nbytes, _ in buffers.values())
+        mapped_bytes = sum(nbytes for nbytes, mapped in buffers.values() if mapped)
+        places_bytes = int(self.model_package['places_data'].memory_usage(deep=True).sum())
+        return {
+            'array_bytes': int(array_bytes),
+            'mapped_bytes': int(mapped_bytes),
+            'places_bytes': places_bytes,
+            'total_bytes': int(array_bytes) + places_bytes,
+        }
+    
     def get_recommendations_for_new_user(
         self,
         preferences: Dict[str, Any],
         top_n: int = 10,
-        min_similarity: float = 0.0
+        min_similarity: float = 0.0,
+        diversity: float = 0.0
     ) -> pd.DataFrame:
         """
         Get recommendations for a new user based on their preferences (cold-start)
@@ -218,182 +841,598 @@ class CBFRecommender:
             preferences: User preferences dictionary from onboarding
             top_n: Number of recommendations to return
             min_similarity: Minimum similarity threshold
+            diversity: Weight of diversity when re-ranking the best
+                MMR_POOL_SIZE candidates (0 keeps the similarity order)
             
         Returns:
-            DataFrame with recommendations
+            DataFrame with recommendations (with timing enabled, per-stage
+            milliseconds are in its attrs['timings'])
         """
+        timer = self._stage_timer()
+        
         # Validate preferences
+        _check_diversity(diversity)
         if self.onboarding:
             is_valid, error = self.onboarding.validate_preferences(preferences)
             if not is_valid:
                 raise ValueError(f"Invalid preferences: {error}")
+        timer.lap('validate')
         
-        # Create user profile vector
-        user_profile = self.create_user_profile_vector(preferences)
-        
-        # Get filtered places
-        filtered_places = self.filter_places_by_preferences(preferences)
+        # Filtered candidate rows and user profile vector (memoized)
+        candidates, user_profile = self._get_candidates_and_profile(preferences, timer)
         
-        if len(filtered_places) == 0:
+        if len(candidates) == 0:
             # Fallback to all places if filtering too restrictive
-            filtered_places = self.model_package['places_data'].copy()
-        
-        # Get feature data for filtered places
-        feature_data = self.model_package['feature_data']
+            candidates = None
         
-        # Get unique place names from filtered places
-        unique_place_names = filtered_places['name'].unique()
+        # Top N candidates by cosine similarity to the user profile
+        profile = normalize_rows(user_profile)[0]
+        positions, scores = self._neighbor_index.search(
+            profile, _pool_size(top_n, diversity), candidates
+        )
+        keep = scores >= min_similarity
+        positions, scores = positions[keep], scores[keep]
+        timer.lap('search')
         
-        # Filter feature data using isin to avoid reindexing issues with duplicates
-        filtered_feature_data = feature_data[feature_data.index.isin(unique_place_names)]
+        positions, scores = self._diversify(positions, scores, top_n, diversity, timer)
+        recommendations = self.to_recommendation_frame(positions, scores)
+        timer.lap('frame')
+        return self._finish_timing(timer, 'new_user', recommendations)
+    
+    def get_recommendations_for_place(
+        self,
+        place_name: str,
+        top_n: int = 10,
+        min_similarity: float = 0.0,
+        preferences: Optional[Dict[str, Any]] = None,
+        diversity: float = 0.0
+    ) -> Union[pd.DataFrame, str]:
+        """
+        Get recommendations based on a specific place (existing functionality)
+        Optionally filter by user preferences
         
-        if len(filtered_feature_data) == 0:
-            # If no feature data matches, return empty recommendations
-            return pd.DataFrame(columns=['name', 'province_name', 'category_name', 'ratings', 
-                                        'reviews_count', 'similarity_score'])
+        When several places share the name, the first one is used as the
+        query and the others are excluded from the results.
         
-        # Compute cosine similarity between user profile and all filtered places
-        similarities = cosine_similarity(user_profile, filtered_feature_data.values)[0]
+        Args:
+            place_name: Name of the place to get recommendations for
+            top_n: Number of recommendations to return
+            min_similarity: Minimum similarity threshold
+            preferences: Optional user preferences to filter results
+            diversity: Weight of diversity when re-ranking the best
+                MMR_POOL_SIZE candidates (0 keeps the similarity order)
+            
+        Returns:
+            DataFrame with recommendations or error message
+        """
+        place_ids = self._name_to_ids.get(place_name)
+        if place_ids is None:
+            return f"Place '{place_name}' not found in dataset"
         
-        # Create similarity series with unique place names as index
-        similarity_series = pd.Series(
-            similarities,
-            index=filtered_feature_data.index,
-            name='similarity_score'
+        return self._recommend_similar_places(
+            place_ids[0], place_ids, top_n, min_similarity, preferences, diversity
         )
+    
+    def get_recommendations_for_place_id(
+        self,
+        place_id: int,
+        top_n: int = 10,
+        min_similarity: float = 0.0,
+        preferences: Optional[Dict[str, Any]] = None,
+        diversity: float = 0.0
+    ) -> Union[pd.DataFrame, str]:
+        """
+        Get recommendations based on a specific place id
         
-        # Sort by similarity
-        similarity_series = similarity_series.sort_values(ascending=False)
+        Args:
+            place_id: Id of the place to get recommendations for
+            top_n: Number of recommendations to return
+            min_similarity: Minimum similarity threshold
+            preferences: Optional user preferences to filter results
+            diversity: Weight of diversity when re-ranking the best
+                MMR_POOL_SIZE candidates (0 keeps the similarity order)
+            
+        Returns:
+            DataFrame with recommendations or error message
+        """
+        if not 0 <= place_id < self._unit_features.shape[0]:
+            return f"Place id {place_id} not found in dataset"
         
-        # Apply minimum similarity threshold
-        similarity_series = similarity_series[similarity_series >= min_similarity]
+        return self._recommend_similar_places(
+            place_id, np.array([place_id]), top_n, min_similarity, preferences, diversity
+        )
+    
+    def _recommend_similar_places(
+        self,
+        place_id: int,
+        exclude_ids: np.ndarray,
+        top_n: int,
+        min_similarity: float,
+        preferences: Optional[Dict[str, Any]],
+        diversity: float = 0.0
+    ) -> pd.DataFrame:
+        """
+        Recommend places similar to a query place id
         
-        # Get top N (handle duplicates in index by keeping first)
-        top_places = similarity_series.head(top_n)
-        top_places = top_places[~top_places.index.duplicated(keep='first')]
+        Args:
+            place_id: Id of the query place
+            exclude_ids: Place ids never to recommend (at least the query)
+            top_n: Number of recommendations to return
+            min_similarity: Minimum similarity threshold (exclusive)
+            preferences: Optional user preferences to filter results
+            diversity: Weight of diversity in the re-ranking (0 disables it)
+            
+        Returns:
+            DataFrame with recommendations
+        """
+        timer = self._stage_timer()
+        _check_diversity(diversity)
+        n_places = self._unit_features.shape[0]
+        pool_size = _pool_size(top_n, diversity)
         
-        # Get full place information - merge with filtered_places to get all columns
-        # First, get unique place names from top_places
-        top_place_names = top_places.index.tolist()
+        # Restrict candidates to places matching the preferences, if provided
+        valid_ids = self._preference_rows(preferences) if preferences else None
+        timer.lap('filter')
         
-        # Filter filtered_places to only include top places
-        recommendations = filtered_places[
-            filtered_places['name'].isin(top_place_names)
-        ].copy()
+        # Answer from the precomputed top-K neighbour table
+        neighbor_ids = self.model_package['neighbor_ids'][place_id].astype(np.int64)
+        neighbor_scores = self._mask_neighbor_scores(
+            neighbor_ids, self.model_package['neighbor_scores'][place_id],
+            exclude_ids, min_similarity, valid_ids
+        )
+        positions, scores = select_top_n(neighbor_scores, pool_size, neighbor_ids)
+        timer.lap('neighbors')
         
-        # Add similarity scores - map from top_places series
-        recommendations['similarity_score'] = recommendations['name'].map(top_places)
+        # Filtering exhausted the table: fall back to the neighbour index
+        if len(positions) < top_n and len(neighbor_ids) < n_places - 1:
+            positions, scores = self._neighbor_index.search(
+                self._place_vector(place_id), pool_size + len(exclude_ids), valid_ids
+            )
+            keep = (scores > min_similarity) & ~np.isin(positions, exclude_ids)
+            positions, scores = positions[keep][:pool_size], scores[keep][:pool_size]
+            timer.lap('search')
         
-        # Remove rows where similarity_score is NaN (shouldn't happen, but safety check)
-        recommendations = recommendations.dropna(subset=['similarity_score'])
+        positions, scores = self._diversify(positions, scores, top_n, diversity, timer)
+        recommendations = self.to_recommendation_frame(positions, scores)
+        timer.lap('frame')
+        return self._finish_timing(timer, 'place', recommendations)
+    
+    def _diversify(
+        self,
+        positions: np.ndarray,
+        scores: np.ndarray,
+        top_n: int,
+        diversity: float,
+        timer: StageTimer = NULL_TIMER
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Pick top_n of the ranked candidates by maximal marginal relevance
         
-        # Sort by similarity
-        recommendations = recommendations.sort_values('similarity_score', ascending=False)
+        Args:
+            positions: Candidate place ids, best first
+            scores: Similarity scores aligned with positions
+            top_n: Number of places to keep
+            diversity: Weight of diversity (0 keeps the first top_n)
+            timer: Stage timer of the request ('rerank' lap)
+            
+        Returns:
+            Tuple of (place ids, similarity scores) in re-ranked order
+        """
+        if diversity <= 0 or len(positions) <= 1:
+            return positions[:top_n], scores[:top_n]
         
-        # Remove duplicates (keep first occurrence of each place name)
-        recommendations = recommendations.drop_duplicates(subset='name', keep='first')
+        if self._feature_space is not None:
+            vectors = self._neighbor_index.row_vectors(positions)
+        else:
+            vectors = self._unit_features[positions]
+        order = mmr_rerank(vectors, scores, top_n, diversity)
+        timer.lap('rerank')
+        return positions[order], scores[order]
+    
+    def _place_vector(self, place_id: int) -> np.ndarray:
+        """Normalized feature vector of a place in the model's search space"""
+        if self._feature_space is not None:
+            return self._neighbor_index.row_vector(place_id)
+        return self._unit_features[place_id]
+    
+    def _mask_neighbor_scores(
+        self,
+        neighbor_ids: np.ndarray,
+        neighbor_scores: np.ndarray,
+        exclude_ids: np.ndarray,
+        min_similarity: float,
+        valid_ids: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Set the scores of neighbours that must not be recommended to -inf
         
-        return recommendations[['name', 'province_name', 'category_name', 'ratings', 
-                               'reviews_count', 'similarity_score']]
+        Args:
+            neighbor_ids: Place ids of candidate neighbours
+            neighbor_scores: Similarity scores aligned with neighbor_ids
+            exclude_ids: Place ids to drop (the query place)
+            min_similarity: Minimum similarity threshold (exclusive)
+            valid_ids: Optional sorted place ids allowed to be recommended
+            
+        Returns:
+            float32 copy of neighbor_scores with excluded neighbours at -inf
+        """
+        keep = neighbor_scores > min_similarity
+        keep &= ~np.isin(neighbor_ids, exclude_ids)
+        if valid_ids is not None:
+            keep &= _sorted_isin(neighbor_ids, valid_ids)
+        
+        return np.where(keep, neighbor_scores, -np.inf).astype(np.float32)
     
-    def get_recommendations_for_place(
+    def get_nearby_recommendations(
         self,
-        place_name: str,
+        latitude: float,
+        longitude: float,
+        radius_km: float = DEFAULT_RADIUS_KM,
+        preferences: Optional[Dict[str, Any]] = None,
+        place_id: Optional[int] = None,
         top_n: int = 10,
-        min_similarity: float = 0.0,
-        preferences: Optional[Dict[str, Any]] = None
-    ) -> Union[pd.DataFrame, str]:
+        distance_weight: float = DEFAULT_DISTANCE_WEIGHT,
+        min_similarity: float = 0.0
+    ) -> pd.DataFrame:
         """
-        Get recommendations based on a specific place (existing functionality)
-        Optionally filter by user preferences
+        Get the places within a radius of a location that best match a user or a place
+        
+        Places are ranked by (1 - distance_weight) * similarity +
+        distance_weight * (1 - distance_km / radius_km). Only the places
+        the geo index returns for the radius are scored.
         
         Args:
-            place_name: Name of the place to get recommendations for
+            latitude: Latitude of the user in degrees
+            longitude: Longitude of the user in degrees
+            radius_km: Search radius in kilometers
+            preferences: User preferences; they filter the places and, without
+                place_id, give the profile the places are compared to
+            place_id: Optional id of a place to find similar places to
             top_n: Number of recommendations to return
+            distance_weight: Weight of closeness in the ranking (0 to 1)
             min_similarity: Minimum similarity threshold
-            preferences: Optional user preferences to filter results
             
         Returns:
-            DataFrame with recommendations or error message
+            DataFrame with the standard recommendation columns plus
+            distance_km and combined_score, best first
         """
-        sim_matrix = self.model_package['similarity_matrix']
-        places_data = self.model_package['places_data']
+        timer = self._stage_timer()
+        if self._geo_index is None:
+            raise ValueError(
+                "Model has no place coordinates; rebuild it from a places file "
+                "with latitude and longitude columns"
+            )
+        if preferences is None and place_id is None:
+            raise ValueError("Nearby recommendations need preferences or a place_id")
+        if not 0.0 <= distance_weight <= 1.0:
+            raise ValueError(f"distance_weight must be between 0 and 1, got {distance_weight}")
+        if preferences is not None and self.onboarding:
+            is_valid, error = self.onboarding.validate_preferences(preferences)
+            if not is_valid:
+                raise ValueError(f"Invalid preferences: {error}")
+        timer.lap('validate')
         
-        if place_name not in sim_matrix.index:
-            return f"Place '{place_name}' not found in dataset"
+        place_ids, distances = self._geo_index.query_radius(latitude, longitude, radius_km)
+        timer.lap('geo')
         
-        # Get similarity scores
-        matching_indices = sim_matrix.index[sim_matrix.index == place_name]
-        if len(matching_indices) > 0:
-            sim_scores = sim_matrix.loc[matching_indices[0], :]
+        if place_id is not None:
+            if not 0 <= place_id < self._unit_features.shape[0]:
+                raise ValueError(f"Place id {place_id} not found in dataset")
+            query = self._place_vector(place_id)
+            keep = place_ids != place_id
+            if preferences is not None:
+                keep &= _sorted_isin(place_ids, self._preference_rows(preferences))
         else:
-            return f"Place '{place_name}' not found in dataset"
+            candidates, user_profile = self._get_candidates_and_profile(preferences, timer)
+            query = normalize_rows(user_profile)[0]
+            # Like cold-start recommendations, ignore filters that match nothing
+            keep = (
+                _sorted_isin(place_ids, candidates) if len(candidates)
+                else np.ones(len(place_ids), dtype=bool)
+            )
+        place_ids, distances = place_ids[keep], distances[keep]
+        timer.lap('filter')
         
-        # Ensure we have a Series
-        if isinstance(sim_scores, pd.DataFrame):
-            sim_scores = sim_scores.iloc[0]
+        similarity = self._score_places(query, place_ids)
+        closeness = 1.0 - distances / radius_km if radius_km > 0 else np.ones(len(distances))
+        combined = (1.0 - distance_weight) * similarity + distance_weight * closeness
+        combined = np.where(similarity >= min_similarity, combined, -np.inf)
         
-        # Sort and filter
-        sim_scores = sim_scores.sort_values(ascending=False)
-        sim_scores = sim_scores[sim_scores > min_similarity]
-        sim_scores = sim_scores[sim_scores.index != place_name]
+        best, combined = select_top_n(combined, top_n)
+        timer.lap('search')
         
-        # Apply preference filtering if provided
-        if preferences:
-            filtered_places = self.filter_places_by_preferences(preferences, places_data)
-            valid_place_names = set(filtered_places['name'].values)
-            sim_scores = sim_scores[sim_scores.index.isin(valid_place_names)]
+        recommendations = self.to_recommendation_frame(place_ids[best], similarity[best])
+        recommendations['distance_km'] = distances[best]
+        recommendations['combined_score'] = np.asarray(combined, dtype=np.float64)
+        timer.lap('frame')
+        return self._finish_timing(timer, 'nearby', recommendations)
+    
+    def _score_places(self, query: np.ndarray, place_ids: np.ndarray) -> np.ndarray:
+        """Cosine similarity of a normalized query to selected places"""
+        if self._feature_space is not None:
+            return self._neighbor_index.scores(query, place_ids)
+        return self._unit_features[place_ids] @ query
+    
+    def get_recommendations_batch(
+        self,
+        preferences_list: List[Dict[str, Any]],
+        top_n: int = 10,
+        min_similarity: float = 0.0,
+        max_scores_per_block: int = 8_000_000
+    ) -> List[Dict[str, np.ndarray]]:
+        """
+        Get cold-start recommendations for many users at once
+        
+        Profile vectors are stacked into one matrix and scored against all
+        places with a single matrix multiply per block of users; per-user
+        candidate masks are then applied and the top N picked with
+        argpartition.
+        
+        Args:
+            preferences_list: List of user preferences dictionaries
+            top_n: Number of recommendations per user
+            min_similarity: Minimum similarity threshold
+            max_scores_per_block: Upper bound on users x places scores held in
+                memory at once (controls the block size)
+            
+        Returns:
+            List (aligned with preferences_list) of dictionaries with
+            'positions' (place ids) and 'scores'
+            (float32 similarities), best first. Use
+            to_recommendation_frame() to materialize a DataFrame. When
+            timing is enabled, each dictionary also has 'timings', the
+            stage timings of the whole batch in milliseconds.
+        """
+        timer = self._stage_timer()
+        if self.onboarding:
+            for preferences in preferences_list:
+                is_valid, error = self.onboarding.validate_preferences(preferences)
+                if not is_valid:
+                    raise ValueError(f"Invalid preferences: {error}")
+        timer.lap('validate')
         
-        # Get top N
-        top_places = sim_scores.head(top_n)
-        top_places_unique = top_places[~top_places.index.duplicated(keep='first')]
+        n_places = self._unit_features.shape[0]
+        block_size = max(1, max_scores_per_block // max(n_places, 1))
+        results = []
         
-        # Get recommendations
-        recommendations = places_data[places_data['name'].isin(top_places_unique.index)].copy()
-        recommendations['similarity_score'] = recommendations['name'].map(top_places_unique)
-        recommendations = recommendations.sort_values('similarity_score', ascending=False)
+        for start in range(0, len(preferences_list), block_size):
+            block = preferences_list[start:start + block_size]
+            entries = [
+                self._get_candidates_and_profile(preferences, timer) for preferences in block
+            ]
+            
+            # One BLAS call scores every user in the block against every place
+            profiles = normalize_rows(np.vstack([profile for _, profile in entries]))
+            if self._feature_space is not None:
+                scores = np.vstack([self._neighbor_index.scores(profile) for profile in profiles])
+            else:
+                scores = profiles @ self._unit_features.T
+            
+            # Keep candidate scores only (all places if filtering matched none)
+            masked = np.full_like(scores, -np.inf)
+            for row, (candidates, _) in enumerate(entries):
+                if len(candidates) > 0:
+                    masked[row, candidates] = scores[row, candidates]
+                else:
+                    masked[row] = scores[row]
+            masked[masked < min_similarity] = -np.inf
+            
+            results.extend(self._select_top_n_rows(masked, top_n))
+            timer.lap('search')
         
-        return recommendations[['name', 'province_name', 'category_name', 'ratings', 
-                              'reviews_count', 'similarity_score']]
+        if timer is not NULL_TIMER:
+            timings = self.metrics.record_request('batch', timer)
+            for result in results:
+                result['timings'] = timings
+        return results
+    
+    def _select_top_n_rows(
+        self,
+        scores: np.ndarray,
+        top_n: int
+    ) -> List[Dict[str, np.ndarray]]:
+        """
+        Row-wise top N over a users x places score matrix
+        
+        Args:
+            scores: 2D score matrix (-inf marks excluded places)
+            top_n: Number of places per row
+            
+        Returns:
+            List of dictionaries with 'positions' and 'scores' per row
+        """
+        n_rows, n_places = scores.shape
+        k = min(top_n, n_places)
+        if k <= 0:
+            return [
+                {'positions': np.empty(0, dtype=np.int64), 'scores': scores[row, :0]}
+                for row in range(n_rows)
+            ]
+        
+        # One vectorized argpartition for all rows, then sort the k best
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        
+        results = []
+        for row in range(n_rows):
+            valid = np.isfinite(top_scores[row])
+            results.append({'positions': top[row][valid], 'scores': top_scores[row][valid]})
+        return results
+    
+    def _stage_timer(self) -> StageTimer:
+        """Stage timer for one request (NULL_TIMER when timing is disabled)"""
+        return self.metrics.timer() if self.metrics is not None else NULL_TIMER
+    
+    def _finish_timing(
+        self,
+        timer: StageTimer,
+        method: str,
+        recommendations: Optional[pd.DataFrame] = None
+    ) -> Optional[pd.DataFrame]:
+        """
+        Record a finished request's stage timings in the metrics registry
+        
+        Args:
+            timer: Stage timer of the request
+            method: Recommendation method label
+            recommendations: Optional result frame; the timings (milliseconds
+                per stage, plus 'total_ms') are stored in its attrs['timings']
+            
+        Returns:
+            recommendations
+        """
+        if timer is not NULL_TIMER:
+            timings = self.metrics.record_request(method, timer)
+            if recommendations is not None:
+                recommendations.attrs['timings'] = timings
+        return recommendations
+    
+    def to_recommendation_frame(
+        self,
+        positions: np.ndarray,
+        scores: np.ndarray
+    ) -> pd.DataFrame:
+        """
+        Materialize recommendation rows from place positions and scores
+        
+        Args:
+            positions: Row positions into places_data
+            scores: Similarity scores aligned with positions
+            
+        Returns:
+            DataFrame with the standard recommendation columns
+        """
+        recommendations = self.model_package['places_data'].iloc[positions].copy()
+        recommendations['similarity_score'] = np.asarray(scores, dtype=np.float64)
+        
+        return recommendations[RECOMMENDATION_COLUMNS]
+    
+    def iter_export_rows(
+        self,
+        positions: np.ndarray,
+        scores: np.ndarray,
+        output_format: str = 'csv',
+        header: bool = True,
+        extra_columns: Optional[Dict[str, np.ndarray]] = None
+    ) -> Iterator[str]:
+        """
+        Stream recommendations as CSV or NDJSON without building a DataFrame
+        
+        Args:
+            positions: Place ids, best first
+            scores: Similarity scores aligned with positions
+            output_format: 'csv' or 'ndjson'
+            header: Whether to start CSV output with a header line
+            extra_columns: Optional additional columns aligned with positions
+                (e.g. distance_km)
+            
+        Returns:
+            Iterator over blocks of complete lines with the standard
+            recommendation columns (plus extra_columns)
+        """
+        row_columns = {'similarity_score': np.asarray(scores, dtype=np.float64)}
+        row_columns.update(extra_columns or {})
+        return iter_export_rows(
+            self._place_columns(), positions, row_columns,
+            RECOMMENDATION_COLUMNS + list(extra_columns or {}), output_format, header
+        )
+    
+    def iter_batch_export_rows(
+        self,
+        results: List[Dict[str, np.ndarray]],
+        user_ids: Optional[List[Any]] = None,
+        output_format: str = 'csv',
+        header: bool = True
+    ) -> Iterator[str]:
+        """
+        Stream get_recommendations_batch results as CSV or NDJSON
+        
+        Args:
+            results: Per-user results with 'positions' and 'scores'
+            user_ids: Optional id per user (defaults to the user's index)
+            output_format: 'csv' or 'ndjson'
+            header: Whether to start CSV output with a header line
+            
+        Returns:
+            Iterator over blocks of complete lines, one row per
+            recommendation with user_id and rank before the standard columns
+        """
+        row_columns = batch_row_columns(results, user_ids)
+        positions = row_columns.pop('positions')
+        return iter_export_rows(
+            self._place_columns(), positions, row_columns,
+            ['user_id', 'rank'] + RECOMMENDATION_COLUMNS, output_format, header
+        )
+    
+    def _place_columns(self) -> Dict[str, np.ndarray]:
+        """Numpy arrays of the places_data columns used in recommendations (built once)"""
+        if self._export_columns is None:
+            places_data = self.model_package['places_data']
+            self._export_columns = {
+                column: places_data[column].to_numpy()
+                for column in RECOMMENDATION_COLUMNS if column in places_data.columns
+            }
+        return self._export_columns
     
     def get_recommendations(
         self,
         user_input: Union[str, Dict[str, Any]],
         top_n: int = 10,
-        min_similarity: float = 0.0
+        min_similarity: float = 0.0,
+        diversity: float = 0.0
     ) -> Union[pd.DataFrame, str]:
         """
         Universal recommendation function that handles both place-based and preference-based recommendations
         
         Args:
-            user_input: Either a place name (str) or user preferences (dict)
+            user_input: A place name (str), a place id (int) or user
+                preferences (dict)
             top_n: Number of recommendations to return
             min_similarity: Minimum similarity threshold
+            diversity: Weight of diversity in the MMR re-ranking (0 disables it)
             
         Returns:
             DataFrame with recommendations or error message
         """
         if isinstance(user_input, str):
             # Place-based recommendation
-            return self.get_recommendations_for_place(user_input, top_n, min_similarity)
+            return self.get_recommendations_for_place(
+                user_input, top_n, min_similarity, diversity=diversity
+            )
+        elif isinstance(user_input, (int, np.integer)) and not isinstance(user_input, bool):
+            # Place-based recommendation by id
+            return self.get_recommendations_for_place_id(
+                int(user_input), top_n, min_similarity, diversity=diversity
+            )
         elif isinstance(user_input, dict):
             # Preference-based recommendation (cold-start)
-            return self.get_recommendations_for_new_user(user_input, top_n, min_similarity)
+            return self.get_recommendations_for_new_user(
+                user_input, top_n, min_similarity, diversity
+            )
         else:
-            return "Invalid input: Expected place name (str) or preferences (dict)"
+            return "Invalid input: Expected place name (str), place id (int) or preferences (dict)"
 
 
-def load_recommender(model_path: str = 'cbf_model.pkl') -> CBFRecommender:
+def load_recommender(
+    model_path: str = DEFAULT_MODEL_PATH,
+    cache_size: int = 256,
+    index_type: str = 'auto'
+) -> CBFRecommender:
     """
     Convenience function to load and return a CBFRecommender instance
     
     Args:
-        model_path: Path to the CBF model file
+        model_path: Path to the CBF model (artifact directory or pickle)
+        cache_size: Size of the preference profile cache
+        index_type: Neighbour index type ('brute_force', 'ivf' or 'auto')
         
     Returns:
         CBFRecommender instance
     """
-    return CBFRecommender(model_path)
+    return CBFRecommender(model_path, cache_size, index_type)
 
 
 if __name__ == "__main__":
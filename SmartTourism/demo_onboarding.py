@@ -2,7 +2,7 @@
 Demo script showing how to use the onboarding and recommendation system
 """
 
-from recommend_places import PlaceRecommendationSystem, recommend_for_new_user
+from recommend_places import get_shared_system, recommend_for_new_user
 from user_onboarding import UserOnboarding
 import pandas as pd
 
@@ -14,8 +14,8 @@ def demo_onboarding_flow():
     print("DEMO: Complete Onboarding and Recommendation Flow")
     print("=" * 70)
     
-    # Initialize system
-    system = PlaceRecommendationSystem()
+    # Initialize system (shared with recommend_for_new_user)
+    system = get_shared_system()
     
     # Show questionnaire structure
     print("\n[Step 1] Onboarding Questions Structure:")
@@ -0,0 +1,156 @@
+"""
+Geo Index Module
+
+This module provides the spatial index behind the "nearby similar places"
+recommendations of CBFRecommender. Places are bucketed into a uniform
+latitude/longitude grid whose cells are at least cell_km wide; a radius
+query only reads the cells overlapping the query's bounding box and
+computes haversine distances for the places in them, so its cost grows
+with the number of nearby places rather than with the catalog.
+
+Coordinates come from the latitude/longitude columns of the backend
+places table. Places without coordinates are never returned. Longitudes
+are not wrapped at +/-180 degrees.
+"""
+
+from typing import Tuple
+
+import numpy as np
+
+
+# Columns of places_data holding place coordinates (degrees)
+COORDINATE_COLUMNS = ('latitude', 'longitude')
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = EARTH_RADIUS_KM * np.pi / 180
+
+DEFAULT_RADIUS_KM = 10.0
+DEFAULT_CELL_KM = 10.0
+
+# Cells are sized for the most poleward place, capped so they stay finite
+_MAX_GRID_LATITUDE = 89.0
+
+
+def haversine_km(
+    latitude: float,
+    longitude: float,
+    latitudes: np.ndarray,
+    longitudes: np.ndarray
+) -> np.ndarray:
+    """
+    Great-circle distances from one point to many
+
+    Args:
+        latitude: Latitude of the point in degrees
+        longitude: Longitude of the point in degrees
+        latitudes: Latitudes of the other points in degrees
+        longitudes: Longitudes of the other points in degrees
+
+    Returns:
+        Distances in kilometers
+    """
+    lat1 = np.radians(latitude)
+    lat2 = np.radians(np.asarray(latitudes, dtype=np.float64))
+    dlat = lat2 - lat1
+    dlon = np.radians(np.asarray(longitudes, dtype=np.float64) - longitude)
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class GeoGridIndex:
+    """Radius search over place coordinates bucketed in a uniform grid"""
+
+    def __init__(
+        self,
+        latitudes: np.ndarray,
+        longitudes: np.ndarray,
+        cell_km: float = DEFAULT_CELL_KM
+    ):
+        """
+        Build the grid
+
+        Args:
+            latitudes: Latitude of each place in degrees (row = place id;
+                NaN when unknown)
+            longitudes: Longitude of each place in degrees
+            cell_km: Minimum width and height of a grid cell
+        """
+        self.latitudes = np.asarray(latitudes, dtype=np.float64)
+        self.longitudes = np.asarray(longitudes, dtype=np.float64)
+        valid = (
+            np.isfinite(self.latitudes) & np.isfinite(self.longitudes)
+            & (np.abs(self.latitudes) <= 90) & (np.abs(self.longitudes) <= 180)
+        )
+        ids = np.flatnonzero(valid)
+        self.n_located = len(ids)
+
+        self.cell_lat = cell_km / KM_PER_DEGREE
+        max_latitude = min(float(np.abs(self.latitudes[ids]).max(initial=0.0)), _MAX_GRID_LATITUDE)
+        self.cell_lon = self.cell_lat / np.cos(np.radians(max_latitude))
+        self.lat_origin = float(self.latitudes[ids].min()) if len(ids) else 0.0
+        self.lon_origin = float(self.longitudes[ids].min()) if len(ids) else 0.0
+
+        rows = self._grid_rows(self.latitudes[ids])
+        cols = self._grid_cols(self.longitudes[ids])
+        self.n_rows = int(rows.max(initial=-1)) + 1
+        self.n_cols = int(cols.max(initial=-1)) + 1
+
+        # Place ids grouped by cell (row-major), ascending within a cell
+        cells = rows * self.n_cols + cols
+        order = np.argsort(cells, kind='stable')
+        self.place_ids = ids[order]
+        self.cell_keys, starts = np.unique(cells[order], return_index=True)
+        self.cell_offsets = np.append(starts, len(ids)).astype(np.int64)
+
+    def _grid_rows(self, latitudes: np.ndarray) -> np.ndarray:
+        return np.floor((latitudes - self.lat_origin) / self.cell_lat).astype(np.int64)
+
+    def _grid_cols(self, longitudes: np.ndarray) -> np.ndarray:
+        return np.floor((longitudes - self.lon_origin) / self.cell_lon).astype(np.int64)
+
+    def query_radius(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_km: float = DEFAULT_RADIUS_KM
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the places within a radius of a point
+
+        Args:
+            latitude: Latitude of the point in degrees
+            longitude: Longitude of the point in degrees
+            radius_km: Search radius in kilometers
+
+        Returns:
+            Tuple of (place ids ascending, distances in km)
+        """
+        empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64))
+        if self.n_located == 0 or radius_km < 0:
+            return empty
+
+        # Bounding box of the circle, widened in longitude at its poleward edge
+        dlat = radius_km / KM_PER_DEGREE
+        edge_latitude = min(abs(latitude) + dlat, _MAX_GRID_LATITUDE)
+        dlon = min(dlat / np.cos(np.radians(edge_latitude)), 360.0)
+
+        row_lo, row_hi = self._grid_rows(np.array([latitude - dlat, latitude + dlat]))
+        col_lo, col_hi = self._grid_cols(np.array([longitude - dlon, longitude + dlon]))
+        row_lo, row_hi = max(row_lo, 0), min(row_hi, self.n_rows - 1)
+        col_lo, col_hi = max(col_lo, 0), min(col_hi, self.n_cols - 1)
+        if row_lo > row_hi or col_lo > col_hi:
+            return empty
+
+        # Each grid row's cells in the box are one contiguous run of cell keys
+        rows = np.arange(row_lo, row_hi + 1) * self.n_cols
+        first = np.searchsorted(self.cell_keys, rows + col_lo)
+        last = np.searchsorted(self.cell_keys, rows + col_hi, side='right')
+        starts, stops = self.cell_offsets[first], self.cell_offsets[last]
+        lengths = stops - starts
+        positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        positions += np.arange(lengths.sum())
+        ids = np.sort(self.place_ids[positions])
+
+        distances = haversine_km(latitude, longitude, self.latitudes[ids], self.longitudes[ids])
+        within = distances <= radius_km
+        return ids[within], distances[within]
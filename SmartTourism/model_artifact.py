@@ -0,0 +1,510 @@
+"""
+Model Artifact Module
+
+This module stores the CBF model as a versioned artifact directory instead
+of a single pickle. Arrays are plain .npy files opened with mmap_mode, so
+several processes on one host share the same pages and loading only reads
+a small JSON header. The places_data columns are mapped too: numeric
+columns directly, and text columns as zero-copy Arrow strings over the
+stored UTF-8 bytes when pandas stores text in Arrow (pandas 3 with
+pyarrow). Low-cardinality text (province, category) is decoded from its
+codes at load time. With older pandas or without pyarrow, all text columns
+are decoded at load time.
+
+Layout:
+    <artifact_dir>/
+        model.json              header: format version, metadata, scaler params
+        features.npy            scaled feature matrix (float32)
+        unit_features.npy       L2-normalized feature rows (float32)
+        neighbor_ids.npy        top-K neighbour place ids (int32)
+        neighbor_scores.npy     top-K neighbour scores (float32)
+        ivf_*.npy               optional IVF neighbour index (large catalogs)
+        sparse_*.npy            optional sparse feature rows (CSR) and token IDF
+        places/<column>*.npy    places_data, one file (or pair) per column
+
+Versions:
+    publish_model_artifact writes each model version to its own directory
+    (<model_path>.v<N>) and then atomically replaces the <model_path>.version
+    pointer file. resolve_model_path follows the pointer, so a reader sees
+    either the old or the new version, never a partial one.
+"""
+
+import glob
+import json
+import os
+import pickle
+import re
+import shutil
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+import numpy as np
+import pandas as pd
+
+from neighbor_index import IVF_ARRAY_KEYS, IVFIndex, normalize_rows
+from sparse_features import SPARSE_ARRAY_KEYS
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+
+# pandas' dtype for text columns: Arrow-backed 'str' from pandas 3 on (with
+# pyarrow installed), which stored text can be wrapped as without decoding
+_TEXT_DTYPE = pd.Series(['']).dtype
+_ARROW_TEXT = (
+    pa is not None and isinstance(_TEXT_DTYPE, pd.StringDtype) and _TEXT_DTYPE.storage == 'pyarrow'
+)
+
+
+ARTIFACT_FORMAT_VERSION = 1
+DEFAULT_MODEL_PATH = 'cbf_model'
+HEADER_FILE = 'model.json'
+PLACES_DIR = 'places'
+VERSION_FILE_SUFFIX = '.version'
+
+# Published model versions kept on disk (older ones are deleted)
+DEFAULT_KEEP_VERSIONS = 3
+
+# Arrays stored at the top level of the artifact directory
+ARRAY_FILES = {
+    'features': 'features.npy',
+    'unit_features': 'unit_features.npy',
+    'neighbor_ids': 'neighbor_ids.npy',
+    'neighbor_scores': 'neighbor_scores.npy',
+}
+
+# Arrays written only when present in the model package
+OPTIONAL_ARRAY_FILES = {key: f'{key}.npy' for key in IVF_ARRAY_KEYS + SPARSE_ARRAY_KEYS}
+
+
+def is_model_artifact(path: str) -> bool:
+    """
+    Check whether a path points to a model artifact directory
+
+    Args:
+        path: Model path (file or directory)
+
+    Returns:
+        True if the path is a directory containing an artifact header
+    """
+    return os.path.isdir(path) and os.path.isfile(os.path.join(path, HEADER_FILE))
+
+
+def read_model_version(model_path: str) -> Optional[Dict[str, Any]]:
+    """
+    Read the version pointer of a published model
+
+    Args:
+        model_path: Model path passed to publish_model_artifact
+
+    Returns:
+        Dictionary with 'version', 'artifact' (absolute directory) and
+        'published_at', or None if the model was never published
+    """
+    version_file = f"{model_path}{VERSION_FILE_SUFFIX}"
+    if not os.path.isfile(version_file):
+        return None
+
+    with open(version_file, 'r', encoding='utf-8') as f:
+        pointer = json.load(f)
+    pointer['artifact'] = os.path.join(
+        os.path.dirname(os.path.abspath(version_file)), pointer['artifact']
+    )
+    return pointer
+
+
+def resolve_model_path(model_path: str) -> str:
+    """
+    Resolve a model path to the artifact or pickle to load
+
+    Args:
+        model_path: Published model path, artifact directory or pickle path
+
+    Returns:
+        The current version directory if the model was published, else
+        model_path if it exists, else '<model_path>.pkl' when that legacy
+        pickle exists, otherwise model_path unchanged
+    """
+    pointer = read_model_version(model_path)
+    if pointer is not None:
+        return pointer['artifact']
+    if not os.path.exists(model_path) and os.path.isfile(f"{model_path}.pkl"):
+        return f"{model_path}.pkl"
+    return model_path
+
+
+def get_scaler_params(model_package: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """
+    Extract min-max scaling parameters from a model package
+
+    Works with both legacy packages (fitted sklearn MinMaxScaler under
+    'scaler') and artifact packages ('scaler_params').
+
+    Args:
+        model_package: Loaded model package
+
+    Returns:
+        Dictionary with 'data_min', 'data_max', 'scale' and 'min' arrays, so
+        that scaled = X * scale + min
+    """
+    if 'scaler_params' in model_package:
+        return model_package['scaler_params']
+
+    scaler = model_package['scaler']
+    return {
+        'data_min': np.asarray(scaler.data_min_, dtype=np.float64),
+        'data_max': np.asarray(scaler.data_max_, dtype=np.float64),
+        'scale': np.asarray(scaler.scale_, dtype=np.float64),
+        'min': np.asarray(scaler.min_, dtype=np.float64),
+    }
+
+
+def fit_scaler_params(raw_features: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Fit min-max scaling parameters to [0, 1] (as sklearn's MinMaxScaler)
+
+    Args:
+        raw_features: 2D array of unscaled features
+
+    Returns:
+        Dictionary with 'data_min', 'data_max', 'scale' and 'min' arrays
+    """
+    data_min = raw_features.min(axis=0)
+    data_max = raw_features.max(axis=0)
+    data_range = data_max - data_min
+    data_range[data_range == 0] = 1.0
+    scale = 1.0 / data_range
+    return {'data_min': data_min, 'data_max': data_max, 'scale': scale, 'min': -data_min * scale}
+
+
+def ensure_place_ids(model_package: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Key a model package by dense integer place ids
+
+    Legacy packages index feature_data by name and have no place_id
+    column; their ids are the row positions.
+
+    Args:
+        model_package: Loaded model package (updated in place)
+
+    Returns:
+        The same model package
+    """
+    places_data = model_package['places_data']
+    if 'place_id' not in places_data.columns:
+        places_data = places_data.reset_index(drop=True)
+        places_data.insert(0, 'place_id', np.arange(len(places_data)))
+        model_package['places_data'] = places_data
+
+    if not np.array_equal(places_data['place_id'].values, np.arange(len(places_data))):
+        raise ValueError("place_id must be the dense row position (0..n_places-1)")
+
+    feature_data = model_package['feature_data']
+    if feature_data.index.name != 'place_id':
+        model_package['feature_data'] = feature_data.set_axis(
+            pd.RangeIndex(len(feature_data), name='place_id'), axis=0
+        )
+    return model_package
+
+
+def _save_column(places_dir: str, column: str, values: pd.Series) -> Dict[str, Any]:
+    """Write one places_data column and return its header entry"""
+    entry = {'name': column}
+
+    if pd.api.types.is_numeric_dtype(values):
+        array = values.to_numpy()
+        np.save(os.path.join(places_dir, f'{column}.npy'), array)
+        entry.update({'encoding': 'plain', 'dtype': array.dtype.str})
+        return entry
+
+    strings = values.astype(str)
+    codes, categories = pd.factorize(strings)
+    if len(categories) * 4 <= len(strings):
+        # Low-cardinality text (province, category): dictionary encoding
+        np.save(os.path.join(places_dir, f'{column}.codes.npy'), codes.astype(np.int32))
+        entry.update({'encoding': 'dictionary', 'categories': list(categories)})
+        return entry
+
+    # High-cardinality text (names): UTF-8 bytes plus offsets
+    encoded = [s.encode('utf-8') for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(b) for b in encoded])
+    data = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+    np.save(os.path.join(places_dir, f'{column}.offsets.npy'), offsets)
+    np.save(os.path.join(places_dir, f'{column}.data.npy'), data)
+    entry.update({'encoding': 'utf8'})
+    return entry
+
+
+def _arrow_strings(array) -> pd.api.extensions.ExtensionArray:
+    """Wrap an Arrow string array as pandas' default string dtype, without copying"""
+    return pd.arrays.ArrowStringArray(array, dtype=_TEXT_DTYPE)
+
+
+def _load_column(places_dir: str, entry: Dict[str, Any], mmap_mode: Optional[str]):
+    """Read one places_data column described by its header entry"""
+    column = entry['name']
+    encoding = entry['encoding']
+
+    if encoding == 'plain':
+        return np.load(os.path.join(places_dir, f'{column}.npy'), mmap_mode=mmap_mode)
+
+    if encoding == 'dictionary':
+        codes = np.load(os.path.join(places_dir, f'{column}.codes.npy'), mmap_mode=mmap_mode)
+        if _ARROW_TEXT:
+            return _arrow_strings(pa.array(entry['categories'], pa.large_string()).take(pa.array(codes)))
+        categories = np.array(entry['categories'], dtype=object)
+        return categories[codes]
+
+    if encoding == 'utf8':
+        offsets = np.load(os.path.join(places_dir, f'{column}.offsets.npy'), mmap_mode=mmap_mode)
+        data = np.load(os.path.join(places_dir, f'{column}.data.npy'), mmap_mode=mmap_mode)
+        if _ARROW_TEXT:
+            # Same layout as an Arrow large_string array: wrap, don't decode
+            return _arrow_strings(pa.LargeStringArray.from_buffers(
+                len(offsets) - 1, pa.py_buffer(offsets), pa.py_buffer(data)
+            ))
+        raw = data.tobytes()
+        return np.array(
+            [raw[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(offsets) - 1)],
+            dtype=object
+        )
+
+    raise ValueError(f"Unknown column encoding '{encoding}' for column '{column}'")
+
+
+def save_model_artifact(model_package: Dict[str, Any], artifact_dir: str) -> str:
+    """
+    Save a model package as a memory-mappable artifact directory
+
+    The artifact is written to a temporary sibling directory first and then
+    moved into place, so readers never see a half-written artifact.
+
+    Args:
+        model_package: Model package (as produced by the training notebook)
+        artifact_dir: Destination directory
+
+    Returns:
+        Path of the written artifact directory
+    """
+    artifact_dir = os.path.abspath(artifact_dir)
+    tmp_dir = f"{artifact_dir}.tmp-{os.getpid()}"
+    if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+    os.makedirs(os.path.join(tmp_dir, PLACES_DIR))
+
+    feature_data = model_package['feature_data']
+    features = np.ascontiguousarray(feature_data.values, dtype=np.float32)
+    arrays = {
+        'features': features,
+        'unit_features': normalize_rows(features),
+        'neighbor_ids': np.ascontiguousarray(model_package['neighbor_ids'], dtype=np.int32),
+        'neighbor_scores': np.ascontiguousarray(model_package['neighbor_scores'], dtype=np.float32),
+    }
+    for key, filename in ARRAY_FILES.items():
+        np.save(os.path.join(tmp_dir, filename), arrays[key])
+    for key, filename in OPTIONAL_ARRAY_FILES.items():
+        if key in model_package:
+            np.save(os.path.join(tmp_dir, filename), np.asarray(model_package[key]))
+
+    places_data = model_package['places_data']
+    places_dir = os.path.join(tmp_dir, PLACES_DIR)
+    places_columns = [
+        _save_column(places_dir, column, places_data[column])
+        for column in places_data.columns
+    ]
+
+    scaler_params = get_scaler_params(model_package)
+    header = {
+        'format_version': ARTIFACT_FORMAT_VERSION,
+        'model_version': int(model_package.get('model_version', 0)),
+        'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'n_places': int(len(places_data)),
+        'feature_columns': list(model_package['feature_columns']),
+        'scaler': {key: np.asarray(value).tolist() for key, value in scaler_params.items()},
+        'places_columns': places_columns,
+        'metadata': model_package['metadata'],
+    }
+    if 'feature_space' in model_package:
+        header['feature_space'] = model_package['feature_space']
+    with open(os.path.join(tmp_dir, HEADER_FILE), 'w', encoding='utf-8') as f:
+        json.dump(header, f, indent=2, ensure_ascii=False)
+
+    if os.path.exists(artifact_dir):
+        shutil.rmtree(artifact_dir)
+    os.rename(tmp_dir, artifact_dir)
+
+    return artifact_dir
+
+
+def load_model_artifact(artifact_dir: str, mmap_mode: Optional[str] = 'r') -> Dict[str, Any]:
+    """
+    Load a model artifact directory into a model package dictionary
+
+    Args:
+        artifact_dir: Artifact directory written by save_model_artifact
+        mmap_mode: numpy mmap mode for the arrays ('r' shares pages between
+            processes; None reads them into private memory)
+
+    Returns:
+        Model package dictionary with the same keys the recommender expects
+        from the legacy pickle ('scaler_params' replaces 'scaler')
+    """
+    with open(os.path.join(artifact_dir, HEADER_FILE), 'r', encoding='utf-8') as f:
+        header = json.load(f)
+
+    version = header.get('format_version')
+    if version != ARTIFACT_FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported model artifact version {version} "
+            f"(expected {ARTIFACT_FORMAT_VERSION})"
+        )
+
+    arrays = {
+        key: np.load(os.path.join(artifact_dir, filename), mmap_mode=mmap_mode)
+        for key, filename in ARRAY_FILES.items()
+    }
+    optional_arrays = {
+        key: np.load(os.path.join(artifact_dir, filename), mmap_mode=mmap_mode)
+        for key, filename in OPTIONAL_ARRAY_FILES.items()
+        if os.path.isfile(os.path.join(artifact_dir, filename))
+    }
+
+    places_dir = os.path.join(artifact_dir, PLACES_DIR)
+    places_data = pd.DataFrame({
+        entry['name']: _load_column(places_dir, entry, mmap_mode)
+        for entry in header['places_columns']
+    }, copy=False)
+
+    feature_columns = header['feature_columns']
+    feature_data = pd.DataFrame(
+        arrays['features'],
+        index=pd.RangeIndex(len(places_data), name='place_id'),
+        columns=feature_columns,
+        copy=False
+    )
+
+    model_package = {
+        'places_data': places_data,
+        'feature_data': feature_data,
+        'unit_features': arrays['unit_features'],
+        'neighbor_ids': arrays['neighbor_ids'],
+        'neighbor_scores': arrays['neighbor_scores'],
+        'feature_columns': feature_columns,
+        'scaler_params': {
+            key: np.asarray(value, dtype=np.float64)
+            for key, value in header['scaler'].items()
+        },
+        'metadata': header['metadata'],
+        'format_version': version,
+        'model_version': header.get('model_version', 0),
+    }
+    model_package.update(optional_arrays)
+    if 'feature_space' in header:
+        model_package['feature_space'] = header['feature_space']
+    return model_package
+
+
+def load_model_package(model_path: str, mmap_mode: Optional[str] = 'r') -> Dict[str, Any]:
+    """
+    Load a model package from an artifact directory or a legacy pickle
+
+    Args:
+        model_path: Resolved model path (see resolve_model_path)
+        mmap_mode: numpy mmap mode for artifact arrays
+
+    Returns:
+        Model package dictionary
+    """
+    if is_model_artifact(model_path):
+        return load_model_artifact(model_path, mmap_mode)
+
+    # Legacy pickles hold a fitted sklearn MinMaxScaler; artifacts store
+    # plain scaler arrays, so only this path needs scikit-learn
+    try:
+        with open(model_path, 'rb') as f:
+            return pickle.load(f)
+    except ModuleNotFoundError as e:
+        if e.name is None or e.name.split('.')[0] != 'sklearn':
+            raise
+        raise ImportError(
+            f"Loading the legacy pickle '{model_path}' requires scikit-learn; "
+            f"install it, or convert the model once with 'python model_artifact.py {model_path}' "
+            f"and load the published artifact (NumPy and pandas only)"
+        ) from e
+
+
+def publish_model_artifact(
+    model_package: Dict[str, Any],
+    model_path: str = DEFAULT_MODEL_PATH,
+    keep_versions: int = DEFAULT_KEEP_VERSIONS
+) -> Dict[str, Any]:
+    """
+    Write a model package as the next version of a published model
+
+    The version directory is written completely before the pointer file
+    is atomically replaced, so processes loading model_path (or watching
+    its version file) switch from one complete version to the next.
+
+    Args:
+        model_package: Model package to publish
+        model_path: Published model path (e.g. 'cbf_model')
+        keep_versions: Number of most recent versions kept on disk
+
+    Returns:
+        Version pointer of the published model (see read_model_version)
+    """
+    current = read_model_version(model_path)
+    if current is not None:
+        version = int(current['version']) + 1
+    else:
+        version = int(model_package.get('model_version', 0)) + 1
+
+    artifact_dir = f"{model_path}.v{version}"
+    save_model_artifact(dict(model_package, model_version=version), artifact_dir)
+
+    pointer = {
+        'version': version,
+        'artifact': os.path.basename(os.path.abspath(artifact_dir)),
+        'published_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+    }
+    version_file = f"{model_path}{VERSION_FILE_SUFFIX}"
+    tmp_file = f"{version_file}.tmp-{os.getpid()}"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(pointer, f, indent=2)
+    os.replace(tmp_file, version_file)
+
+    # Drop old versions; processes still reading them keep their open files
+    version_pattern = re.compile(re.escape(os.path.basename(model_path)) + r'\.v(\d+)$')
+    for path in glob.glob(f"{glob.escape(model_path)}.v*"):
+        match = version_pattern.match(os.path.basename(path))
+        if match and int(match.group(1)) <= version - keep_versions:
+            shutil.rmtree(path, ignore_errors=True)
+
+    return read_model_version(model_path)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Publish a cbf_model.pkl as a versioned model artifact")
+    parser.add_argument('model_path', nargs='?', default='cbf_model.pkl', help="Legacy pickle to convert")
+    parser.add_argument('output_path', nargs='?', default=DEFAULT_MODEL_PATH,
+                        help="Published model path (writes <path>.v<N>/ and <path>.version)")
+    parser.add_argument('--ivf', action='store_true', help="Also build and store an IVF neighbour index")
+    args = parser.parse_args()
+
+    package = ensure_place_ids(load_model_package(args.model_path))
+
+    if 'neighbor_ids' not in package:
+        from cbf_recommender import build_neighbor_table
+        package['neighbor_ids'], package['neighbor_scores'] = build_neighbor_table(
+            package['feature_data'].values
+        )
+
+    if args.ivf:
+        package.update(IVFIndex.build(normalize_rows(package['feature_data'].values)).to_arrays())
+
+    pointer = publish_model_artifact(package, args.output_path)
+    print(f"✓ Model version {pointer['version']} published to '{pointer['artifact']}'")
@@ -0,0 +1,237 @@
+"""
+Model Registry Module
+
+This module keeps the current CBFRecommender for a model path and swaps in
+new model versions without restarting the process. A background thread
+watches the model's version file (or the artifact/pickle itself for
+unpublished models), loads a changed model off the request path, and
+replaces the current recommender with a single reference assignment.
+Requests that already hold the old recommender finish on it.
+"""
+
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+from cbf_recommender import CBFRecommender
+from model_artifact import (
+    DEFAULT_MODEL_PATH, HEADER_FILE, is_model_artifact, read_model_version,
+    resolve_model_path
+)
+from recommendation_metrics import MetricsRegistry
+
+
+DEFAULT_POLL_INTERVAL = 5.0
+
+
+def model_fingerprint(model_path: str) -> Optional[Tuple]:
+    """
+    Identify the model version currently behind a model path
+
+    Args:
+        model_path: Published model path, artifact directory or pickle path
+
+    Returns:
+        Hashable fingerprint that changes when a new model is published or
+        the artifact/pickle is rewritten, or None if no model exists
+    """
+    pointer = read_model_version(model_path)
+    if pointer is not None:
+        return ('version', pointer['version'], pointer['artifact'])
+
+    resolved = resolve_model_path(model_path)
+    watched = os.path.join(resolved, HEADER_FILE) if is_model_artifact(resolved) else resolved
+    try:
+        stat = os.stat(watched)
+    except FileNotFoundError:
+        return None
+    return ('file', watched, stat.st_mtime_ns, stat.st_size)
+
+
+class ModelRegistry:
+    """Holds the current recommender for a model path and hot-swaps new versions"""
+
+    def __init__(
+        self,
+        model_path: str = DEFAULT_MODEL_PATH,
+        cache_size: int = 256,
+        index_type: str = 'auto',
+        watch: bool = False,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        metrics: Optional[MetricsRegistry] = None
+    ):
+        """
+        Load the current model and optionally start watching for new versions
+
+        Args:
+            model_path: Published model path, artifact directory or pickle path
+            cache_size: Preference profile cache size of each recommender
+            index_type: Neighbour index type of each recommender
+            watch: Start a background thread that reloads changed models
+            poll_interval: Seconds between checks of the model path
+            metrics: Registry receiving the stage timings of each recommender
+                (None disables timing)
+        """
+        self.model_path = model_path
+        self.cache_size = cache_size
+        self.index_type = index_type
+        self.poll_interval = poll_interval
+        self.metrics = metrics
+
+        self._swap_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._watcher = None
+        self._recommender = None
+        self._fingerprint = None
+        self._failed_fingerprint = None
+        self._swap_listeners: List[Callable[[CBFRecommender], None]] = []
+        self._info = {}
+        self.last_error = None
+        self.reload_count = 0
+
+        self.reload(force=True)
+        if watch:
+            self.start_watching()
+
+    @property
+    def recommender(self) -> CBFRecommender:
+        """Current recommender (hold on to it for the duration of a request)"""
+        recommender = self._recommender
+        if recommender is None:
+            raise RuntimeError(f"Model registry for '{self.model_path}' is closed")
+        return recommender
+
+    def add_swap_listener(self, callback: Callable[[CBFRecommender], None]):
+        """
+        Call a function with the new recommender after every swap
+
+        Used to invalidate caches that depend on the model version.
+
+        Args:
+            callback: Function taking the new CBFRecommender
+        """
+        self._swap_listeners.append(callback)
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Load the model if it changed and swap it in
+
+        The new recommender is fully loaded before the swap; if loading
+        fails, the current one stays in place and the same model is not
+        retried until it changes again.
+
+        Args:
+            force: Reload even if the model did not change
+
+        Returns:
+            True if a new recommender was swapped in
+        """
+        with self._swap_lock:
+            fingerprint = model_fingerprint(self.model_path)
+            if not force and fingerprint in (self._fingerprint, self._failed_fingerprint):
+                return False
+
+            start = time.perf_counter()
+            try:
+                recommender = CBFRecommender(
+                    self.model_path, self.cache_size, self.index_type, self.metrics
+                )
+            except Exception as e:
+                self.last_error = str(e)
+                self._failed_fingerprint = fingerprint
+                if self._recommender is None:
+                    raise
+                print(f"✗ Model reload failed, keeping version {self._info.get('version')}: {e}")
+                return False
+            load_seconds = time.perf_counter() - start
+
+            # Response caches key on it: unlike model_version it also changes
+            # when an unpublished artifact or pickle is rewritten
+            recommender.model_fingerprint = fingerprint
+            self._recommender = recommender
+            self._fingerprint = fingerprint
+            self._info = {
+                'version': recommender.model_version,
+                'artifact': recommender.model_path,
+                'loaded_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'load_seconds': load_seconds,
+            }
+            self.last_error = None
+            self.reload_count += 1
+
+            for callback in self._swap_listeners:
+                try:
+                    callback(recommender)
+                except Exception as e:
+                    print(f"✗ Model swap listener failed: {e}")
+            return True
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Describe the loaded model
+
+        Returns:
+            Dictionary with 'model_path', 'version', 'artifact', 'loaded_at',
+            'load_seconds', 'reload_count', 'watching' and 'last_error'
+        """
+        return {
+            'model_path': self.model_path,
+            **self._info,
+            'reload_count': self.reload_count,
+            'watching': self._watcher is not None and self._watcher.is_alive(),
+            'last_error': self.last_error,
+        }
+
+    def start_watching(self):
+        """Start the background thread that reloads changed models"""
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._stop_event.clear()
+        self._watcher = threading.Thread(
+            target=self._watch, name='cbf-model-watcher', daemon=True
+        )
+        self._watcher.start()
+
+    def stop_watching(self):
+        """Stop the background watcher thread"""
+        self._stop_event.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=self.poll_interval + 1)
+        self._watcher = None
+
+    def close(self):
+        """Stop watching and release the current recommender"""
+        self.stop_watching()
+        with self._swap_lock:
+            self._recommender = None
+            self._fingerprint = None
+
+    def _watch(self):
+        """Poll the model path until stopped"""
+        while not self._stop_event.wait(self.poll_interval):
+            try:
+                if self.reload():
+                    print(f"✓ Hot-swapped to model version {self._info['version']} "
+                          f"(loaded in {self._info['load_seconds']:.3f}s)")
+            except Exception as e:
+                self.last_error = str(e)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Watch a model path and hot-swap new versions")
+    parser.add_argument('--model-path', default=DEFAULT_MODEL_PATH)
+    parser.add_argument('--poll-interval', type=float, default=DEFAULT_POLL_INTERVAL)
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.model_path, watch=True, poll_interval=args.poll_interval)
+    print(f"Watching '{args.model_path}' (Ctrl+C to stop)")
+    print(registry.status())
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        registry.stop_watching()
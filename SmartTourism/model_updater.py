@@ -0,0 +1,411 @@
+"""
+Incremental Model Update Module
+
+This module applies place changes (new places, changed ratings or review
+counts, removed places) to a trained CBF model without re-running the
+training notebook. Only the neighbour lists affected by a change are
+recomputed, and the fitted min-max scaler is kept unless the feature
+bounds drift past a threshold, in which case the model is rebuilt from
+its place data. Full recomputes go through build_model's grouped (IVF for
+large catalogs) neighbour build, and every scoring block is sized to a
+memory budget.
+
+Each update is written as a new model version with
+model_artifact.publish_model_artifact.
+"""
+
+import os
+import time
+from datetime import datetime
+from typing import Dict, Any, Optional, Iterable
+
+import numpy as np
+import pandas as pd
+
+from build_model import DEFAULT_MEMORY_BUDGET_MB, _block_rows, build_neighbor_lists
+from cbf_recommender import DEFAULT_NEIGHBORS_K, neighbor_rows
+from geo_index import COORDINATE_COLUMNS
+from model_artifact import (
+    DEFAULT_MODEL_PATH, ensure_place_ids, fit_scaler_params, get_scaler_params,
+    load_model_package, publish_model_artifact, resolve_model_path
+)
+from neighbor_index import IVF_ARRAY_KEYS, IVFIndex, normalize_rows
+
+
+# Movement of a feature's min/max, as a fraction of its fitted range,
+# that triggers a full rebuild instead of an incremental update
+DEFAULT_DRIFT_THRESHOLD = 0.1
+
+
+def scaler_drift(scaler_params: Dict[str, np.ndarray], raw_features: np.ndarray) -> float:
+    """
+    Measure how far the data bounds moved from the fitted scaler bounds
+
+    Args:
+        scaler_params: Fitted scaling parameters (see get_scaler_params)
+        raw_features: 2D array of current unscaled features
+
+    Returns:
+        Largest change of any feature's min or max, relative to its
+        fitted range (0.0 when the bounds are unchanged)
+    """
+    if len(raw_features) == 0:
+        return 0.0
+    fitted_range = scaler_params['data_max'] - scaler_params['data_min']
+    fitted_range = np.where(fitted_range == 0, 1.0, fitted_range)
+    min_shift = np.abs(raw_features.min(axis=0) - scaler_params['data_min'])
+    max_shift = np.abs(raw_features.max(axis=0) - scaler_params['data_max'])
+    return float(np.max(np.maximum(min_shift, max_shift) / fitted_range))
+
+
+class IncrementalModelUpdater:
+    """Apply place upserts and removals to a CBF model and publish new versions"""
+
+    def __init__(
+        self,
+        model_path: str = DEFAULT_MODEL_PATH,
+        drift_threshold: float = DEFAULT_DRIFT_THRESHOLD,
+        memory_budget_mb: int = DEFAULT_MEMORY_BUDGET_MB
+    ):
+        """
+        Load the model to update
+
+        Args:
+            model_path: Published model path, artifact directory or legacy
+                pickle (new versions are published to this path, without
+                a '.pkl' suffix)
+            drift_threshold: Scaler drift above which the model is rebuilt
+            memory_budget_mb: Memory for neighbour scoring blocks, in MB
+        """
+        base_path, extension = os.path.splitext(model_path)
+        self.model_path = base_path if extension == '.pkl' else model_path
+        self.drift_threshold = drift_threshold
+        self.memory_budget_mb = memory_budget_mb
+
+        package = ensure_place_ids(load_model_package(resolve_model_path(model_path), mmap_mode=None))
+        if 'feature_space' in package:
+            raise ValueError(
+                f"Model '{model_path}' uses {package['feature_space']['type']} features, which are "
+                f"not updated incrementally; rebuild it with build_model.py"
+            )
+        package['scaler_params'] = get_scaler_params(package)
+        package.pop('scaler', None)
+        package.pop('similarity_matrix', None)
+        if 'unit_features' not in package:
+            package['unit_features'] = normalize_rows(package['feature_data'].values.astype(np.float32))
+        self.neighbors_k = int(package['metadata'].get('neighbors_k', DEFAULT_NEIGHBORS_K))
+        if 'neighbor_ids' not in package:
+            package['neighbor_ids'], package['neighbor_scores'] = self._all_neighbor_lists(
+                package['unit_features'], self.neighbors_k
+            )
+        self.model_package = package
+
+    def upsert_places(self, places: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Add new places and update existing ones
+
+        Rows with a place_id update that place (only the given columns
+        change); rows without one are added with new ids.
+
+        Args:
+            places: Place rows with the places_data columns
+
+        Returns:
+            Update summary (see apply_changes)
+        """
+        return self.apply_changes(upserts=places)
+
+    def remove_places(self, place_ids: Iterable[int]) -> Dict[str, Any]:
+        """
+        Remove places from the model
+
+        Ids stay dense, so places after a removed one are renumbered; the
+        summary's 'id_map' maps old ids to new ids (-1 for removed).
+
+        Args:
+            place_ids: Ids of the places to remove
+
+        Returns:
+            Update summary (see apply_changes)
+        """
+        return self.apply_changes(remove_ids=place_ids)
+
+    def apply_changes(
+        self,
+        upserts: Optional[pd.DataFrame] = None,
+        remove_ids: Optional[Iterable[int]] = None
+    ) -> Dict[str, Any]:
+        """
+        Apply upserts and removals in one step
+
+        Args:
+            upserts: Place rows to add (no place_id) or update (place_id set)
+            remove_ids: Ids of places to remove (removal wins over update)
+
+        Returns:
+            Dictionary with 'inserted_ids', 'n_updated', 'n_removed',
+            'id_map' (old id -> new id, -1 if removed), 'scaler_drift',
+            'full_rebuild', 'refreshed_lists' and 'seconds'
+        """
+        start = time.perf_counter()
+        package = self.model_package
+        places = package['places_data']
+        n_old = len(places)
+
+        remove_ids = self._validate_ids(remove_ids, n_old)
+        keep = np.ones(n_old, dtype=bool)
+        keep[remove_ids] = False
+
+        places = places.copy()
+        updated_ids = np.empty(0, dtype=np.int64)
+        inserts = places.iloc[:0].drop(columns='place_id')
+        if upserts is not None and len(upserts):
+            upserts = upserts.reset_index(drop=True)
+            if 'place_id' in upserts.columns:
+                is_update = upserts['place_id'].notna().values
+            else:
+                is_update = np.zeros(len(upserts), dtype=bool)
+
+            if is_update.any():
+                updates = upserts[is_update]
+                update_rows = updates['place_id'].to_numpy(dtype=np.int64)
+                updated_ids = self._validate_ids(update_rows, n_old)
+                # Only given cells change: a file mixing new places and
+                # partial updates leaves the updates' other columns NaN
+                for column in updates.columns:
+                    if column != 'place_id' and column in places.columns:
+                        given = updates[column].notna().values
+                        if given.any():
+                            places.iloc[update_rows[given], places.columns.get_loc(column)] = (
+                                updates[column].values[given].astype(places[column].dtype)
+                                if places[column].dtype.kind in 'iub' else updates[column].values[given]
+                            )
+                updated_ids = updated_ids[keep[updated_ids]]
+
+            if not is_update.all():
+                # Coordinates are optional, like in the backend places table
+                missing = [
+                    c for c in inserts.columns
+                    if c not in upserts.columns and c not in COORDINATE_COLUMNS
+                ]
+                if missing:
+                    raise ValueError(f"New places are missing columns: {missing}")
+                new_places = upserts.loc[~is_update].reindex(columns=list(inserts.columns))
+                # Mixed files read integer columns as float (NaN in update rows)
+                integer_columns = [c for c in inserts.columns if inserts[c].dtype.kind in 'iub']
+                incomplete = [c for c in integer_columns if new_places[c].isna().any()]
+                if incomplete:
+                    raise ValueError(f"New places are missing values in columns: {incomplete}")
+                inserts = new_places.astype({c: inserts[c].dtype for c in integer_columns})
+
+        # Compact ids: kept places keep their order, new places go last
+        id_map = np.full(n_old, -1, dtype=np.int64)
+        id_map[keep] = np.arange(keep.sum())
+        places = pd.concat([places[keep].drop(columns='place_id'), inserts], ignore_index=True)
+        places.insert(0, 'place_id', np.arange(len(places)))
+
+        n_kept = int(keep.sum())
+        changed_ids = np.union1d(id_map[updated_ids], np.arange(n_kept, len(places)))
+
+        raw_features = places[package['feature_columns']].to_numpy(dtype=np.float64)
+        drift = scaler_drift(package['scaler_params'], raw_features)
+        full_rebuild = drift > self.drift_threshold
+        if full_rebuild:
+            refreshed = self._rebuild(places, raw_features)
+        else:
+            refreshed = self._update_neighbors(places, raw_features, keep, id_map, changed_ids)
+
+        package['metadata'] = dict(
+            package['metadata'],
+            n_places=len(places),
+            last_update={
+                'date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'inserted': int(len(places) - n_kept),
+                'updated': int(len(updated_ids)),
+                'removed': int(len(remove_ids)),
+                'full_rebuild': bool(full_rebuild),
+            }
+        )
+
+        return {
+            'inserted_ids': np.arange(n_kept, len(places)),
+            'n_updated': int(len(updated_ids)),
+            'n_removed': int(len(remove_ids)),
+            'id_map': id_map,
+            'scaler_drift': drift,
+            'full_rebuild': bool(full_rebuild),
+            'refreshed_lists': int(refreshed),
+            'seconds': time.perf_counter() - start,
+        }
+
+    def publish(self, model_path: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Write the updated model as a new version
+
+        Args:
+            model_path: Published model path (defaults to the loaded one)
+
+        Returns:
+            Version pointer of the published model
+        """
+        return publish_model_artifact(self.model_package, model_path or self.model_path)
+
+    def _validate_ids(self, place_ids: Optional[Iterable[int]], n_places: int) -> np.ndarray:
+        """Convert place ids to a unique int array, rejecting unknown ids"""
+        if place_ids is None:
+            return np.empty(0, dtype=np.int64)
+        place_ids = np.unique(np.asarray(list(place_ids), dtype=np.int64))
+        unknown = place_ids[(place_ids < 0) | (place_ids >= n_places)]
+        if len(unknown):
+            raise ValueError(f"Unknown place ids: {unknown.tolist()}")
+        return place_ids
+
+    def _all_neighbor_lists(self, unit_features: np.ndarray, k: int):
+        """Compute the whole neighbour table like build_model (grouped, IVF for large catalogs)"""
+        neighbor_ids, neighbor_scores, _ = build_neighbor_lists(
+            unit_features, k, self.memory_budget_mb
+        )
+        return neighbor_ids, neighbor_scores
+
+    def _store_features(self, places: pd.DataFrame, scaled: np.ndarray, unit_features: np.ndarray):
+        """Replace the place data and feature arrays of the model package"""
+        package = self.model_package
+        package['places_data'] = places
+        package['feature_data'] = pd.DataFrame(
+            scaled,
+            index=pd.RangeIndex(len(places), name='place_id'),
+            columns=package['feature_columns']
+        )
+        package['unit_features'] = unit_features
+
+    def _rebuild(self, places: pd.DataFrame, raw_features: np.ndarray) -> int:
+        """Refit the scaler and recompute every neighbour list"""
+        package = self.model_package
+        package['scaler_params'] = fit_scaler_params(raw_features)
+        params = package['scaler_params']
+        scaled = raw_features * params['scale'] + params['min']
+        unit_features = normalize_rows(scaled.astype(np.float32))
+        self._store_features(places, scaled, unit_features)
+
+        n_places = len(places)
+        package['neighbor_ids'], package['neighbor_scores'] = self._all_neighbor_lists(
+            unit_features, self.neighbors_k
+        )
+        if all(key in package for key in IVF_ARRAY_KEYS):
+            package.update(IVFIndex.build(unit_features).to_arrays())
+        return n_places
+
+    def _update_neighbors(
+        self,
+        places: pd.DataFrame,
+        raw_features: np.ndarray,
+        keep: np.ndarray,
+        id_map: np.ndarray,
+        changed_ids: np.ndarray
+    ) -> int:
+        """
+        Scale with the fitted scaler and refresh only affected neighbour lists
+
+        A list is recomputed when its place changed or it referenced a
+        removed or changed place. Every other list stays valid and only
+        has to admit changed places that now score above its last entry.
+        """
+        package = self.model_package
+        params = package['scaler_params']
+        scaled = raw_features * params['scale'] + params['min']
+        unit_features = normalize_rows(scaled.astype(np.float32))
+        self._store_features(places, scaled, unit_features)
+
+        n_places = len(places)
+        n_kept = int(keep.sum())
+        k = max(0, min(self.neighbors_k, n_places - 1))
+        old_ids = package['neighbor_ids']
+        if old_ids.shape[1] != k:
+            # Catalog crossed the table width: recompute every list
+            package['neighbor_ids'], package['neighbor_scores'] = self._all_neighbor_lists(
+                unit_features, k
+            )
+            refreshed = n_places
+        else:
+            changed = np.zeros(n_places, dtype=bool)
+            changed[changed_ids] = True
+
+            neighbor_ids = np.zeros((n_places, k), dtype=np.int32)
+            neighbor_scores = np.full((n_places, k), -np.inf, dtype=np.float32)
+            mapped_ids = id_map[old_ids[keep]]
+            neighbor_ids[:n_kept] = mapped_ids
+            neighbor_scores[:n_kept] = package['neighbor_scores'][keep]
+
+            stale = (mapped_ids < 0) | changed[np.maximum(mapped_ids, 0)]
+            recompute = changed.copy()
+            recompute[:n_kept] |= stale.any(axis=1)
+
+            # Admit changed places into still-valid lists
+            rest = np.flatnonzero(~recompute)
+            if len(changed_ids) and k > 0:
+                changed_features = unit_features[changed_ids]
+                block_size = _block_rows(k + len(changed_ids), self.memory_budget_mb << 20)
+                for start in range(0, len(rest), block_size):
+                    rows = rest[start:start + block_size]
+                    scores = unit_features[rows] @ changed_features.T
+                    enters = scores.max(axis=1) > neighbor_scores[rows, -1]
+                    if not enters.any():
+                        continue
+                    rows, scores = rows[enters], scores[enters]
+                    merged_ids = np.hstack([
+                        neighbor_ids[rows], np.broadcast_to(changed_ids, scores.shape)
+                    ])
+                    merged_scores = np.hstack([neighbor_scores[rows], scores])
+                    top = np.argpartition(-merged_scores, k - 1, axis=1)[:, :k]
+                    top_scores = np.take_along_axis(merged_scores, top, axis=1)
+                    order = np.argsort(-top_scores, axis=1, kind='stable')
+                    top = np.take_along_axis(top, order, axis=1)
+                    neighbor_ids[rows] = np.take_along_axis(merged_ids, top, axis=1)
+                    neighbor_scores[rows] = np.take_along_axis(merged_scores, top, axis=1)
+
+            rows = np.flatnonzero(recompute)
+            neighbor_ids[rows], neighbor_scores[rows] = neighbor_rows(
+                unit_features, rows, k, _block_rows(n_places, self.memory_budget_mb << 20)
+            )
+            package['neighbor_ids'] = neighbor_ids
+            package['neighbor_scores'] = neighbor_scores
+            refreshed = len(rows)
+
+        if all(key in package for key in IVF_ARRAY_KEYS):
+            # Keep the trained centroids; place changed places in their nearest list
+            index = IVFIndex.from_arrays(unit_features, package)
+            assignments = np.empty(n_places, dtype=np.int64)
+            assignments[:n_kept] = index.list_assignments[keep]
+            assignments[changed_ids] = index.assign(unit_features[changed_ids])
+            package.update(IVFIndex.from_assignments(
+                unit_features, index.centroids, assignments
+            ).to_arrays())
+
+        return refreshed
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Apply place changes to the CBF model and publish a new version")
+    parser.add_argument('--model-path', default=DEFAULT_MODEL_PATH)
+    parser.add_argument('--upsert', help="CSV of places to add (no place_id) or update (with place_id)")
+    parser.add_argument('--encoding', default='utf-8', help="Encoding of the --upsert CSV")
+    parser.add_argument('--remove', type=int, nargs='*', default=[], help="Place ids to remove")
+    parser.add_argument('--drift-threshold', type=float, default=DEFAULT_DRIFT_THRESHOLD)
+    parser.add_argument('--memory-budget-mb', type=int, default=DEFAULT_MEMORY_BUDGET_MB)
+    args = parser.parse_args()
+
+    updater = IncrementalModelUpdater(args.model_path, args.drift_threshold, args.memory_budget_mb)
+    upserts = pd.read_csv(args.upsert, encoding=args.encoding) if args.upsert else None
+    summary = updater.apply_changes(upserts=upserts, remove_ids=args.remove)
+
+    print(f"✓ Applied changes in {summary['seconds']:.3f}s")
+    print(f"  Inserted: {len(summary['inserted_ids'])}, updated: {summary['n_updated']}, "
+          f"removed: {summary['n_removed']}")
+    print(f"  Scaler drift: {summary['scaler_drift']:.4f} "
+          f"({'full rebuild' if summary['full_rebuild'] else 'incremental'})")
+    print(f"  Neighbour lists refreshed: {summary['refreshed_lists']}")
+
+    pointer = updater.publish()
+    print(f"✓ Model version {pointer['version']} published to '{pointer['artifact']}'")
@@ -0,0 +1,448 @@
+"""
+Neighbor Index Module
+
+This module provides the nearest-neighbour search behind CBFRecommender.
+Place vectors and queries are L2-normalized, so cosine similarity is a
+dot product.
+
+Index types:
+    BruteForceIndex     exact scan over all (or the candidate) places;
+                        used for small catalogs
+    IVFIndex            inverted-file index: places are clustered with
+                        spherical k-means and a query only scans the
+                        n_probe lists whose centroids are closest to it
+
+Both indexes accept a sorted array of candidate place ids, so preference
+filters (category, province, rating, subcategory) are applied before
+scoring rather than after.
+"""
+
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+
+# Catalogs up to this size are searched exactly by default
+BRUTE_FORCE_MAX_PLACES = 50_000
+
+# A pre-filter this selective is scanned exactly even on an IVF index
+EXACT_SCAN_MAX_CANDIDATES = 20_000
+
+DEFAULT_N_PROBE = 8
+
+# Arrays persisted with the model for an IVF index
+IVF_ARRAY_KEYS = ('ivf_centroids', 'ivf_list_ids', 'ivf_list_offsets')
+
+
+def normalize_rows(feature_matrix: np.ndarray) -> np.ndarray:
+    """
+    L2-normalize feature rows so cosine similarity becomes a dot product
+
+    Args:
+        feature_matrix: 2D array of scaled place features
+
+    Returns:
+        float32 array of unit-length rows (all-zero rows stay zero)
+    """
+    features = np.asarray(feature_matrix, dtype=np.float32)
+    norms = np.linalg.norm(features, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return features / norms
+
+
+def select_top_n(
+    scores: np.ndarray,
+    top_n: int,
+    positions: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Select the top N scored places with argpartition plus a small sort
+
+    Only the best top_n scores are sorted (O(N + k log k) instead of a
+    full sort).
+
+    Args:
+        scores: 1D similarity scores; non-finite scores (e.g. -inf for
+            excluded places) are never selected
+        top_n: Number of places to return
+        positions: Place ids aligned with scores (defaults to
+            0..len(scores)-1, i.e. scores cover all places)
+
+    Returns:
+        Tuple of (place ids, scores), best first
+    """
+    n_scores = len(scores)
+    if positions is None:
+        positions = np.arange(n_scores)
+    if top_n <= 0 or n_scores == 0:
+        return positions[:0], scores[:0]
+
+    k = min(top_n, n_scores)
+    if k < n_scores:
+        best = np.argpartition(-scores, k - 1)[:k]
+    else:
+        best = np.arange(n_scores)
+    best = best[np.argsort(-scores[best], kind='stable')]
+    best = best[np.isfinite(scores[best])]
+
+    return positions[best], scores[best]
+
+
+def mmr_rerank(
+    vectors: np.ndarray,
+    relevance: np.ndarray,
+    top_n: int,
+    diversity: float
+) -> np.ndarray:
+    """
+    Order a candidate pool by maximal marginal relevance
+
+    Each pick maximizes (1 - diversity) * relevance - diversity * (max
+    similarity to the places already picked). The max similarity of the
+    pool is updated with one matrix-vector product per pick, so N picks
+    from M candidates cost O(M * N) dot products and no M x M matrix is
+    built.
+
+    Args:
+        vectors: L2-normalized candidate vectors (M x n_features)
+        relevance: Similarity of each candidate to the query
+        top_n: Number of candidates to pick
+        diversity: Weight of dissimilarity to the picked places, from 0
+            (relevance order) to 1
+
+    Returns:
+        Indices into the pool, in pick order
+    """
+    n_candidates = len(relevance)
+    n_picks = max(0, min(top_n, n_candidates))
+    relevance = np.asarray(relevance, dtype=np.float32)
+    picks = np.empty(n_picks, dtype=np.int64)
+    if n_picks == 0:
+        return picks
+
+    # The first pick is the most relevant candidate
+    marginal = relevance.copy()
+    max_similarity = np.full(n_candidates, -np.inf, dtype=np.float32)
+    for step in range(n_picks):
+        pick = int(np.argmax(marginal))
+        picks[step] = pick
+        np.maximum(max_similarity, vectors @ vectors[pick], out=max_similarity)
+        marginal = (1 - diversity) * relevance - diversity * max_similarity
+        marginal[picks[:step + 1]] = -np.inf
+    return picks
+
+
+def _exact_search(
+    unit_features: np.ndarray,
+    query: np.ndarray,
+    k: int,
+    candidates: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Score every (candidate) place and return the k best"""
+    if candidates is None:
+        return select_top_n(unit_features @ query, k)
+    return select_top_n(unit_features[candidates] @ query, k, candidates)
+
+
+class BruteForceIndex:
+    """Exact cosine search by scanning all candidate places"""
+
+    index_type = 'brute_force'
+    exact = True
+
+    def __init__(self, unit_features: np.ndarray):
+        """
+        Initialize the index
+
+        Args:
+            unit_features: L2-normalized place vectors (row = place id)
+        """
+        self.unit_features = unit_features
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int,
+        candidates: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the k places most similar to a query
+
+        Args:
+            query: L2-normalized query vector
+            k: Number of places to return
+            candidates: Optional sorted place ids to restrict the search to
+
+        Returns:
+            Tuple of (place ids, cosine scores), best first
+        """
+        return _exact_search(self.unit_features, query, k, candidates)
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Arrays to persist with the model (none for brute force)"""
+        return {}
+
+
+class IVFIndex:
+    """Approximate cosine search over an inverted-file (IVF) index"""
+
+    index_type = 'ivf'
+    exact = False
+
+    def __init__(
+        self,
+        unit_features: np.ndarray,
+        centroids: np.ndarray,
+        list_ids: np.ndarray,
+        list_offsets: np.ndarray,
+        n_probe: int = DEFAULT_N_PROBE
+    ):
+        """
+        Initialize the index from its arrays
+
+        Args:
+            unit_features: L2-normalized place vectors (row = place id)
+            centroids: L2-normalized list centroids, shape (n_lists, dim)
+            list_ids: Place ids grouped by list
+            list_offsets: list j holds list_ids[list_offsets[j]:list_offsets[j + 1]]
+            n_probe: Number of lists scanned per query
+        """
+        self.unit_features = unit_features
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+        self.list_ids = list_ids
+        self.list_offsets = list_offsets
+        self.n_probe = max(1, n_probe)
+
+        # Inverse of list_ids: the list each place belongs to
+        self.list_assignments = np.empty(len(list_ids), dtype=np.int32)
+        self.list_assignments[list_ids] = np.repeat(
+            np.arange(self.n_lists, dtype=np.int32), np.diff(list_offsets)
+        )
+
+    @property
+    def n_lists(self) -> int:
+        return self.centroids.shape[0]
+
+    @classmethod
+    def build(
+        cls,
+        unit_features: np.ndarray,
+        n_lists: Optional[int] = None,
+        n_probe: int = DEFAULT_N_PROBE,
+        n_iter: int = 10,
+        sample_size: Optional[int] = None,
+        seed: int = 0,
+        block_size: int = 65536
+    ) -> 'IVFIndex':
+        """
+        Cluster the places with spherical k-means and build the lists
+
+        Args:
+            unit_features: L2-normalized place vectors
+            n_lists: Number of lists (defaults to sqrt(n_places))
+            n_probe: Number of lists scanned per query
+            n_iter: k-means iterations
+            sample_size: Places used to train the centroids (defaults to
+                64 per list)
+            seed: Random seed
+            block_size: Rows assigned per block
+
+        Returns:
+            IVFIndex over unit_features
+        """
+        n_places = unit_features.shape[0]
+        if n_lists is None:
+            n_lists = int(np.sqrt(n_places))
+        n_lists = max(1, min(n_lists, n_places))
+        if sample_size is None:
+            sample_size = 64 * n_lists
+
+        rng = np.random.default_rng(seed)
+        sample_ids = np.sort(rng.choice(n_places, size=min(sample_size, n_places), replace=False))
+        sample = np.asarray(unit_features[sample_ids], dtype=np.float32)
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+
+        for _ in range(n_iter):
+            assignments = _assign_lists(sample, centroids, block_size)
+            counts = np.bincount(assignments, minlength=n_lists)
+            sums = np.column_stack([
+                np.bincount(assignments, weights=sample[:, d], minlength=n_lists)
+                for d in range(sample.shape[1])
+            ])
+            centroids = normalize_rows(sums)
+
+            # Re-seed empty lists from random sample points
+            empty = np.flatnonzero(counts == 0)
+            if len(empty):
+                centroids[empty] = sample[rng.choice(len(sample), size=len(empty))]
+
+        assignments = _assign_lists(unit_features, centroids, block_size)
+        return cls.from_assignments(unit_features, centroids, assignments, n_probe)
+
+    @classmethod
+    def from_assignments(
+        cls,
+        unit_features: np.ndarray,
+        centroids: np.ndarray,
+        assignments: np.ndarray,
+        n_probe: int = DEFAULT_N_PROBE
+    ) -> 'IVFIndex':
+        """
+        Build the lists from a list assignment per place
+
+        Args:
+            unit_features: L2-normalized place vectors
+            centroids: L2-normalized list centroids
+            assignments: List index of every place
+            n_probe: Number of lists scanned per query
+
+        Returns:
+            IVFIndex over unit_features
+        """
+        n_lists = centroids.shape[0]
+        list_ids = np.argsort(assignments, kind='stable').astype(np.int32)
+        list_offsets = np.zeros(n_lists + 1, dtype=np.int64)
+        list_offsets[1:] = np.cumsum(np.bincount(assignments, minlength=n_lists))
+        return cls(unit_features, centroids, list_ids, list_offsets, n_probe)
+
+    def assign(self, unit_features: np.ndarray, block_size: int = 65536) -> np.ndarray:
+        """
+        Nearest list of each given vector
+
+        Args:
+            unit_features: L2-normalized vectors
+            block_size: Rows assigned per block
+
+        Returns:
+            List index per row
+        """
+        return _assign_lists(unit_features, self.centroids, block_size)
+
+    @classmethod
+    def from_arrays(
+        cls,
+        unit_features: np.ndarray,
+        arrays: Dict[str, np.ndarray],
+        n_probe: int = DEFAULT_N_PROBE
+    ) -> 'IVFIndex':
+        """
+        Rebuild an index persisted with to_arrays
+
+        Args:
+            unit_features: L2-normalized place vectors
+            arrays: Dictionary holding the IVF_ARRAY_KEYS arrays
+            n_probe: Number of lists scanned per query
+
+        Returns:
+            IVFIndex over unit_features
+        """
+        return cls(
+            unit_features, arrays['ivf_centroids'], arrays['ivf_list_ids'],
+            arrays['ivf_list_offsets'], n_probe
+        )
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Arrays to persist with the model"""
+        return {
+            'ivf_centroids': self.centroids,
+            'ivf_list_ids': self.list_ids,
+            'ivf_list_offsets': self.list_offsets,
+        }
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int,
+        candidates: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find (approximately) the k places most similar to a query
+
+        The n_probe lists whose centroids are nearest the query are
+        scanned (more if they hold fewer than k places). With a pre-filter
+        only lists containing candidates are considered, and selective
+        filters (few candidates) are scanned exactly instead.
+
+        Args:
+            query: L2-normalized query vector
+            k: Number of places to return
+            candidates: Optional sorted place ids to restrict the search to
+
+        Returns:
+            Tuple of (place ids, cosine scores), best first
+        """
+        if candidates is not None and len(candidates) <= EXACT_SCAN_MAX_CANDIDATES:
+            return _exact_search(self.unit_features, query, k, candidates)
+
+        list_order = np.argsort(-(self.centroids @ query), kind='stable')
+        if candidates is None:
+            list_sizes = np.diff(self.list_offsets)
+        else:
+            candidate_lists = self.list_assignments[candidates]
+            list_sizes = np.bincount(candidate_lists, minlength=self.n_lists)
+
+        # Nearest non-empty lists until n_probe lists and k places are covered
+        list_order = list_order[list_sizes[list_order] > 0]
+        covered = np.cumsum(list_sizes[list_order])
+        n_scan = max(self.n_probe, int(np.searchsorted(covered, k)) + 1)
+        probe_lists = list_order[:n_scan]
+
+        if candidates is None:
+            offsets = self.list_offsets
+            ids = np.sort(np.concatenate([
+                self.list_ids[offsets[j]:offsets[j + 1]] for j in probe_lists
+            ]))
+        else:
+            probed = np.zeros(self.n_lists, dtype=bool)
+            probed[probe_lists] = True
+            ids = candidates[probed[candidate_lists]]
+
+        # Sorted ids keep reads from memory-mapped features sequential
+        ids = ids.astype(np.int64)
+        return select_top_n(self.unit_features[ids] @ query, k, ids)
+
+
+def _assign_lists(
+    unit_features: np.ndarray,
+    centroids: np.ndarray,
+    block_size: int
+) -> np.ndarray:
+    """Index of the nearest centroid for every row, computed blockwise"""
+    assignments = np.empty(unit_features.shape[0], dtype=np.int64)
+    for start in range(0, unit_features.shape[0], block_size):
+        block = np.asarray(unit_features[start:start + block_size], dtype=np.float32)
+        assignments[start:start + block_size] = np.argmax(block @ centroids.T, axis=1)
+    return assignments
+
+
+def build_neighbor_index(
+    unit_features: np.ndarray,
+    index_type: str = 'auto',
+    arrays: Optional[Dict[str, np.ndarray]] = None,
+    n_probe: int = DEFAULT_N_PROBE
+):
+    """
+    Create the neighbour index for a catalog
+
+    Args:
+        unit_features: L2-normalized place vectors
+        index_type: 'brute_force', 'ivf', or 'auto' (brute force up to
+            BRUTE_FORCE_MAX_PLACES places, IVF above)
+        arrays: Optional persisted index arrays (e.g. the model package);
+            a persisted IVF index is reused instead of rebuilt
+        n_probe: Number of lists scanned per IVF query
+
+    Returns:
+        BruteForceIndex or IVFIndex
+    """
+    if index_type == 'auto':
+        index_type = 'brute_force' if unit_features.shape[0] <= BRUTE_FORCE_MAX_PLACES else 'ivf'
+
+    if index_type == 'brute_force':
+        return BruteForceIndex(unit_features)
+    if index_type == 'ivf':
+        if arrays is not None and all(key in arrays for key in IVF_ARRAY_KEYS):
+            return IVFIndex.from_arrays(unit_features, arrays, n_probe)
+        return IVFIndex.build(unit_features, n_probe=n_probe)
+
+    raise ValueError(f"Unknown neighbour index type '{index_type}'")
@@ -0,0 +1,322 @@
+"""
+Popularity Statistics Module
+
+This module precomputes the statistics that cold-start profile vectors
+take from the places matching a user's preferences: the mean category id
+and the 25th percentile, median and 75th percentile of reviews_count
+('hidden_gems', 'balanced' and 'popular'). They are stored per
+(category, province, subcategory, minimum rating) group, where each of
+the first three may also be "any", so building a profile for common
+preferences is a table lookup instead of quantiles over the filtered
+places.
+
+The table is exact for preferences selecting at most one category, one
+province and one subcategory (or every subcategory), with a minimum
+rating among the precomputed thresholds. Other combinations, such as
+several provinces or a handful of subcategories, have no group of their
+own; lookup_profile_statistics returns None for them and the caller
+computes the statistics from the filtered places.
+
+Quantiles match np.quantile (linear interpolation) and np.median.
+"""
+
+from typing import Any, Callable, Dict, Optional, Sequence
+
+import numpy as np
+
+
+# Quantile of reviews_count used for each popularity preference
+POPULARITY_QUANTILES = {
+    'hidden_gems': 0.25,
+    'balanced': 0.5,
+    'popular': 0.75,
+}
+
+# Columns of the statistics arrays
+STATISTIC_COLUMNS = ('category_id', 'hidden_gems', 'balanced', 'popular')
+
+
+def reviews_count_statistic(reviews_count: np.ndarray, popularity_preference: str) -> float:
+    """
+    Compute the profile's reviews_count from the filtered places
+
+    Args:
+        reviews_count: reviews_count values of the filtered places
+        popularity_preference: 'popular', 'hidden_gems' or 'balanced'
+            (anything else is treated as 'balanced')
+
+    Returns:
+        75th percentile, 25th percentile or median of reviews_count
+    """
+    if popularity_preference == 'popular':
+        return np.quantile(reviews_count, 0.75)
+    if popularity_preference == 'hidden_gems':
+        return np.quantile(reviews_count, 0.25)
+    return np.median(reviews_count)
+
+
+def _sorted_quantiles(
+    select: Callable[[np.ndarray], np.ndarray],
+    counts: np.ndarray,
+    q: float
+) -> np.ndarray:
+    """
+    Linear-interpolation quantile of each of several ascending runs
+
+    Args:
+        select: Function returning the values at given 0-based ranks
+            within each run
+        counts: Length of each run (at least 1)
+        q: Quantile in [0, 1]
+    """
+    if q == 0.5:
+        # np.median averages the two middle values
+        return (select((counts - 1) // 2) + select(counts // 2)) / 2
+
+    # Same as np.quantile(..., method='linear')
+    virtual = q * (counts - 1)
+    previous = np.floor(virtual)
+    gamma = virtual - previous
+    previous = previous.astype(np.int64)
+    a = select(previous)
+    b = select(np.minimum(previous + 1, counts - 1))
+    difference = b - a
+    return np.where(gamma >= 0.5, b - difference * (1 - gamma), a + difference * gamma)
+
+
+def _group_quantiles(
+    offsets: np.ndarray,
+    kept: np.ndarray,
+    reviews_count: np.ndarray
+) -> Dict[str, np.ndarray]:
+    """
+    Compute the reviews_count quantiles of the kept places of each group
+
+    Args:
+        offsets: Group g holds places offsets[g]:offsets[g + 1]
+        kept: Whether each place is kept
+        reviews_count: reviews_count of each place, ascending within a group
+
+    Returns:
+        Dictionary with 'count' (kept places per group) and 'quantiles'
+        (n_groups, 3) in the order of STATISTIC_COLUMNS[1:]; empty groups
+        are NaN
+    """
+    # The i-th kept place overall is the first whose running count is i + 1
+    running = np.cumsum(kept)
+    before = np.concatenate([[0], running])[offsets]
+    counts = np.diff(before)
+
+    quantiles = np.full((len(counts), len(STATISTIC_COLUMNS) - 1), np.nan)
+    nonempty = np.flatnonzero(counts)
+    first = before[nonempty]
+
+    def select(ranks: np.ndarray) -> np.ndarray:
+        return reviews_count[np.searchsorted(running, first + ranks + 1)]
+
+    for column, popularity in enumerate(STATISTIC_COLUMNS[1:]):
+        quantiles[nonempty, column] = _sorted_quantiles(
+            select, counts[nonempty], POPULARITY_QUANTILES[popularity]
+        )
+    return {'count': counts, 'quantiles': quantiles}
+
+
+def build_popularity_table(
+    filter_index: Dict[str, Any],
+    rating_thresholds: Sequence[float],
+    tourist_attraction_category_id: int = 1
+) -> Dict[str, Any]:
+    """
+    Precompute the profile statistics of every single-valued preference group
+
+    Groups are indexed [threshold, category, province, subcategory], with
+    category and province codes from the filter index plus a last "any"
+    entry, and subcategory bits plus a last "any" entry. Subcategories are
+    only keyed for Tourist Attractions (other categories are never
+    filtered by subcategory); the other specific-subcategory entries are
+    -1 (not computed).
+
+    Args:
+        filter_index: Filter arrays from build_filter_index
+        rating_thresholds: Minimum ratings offered to users
+        tourist_attraction_category_id: Category filtered by subcategory
+
+    Returns:
+        Dictionary with 'rating_thresholds', 'count' (int64 group sizes),
+        'statistics' (float64, last axis STATISTIC_COLUMNS), 'all_places'
+        (statistics of the whole catalog), 'tourist_attraction_code' and
+        'covering_bits' (subcategory bits whose selection keeps every
+        Tourist Attraction, -1 if none does)
+    """
+    thresholds = np.unique(np.asarray(rating_thresholds, dtype=np.float64))
+    category_values = filter_index['category_values']
+    n_categories = len(category_values) + 1
+    n_provinces = len(filter_index['province_values']) + 1
+    n_subcategories = len(filter_index['subcategory_bit']) + 1
+    any_category, any_province, any_subcategory = n_categories - 1, n_provinces - 1, n_subcategories - 1
+    group_shape = (n_categories, n_provinces, n_subcategories)
+    n_groups = n_categories * n_provinces * n_subcategories
+    key_type = np.int16 if n_groups <= np.iinfo(np.int16).max else np.int64
+
+    # Sort once by reviews (ties are interchangeable); a stable sort by
+    # group then keeps reviews ascending within each group (radix sort for
+    # small keys), and so does dropping the places under a rating threshold
+    by_reviews = np.argsort(filter_index['reviews_count'])
+    reviews_count = filter_index['reviews_count'][by_reviews].astype(np.float64)
+    ratings = filter_index['ratings'][by_reviews]
+    category_codes = filter_index['category_codes'][by_reviews].astype(np.int64)
+    province_codes = filter_index['province_codes'][by_reviews].astype(np.int64)
+
+    matches = np.flatnonzero(category_values == tourist_attraction_category_id)
+    tourist_attraction_code = int(matches[0]) if len(matches) else -1
+
+    # Tourist Attractions once per subcategory they belong to
+    attraction_rows = np.flatnonzero(category_codes == tourist_attraction_code)
+    attraction_bits = filter_index['subcategory_bits'][by_reviews[attraction_rows]]
+    memberships = [
+        attraction_rows[(attraction_bits & np.uint32(1 << bit)) != 0]
+        for bit in range(any_subcategory)
+    ]
+    member_rows = np.concatenate(memberships + [np.empty(0, dtype=np.int64)])
+    member_bits = np.repeat(np.arange(any_subcategory), [len(rows) for rows in memberships])
+
+    # Category and province each specific or any; then Tourist
+    # Attractions by subcategory with a specific or any province
+    passes = [
+        (None, category_codes, province_codes, any_subcategory),
+        (None, category_codes, any_province, any_subcategory),
+        (None, any_category, province_codes, any_subcategory),
+        (None, any_category, any_province, any_subcategory),
+    ]
+    if tourist_attraction_code >= 0:
+        passes += [
+            (member_rows, tourist_attraction_code, province_codes[member_rows], member_bits),
+            (member_rows, tourist_attraction_code, any_province, member_bits),
+        ]
+
+    count = np.zeros((len(thresholds), n_groups), dtype=np.int64)
+    quantiles = np.full((len(thresholds), n_groups, len(STATISTIC_COLUMNS) - 1), np.nan)
+    for rows, category, province, subcategory in passes:
+        keys = (category * n_provinces + province) * n_subcategories + subcategory
+        offsets = np.zeros(n_groups + 1, dtype=np.int64)
+        if np.ndim(keys) == 0:
+            pass_ratings, pass_reviews = ratings, reviews_count
+            offsets[keys + 1:] = len(ratings)
+        else:
+            order = np.argsort(keys.astype(key_type), kind='stable')
+            if rows is not None:
+                order = rows[order]
+            pass_ratings, pass_reviews = ratings[order], reviews_count[order]
+            offsets[1:] = np.cumsum(np.bincount(keys, minlength=n_groups))
+
+        for t, threshold in enumerate(thresholds):
+            groups = _group_quantiles(offsets, pass_ratings >= threshold, pass_reviews)
+            found = np.flatnonzero(groups['count'])
+            count[t, found] = groups['count'][found]
+            quantiles[t, found] = groups['quantiles'][found]
+
+    count = count.reshape((len(thresholds),) + group_shape)
+    quantiles = quantiles.reshape((len(thresholds),) + group_shape + (len(STATISTIC_COLUMNS) - 1,))
+
+    # Mean category id: the category itself, or over any category the
+    # average of category ids weighted by the specific groups' counts
+    category_ids = np.asarray(category_values, dtype=np.float64)
+    statistics = np.empty(count.shape + (len(STATISTIC_COLUMNS),))
+    statistics[..., 1:] = quantiles
+    statistics[:, :any_category, ..., 0] = category_ids[:, None, None]
+    any_counts = count[:, any_category, :, any_subcategory]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        statistics[:, any_category, :, :, 0] = (
+            count[:, :any_category, :, any_subcategory].transpose(0, 2, 1) @ category_ids / any_counts
+        )[..., None]
+    statistics[count == 0] = np.nan
+
+    other_categories = np.arange(n_categories) != tourist_attraction_code
+    count[:, other_categories, :, :any_subcategory] = -1
+
+    # Selecting every subcategory a Tourist Attraction has keeps them all,
+    # unless some attraction has no subcategory
+    covering_bits = (
+        int(np.bitwise_or.reduce(attraction_bits, initial=np.uint32(0)))
+        if np.all(attraction_bits != 0) else -1
+    )
+
+    everything = _group_quantiles(
+        np.array([0, len(reviews_count)]), np.ones(len(reviews_count), dtype=bool), reviews_count
+    )
+    return {
+        'rating_thresholds': thresholds,
+        'count': count,
+        'statistics': statistics,
+        'all_places': np.concatenate([
+            [np.mean(filter_index['category_id'])], everything['quantiles'][0]
+        ]),
+        'tourist_attraction_code': tourist_attraction_code,
+        'covering_bits': covering_bits,
+    }
+
+
+def _single_code(values: np.ndarray, selected: Optional[Sequence[Any]]) -> Optional[int]:
+    """Code of a single selected value, len(values) for no selection, None otherwise"""
+    if not selected:
+        return len(values)
+    if len(set(selected)) != 1:
+        return None
+    matches = np.flatnonzero(values == selected[0])
+    return int(matches[0]) if len(matches) else None
+
+
+def lookup_profile_statistics(
+    table: Dict[str, Any],
+    filter_index: Dict[str, Any],
+    preferences: Dict[str, Any],
+    filter_subcategories: bool = True
+) -> Optional[np.ndarray]:
+    """
+    Look up the profile statistics of the places matching preferences
+
+    Args:
+        table: Table from build_popularity_table
+        filter_index: Filter arrays the table was built from
+        preferences: User preferences dictionary
+        filter_subcategories: Whether the preference filter applies
+            subcategories
+
+    Returns:
+        Statistics (STATISTIC_COLUMNS) of the matching places, or of all
+        places when none match; None when the preferences have no group
+    """
+    thresholds = table['rating_thresholds']
+    if 'min_rating' not in preferences:
+        return None
+    t = np.flatnonzero(thresholds == preferences['min_rating'])
+    category = _single_code(filter_index['category_values'], preferences.get('categories'))
+    province = _single_code(filter_index['province_values'], preferences.get('province_ids'))
+    if len(t) == 0 or category is None or province is None:
+        return None
+
+    any_subcategory = len(filter_index['subcategory_bit'])
+    subcategory = any_subcategory
+    if preferences.get('subcategories') and filter_subcategories:
+        selected_bits = 0
+        for subcat_id in preferences['subcategories']:
+            selected_bits |= filter_index['subcategory_bit'].get(subcat_id, 0)
+        covering_bits = table['covering_bits']
+        if covering_bits >= 0 and selected_bits & covering_bits == covering_bits:
+            subcategory = any_subcategory
+        elif category != table['tourist_attraction_code']:
+            # Only Tourist Attractions are filtered by subcategory; with any
+            # category the match is a union the table does not hold
+            if category == len(filter_index['category_values']):
+                return None
+        elif selected_bits and selected_bits & (selected_bits - 1) == 0:
+            subcategory = selected_bits.bit_length() - 1
+        else:
+            return None
+
+    count = table['count'][t[0], category, province, subcategory]
+    if count < 0:
+        return None
+    if count == 0:
+        return table['all_places']
+    return table['statistics'][t[0], category, province, subcategory]
@@ -6,31 +6,107 @@ supporting both cold-start users (via preferences) and existing users
 (via place-based recommendations).
 """
 
-from cbf_recommender import CBFRecommender, load_recommender
+from cbf_recommender import CBFRecommender
+from model_artifact import DEFAULT_MODEL_PATH
+from model_registry import ModelRegistry, DEFAULT_POLL_INTERVAL
+from recommendation_cache import ResponseCache, DEFAULT_RESPONSE_TTL, preference_signature
+from recommendation_metrics import MetricsRegistry
 from user_onboarding import UserOnboarding, collect_preferences_interactive
+import threading
 import pandas as pd
-from typing import Dict, Any, Optional, Union
+from typing import Dict, Any, List, Optional, Union
+
+
+# Systems shared by the module-level helpers, keyed by model path
+_shared_systems: Dict[str, 'PlaceRecommendationSystem'] = {}
+_shared_systems_lock = threading.Lock()
 
 
 class PlaceRecommendationSystem:
     """Main recommendation system that handles both cold-start and place-based recommendations"""
     
-    def __init__(self, model_path: str = 'cbf_model.pkl'):
+    def __init__(
+        self,
+        model_path: str = DEFAULT_MODEL_PATH,
+        cache_size: int = 256,
+        hot_reload: bool = False,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        response_cache_size: int = 1024,
+        response_ttl: float = DEFAULT_RESPONSE_TTL,
+        response_cache_dir: Optional[str] = None,
+        metrics: Optional[MetricsRegistry] = None
+    ):
         """
         Initialize the recommendation system
         
         Args:
-            model_path: Path to the CBF model file
+            model_path: Path to the CBF model (published model path, artifact
+                directory or pickle)
+            cache_size: Size of the recommender's preference profile cache
+            hot_reload: Watch the model path and swap in new model versions
+            poll_interval: Seconds between model path checks when hot_reload is on
+            response_cache_size: Number of cold-start responses kept in memory
+                (0 disables the response cache)
+            response_ttl: Seconds a cached response stays valid
+            response_cache_dir: Optional directory for an on-disk response store
+            metrics: Registry receiving per-stage recommendation timings
+                (e.g. recommendation_metrics.METRICS; None disables timing)
+        """
+        self.response_cache = ResponseCache(
+            response_cache_size, response_ttl, response_cache_dir
+        )
+        self.registry = ModelRegistry(
+            model_path, cache_size, watch=hot_reload, poll_interval=poll_interval,
+            metrics=metrics
+        )
+        # Keys carry the model fingerprint, so a swap only frees the old
+        # model's slots; other workers still use the shared disk store
+        self.registry.add_swap_listener(self._on_model_swap)
+    
+    def _on_model_swap(self, recommender: CBFRecommender):
+        """Free the response cache entries of the previous model"""
+        self.response_cache.clear()
+        self.response_cache.prune_disk()
+    
+    @property
+    def recommender(self) -> CBFRecommender:
+        """Current recommender (changes when a new model version is swapped in)"""
+        return self.registry.recommender
+    
+    @property
+    def onboarding(self) -> UserOnboarding:
+        """Onboarding helper of the current recommender"""
+        return self.registry.recommender.onboarding
+    
+    def reload(self) -> bool:
+        """
+        Reload the model from disk now
+        
+        Returns:
+            True if a new recommender was swapped in
+        """
+        return self.registry.reload(force=True)
+    
+    def close(self):
+        """Stop watching the model and release it; the system cannot be used afterwards"""
+        self.registry.close()
+    
+    def model_status(self) -> Dict[str, Any]:
+        """
+        Get the loaded model version and load time
+        
+        Returns:
+            Dictionary from ModelRegistry.status()
         """
-        self.recommender = load_recommender(model_path)
-        self.onboarding = self.recommender.onboarding
+        return self.registry.status()
     
     def get_recommendations(
         self,
         user_input: Union[str, Dict[str, Any], None] = None,
         top_n: int = 10,
         min_similarity: float = 0.0,
-        use_defaults: bool = True
+        use_defaults: bool = True,
+        diversity: float = 0.0
     ) -> pd.DataFrame:
         """
         Get recommendations based on user input
@@ -43,22 +119,32 @@ class PlaceRecommendationSystem:
             top_n: Number of recommendations to return
             min_similarity: Minimum similarity threshold
             use_defaults: If True and user_input is None, use default preferences
+            diversity: Weight of diversity in the MMR re-ranking of the
+                candidates (0 keeps the similarity order)
             
         Returns:
             DataFrame with recommendations
         """
+        # One model version serves the whole request, even across a hot-swap
+        recommender = self.recommender
+        
         if user_input is None:
             if use_defaults:
                 # Use default preferences for cold-start
-                preferences = self.onboarding.get_default_preferences()
-                return self.recommender.get_recommendations_for_new_user(
-                    preferences, top_n, min_similarity
+                preferences = recommender.onboarding.get_default_preferences()
+                return self._cached_new_user_recommendations(
+                    recommender, preferences, top_n, min_similarity, diversity
                 )
             else:
                 raise ValueError("user_input cannot be None when use_defaults=False")
         
+        if isinstance(user_input, dict):
+            return self._cached_new_user_recommendations(
+                recommender, user_input, top_n, min_similarity, diversity
+            )
+        
         # Delegate to recommender
-        result = self.recommender.get_recommendations(user_input, top_n, min_similarity)
+        result = recommender.get_recommendations(user_input, top_n, min_similarity, diversity)
         
         if isinstance(result, str):
             # Error message
@@ -66,6 +152,88 @@ class PlaceRecommendationSystem:
         
         return result
     
+    def _cached_new_user_recommendations(
+        self,
+        recommender: CBFRecommender,
+        preferences: Dict[str, Any],
+        top_n: int,
+        min_similarity: float,
+        diversity: float = 0.0
+    ) -> pd.DataFrame:
+        """
+        Cold-start recommendations through the response cache
+        
+        Keyed on the canonical preference signature, top_n, min_similarity,
+        diversity and model fingerprint; concurrent identical misses are
+        computed once.
+        
+        Returns:
+            Copy of the cached DataFrame (callers may modify it); timings
+            are only attached when this call computed it
+        """
+        # Validate before the lookup: the signature ignores fields that are
+        # only checked for validity (e.g. province names)
+        is_valid, error = recommender.onboarding.validate_preferences(preferences)
+        if not is_valid:
+            raise ValueError(f"Invalid preferences: {error}")
+        
+        key = (
+            'new_user', preference_signature(preferences), int(top_n),
+            float(min_similarity), float(diversity), recommender.model_fingerprint
+        )
+        computed = []
+        
+        def compute():
+            computed.append(recommender.get_recommendations_for_new_user(
+                preferences, top_n, min_similarity, diversity
+            ))
+            return computed[0]
+        
+        recommendations = self.response_cache.get_or_compute(key, compute).copy()
+        if not computed:
+            # Served from the cache: the timings belong to another request
+            recommendations.attrs.pop('timings', None)
+        return recommendations
+    
+    def response_cache_stats(self) -> Dict[str, Any]:
+        """
+        Get response cache counters
+        
+        Returns:
+            Dictionary from ResponseCache.stats()
+        """
+        return self.response_cache.stats()
+    
+    def get_recommendations_batch(
+        self,
+        preferences_list: List[Optional[Dict[str, Any]]],
+        top_n: int = 10,
+        min_similarity: float = 0.0
+    ) -> List[Dict[str, Any]]:
+        """
+        Get cold-start recommendations for many users in one pass
+        
+        Args:
+            preferences_list: List of user preferences (None entries use
+                default preferences)
+            top_n: Number of recommendations per user
+            min_similarity: Minimum similarity threshold
+            
+        Returns:
+            List of dictionaries with 'positions' and 'scores' arrays (plus
+            'timings' when timing is enabled), one per user (see
+            CBFRecommender.get_recommendations_batch)
+        """
+        recommender = self.recommender
+        default_preferences = recommender.onboarding.get_default_preferences()
+        preferences_list = [
+            preferences if preferences is not None else default_preferences
+            for preferences in preferences_list
+        ]
+        return recommender.get_recommendations_batch(
+            preferences_list, top_n, min_similarity
+        )
+    
     def get_onboarding_questions(self) -> Dict[str, Any]:
         """
         Get the onboarding questionnaire structure
@@ -114,9 +282,66 @@ class PlaceRecommendationSystem:
         return self.onboarding.get_default_preferences()
 
 
+def get_shared_system(model_path: str = DEFAULT_MODEL_PATH) -> PlaceRecommendationSystem:
+    """
+    Get the shared recommendation system for a model path, loading it on first use
+    
+    Args:
+        model_path: Path to the CBF model
+        
+    Returns:
+        PlaceRecommendationSystem reused by every call with the same path
+    """
+    system = _shared_systems.get(model_path)
+    if system is None:
+        with _shared_systems_lock:
+            system = _shared_systems.get(model_path)
+            if system is None:
+                system = PlaceRecommendationSystem(model_path)
+                _shared_systems[model_path] = system
+    return system
+
+
+def reload_shared_system(model_path: str = DEFAULT_MODEL_PATH) -> bool:
+    """
+    Reload the model of a shared recommendation system
+    
+    Args:
+        model_path: Path to the CBF model
+        
+    Returns:
+        True if a new model was loaded (always the case on first use)
+    """
+    with _shared_systems_lock:
+        system = _shared_systems.get(model_path)
+    if system is None:
+        get_shared_system(model_path)
+        return True
+    return system.reload()
+
+
+def close_shared_systems(model_path: Optional[str] = None):
+    """
+    Close shared recommendation systems; the next call loads them again
+    
+    Args:
+        model_path: Path of the system to close (all systems if None)
+    """
+    with _shared_systems_lock:
+        if model_path is None:
+            systems = list(_shared_systems.values())
+            _shared_systems.clear()
+        else:
+            system = _shared_systems.pop(model_path, None)
+            systems = [system] if system is not None else []
+    for system in systems:
+        system.close()
+
+
 def recommend_for_new_user(
     preferences: Optional[Dict[str, Any]] = None,
-    top_n: int = 10
+    top_n: int = 10,
+    model_path: str = DEFAULT_MODEL_PATH
 ) -> pd.DataFrame:
     """
     Convenience function to get recommendations for a new user
@@ -124,22 +349,19 @@ def recommend_for_new_user(
     Args:
         preferences: User preferences dictionary (uses defaults if None)
         top_n: Number of recommendations
+        model_path: Path to the CBF model
         
     Returns:
         DataFrame with recommendations
     """
-    system = PlaceRecommendationSystem()
-    
-    if preferences is None:
-        preferences = system.get_default_preferences()
-    
-    return system.recommender.get_recommendations_for_new_user(preferences, top_n)
+    return get_shared_system(model_path).get_recommendations(preferences, top_n)
 
 
 def recommend_for_place(
     place_name: str,
     top_n: int = 10,
-    preferences: Optional[Dict[str, Any]] = None
+    preferences: Optional[Dict[str, Any]] = None,
+    model_path: str = DEFAULT_MODEL_PATH
 ) -> pd.DataFrame:
     """
     Convenience function to get recommendations based on a place
@@ -148,12 +370,12 @@ def recommend_for_place(
         place_name: Name of the place
         top_n: Number of recommendations
         preferences: Optional user preferences to filter results
+        model_path: Path to the CBF model
         
     Returns:
         DataFrame with recommendations
     """
-    system = PlaceRecommendationSystem()
-    result = system.recommender.get_recommendations_for_place(
+    result = get_shared_system(model_path).recommender.get_recommendations_for_place(
         place_name, top_n, preferences=preferences
     )
     
@@ -168,8 +390,8 @@ if __name__ == "__main__":
     print("PLACE RECOMMENDATION SYSTEM")
     print("=" * 60)
     
-    # Initialize system
-    system = PlaceRecommendationSystem()
+    # Initialize system (shared with the convenience functions below)
+    system = get_shared_system()
     
     # Example 1: Cold-start with default preferences
     print("\n[Example 1] Recommendations for new user (default preferences):")
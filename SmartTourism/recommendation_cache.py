@@ -0,0 +1,337 @@
+"""
+Recommendation Cache Module
+
+This module provides the small in-process caches used on the
+recommendation path, keyed by a canonical signature of user preferences:
+an LRU cache for preference profiles and a TTL response cache with
+single-flight misses and an optional on-disk store.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Hashable, Callable
+
+
+DEFAULT_RESPONSE_TTL = 300.0
+
+
+def preference_signature(preferences: Dict[str, Any]) -> str:
+    """
+    Build a canonical hash of the preference fields that affect recommendations
+
+    Equivalent preferences (different list order, duplicates, None vs empty
+    list, province names vs IDs) map to the same signature.
+
+    Args:
+        preferences: User preferences dictionary
+
+    Returns:
+        Hex digest identifying the preferences
+    """
+    def _sorted_unique(values):
+        return sorted(set(values), key=str) if values else []
+
+    canonical = {
+        'categories': _sorted_unique(preferences.get('categories')),
+        'subcategories': _sorted_unique(preferences.get('subcategories')),
+        'min_rating': (
+            float(preferences['min_rating']) if preferences.get('min_rating') is not None else None
+        ),
+        'popularity_preference': preferences.get('popularity_preference', 'balanced'),
+        'province_ids': _sorted_unique(preferences.get('province_ids')),
+    }
+    payload = json.dumps(canonical, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class LRUCache:
+    """Thread-safe bounded LRU cache with hit/miss/eviction counters"""
+
+    def __init__(self, maxsize: int = 256):
+        """
+        Initialize the cache
+
+        Args:
+            maxsize: Maximum number of entries (0 disables caching)
+        """
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Look up a key, marking it as most recently used
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached value, or None on a miss
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value: Any):
+        """
+        Store a value, evicting the least recently used entry if full
+
+        Args:
+            key: Cache key
+            value: Value to store
+        """
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop all entries (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get cache counters
+
+        Returns:
+            Dictionary with hits, misses, evictions, size and maxsize
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+            }
+
+
+class _Flight:
+    """A computation other threads can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class ResponseCache:
+    """
+    Thread-safe TTL + LRU cache for recommendation responses
+
+    Concurrent misses for the same key are computed once (single-flight):
+    the first caller computes, the others wait for its result. With a
+    disk_dir, entries are also pickled to disk so they survive restarts
+    and can be shared by worker processes on the same host.
+
+    Keys should identify the model that computed the response (e.g. the
+    model registry's fingerprint), so responses of an old model are never
+    served after a hot-swap, even by a request that started before it. On
+    swap, clear() frees the in-memory slots; the disk store is shared by
+    other workers, so only its expired entries are removed (prune_disk()).
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: float = DEFAULT_RESPONSE_TTL,
+        disk_dir: Optional[str] = None
+    ):
+        """
+        Initialize the cache
+
+        Args:
+            maxsize: Maximum number of in-memory entries (0 disables caching)
+            ttl: Seconds an entry stays valid
+            disk_dir: Directory of the on-disk store (None for memory only)
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.disk_dir = disk_dir
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+        self._entries = OrderedDict()
+        self._inflight: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.coalesced = 0
+        self.expirations = 0
+        self.evictions = 0
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for a key, computing it once on a miss
+
+        Args:
+            key: Cache key (hashable; must have a stable repr for the disk store)
+            compute: Function producing the value on a miss
+
+        Returns:
+            Cached or freshly computed value
+        """
+        if self.maxsize <= 0:
+            return compute()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+                self.expirations += 1
+
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._inflight[key] = flight
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            value = self._disk_get(key)
+            if value is None:
+                value = compute()
+                self._disk_put(key, value)
+            flight.value = value
+            self._store(key, value)
+            return value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.done.set()
+
+    def _store(self, key: Hashable, value: Any):
+        """Store a value in memory, evicting least recently used entries if full"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _disk_path(self, key: Hashable) -> str:
+        digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.disk_dir, f"{digest}.pkl")
+
+    def _disk_get(self, key: Hashable) -> Optional[Any]:
+        """Load an unexpired entry from the on-disk store"""
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, 'rb') as f:
+                expires_at, stored_key, value = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # Truncated or incompatible entry: treat as a miss
+            return None
+        if stored_key != key or expires_at <= time.time():
+            return None
+        with self._lock:
+            self.disk_hits += 1
+        return value
+
+    def _disk_put(self, key: Hashable, value: Any):
+        """Write an entry to the on-disk store (atomically, via rename)"""
+        if not self.disk_dir:
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=self.disk_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump((time.time() + self.ttl, key, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._disk_path(key))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def clear(self):
+        """Drop all in-memory entries (the shared disk store and counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+
+    def prune_disk(self) -> int:
+        """
+        Remove expired entries from the on-disk store
+
+        An entry file is expired once its last write is older than the TTL,
+        so entries other workers still use are kept.
+
+        Returns:
+            Number of removed entries
+        """
+        if not self.disk_dir:
+            return 0
+        removed = 0
+        expired_before = time.time() - self.ttl
+        for path in glob.glob(os.path.join(self.disk_dir, '*.pkl')):
+            try:
+                if os.path.getmtime(path) <= expired_before:
+                    os.remove(path)
+                    removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache counters
+
+        Returns:
+            Dictionary with hits, disk_hits, misses, coalesced (misses that
+            waited for another caller), expirations, evictions, size,
+            maxsize and ttl
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'expirations': self.expirations,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+            }
@@ -0,0 +1,218 @@
+"""
+Recommendation Export Module
+
+This module streams recommendations as CSV or NDJSON text straight from
+top-N place id and score arrays. Place columns are gathered from the
+model's column arrays one block of rows at a time, so no DataFrame (or
+copy of one) is built, and memory stays bounded for large batch exports.
+
+The same generators back the Streamlit download buttons
+(CBFRecommender.iter_export_rows) and batch jobs for partners:
+
+    python recommendation_export.py users.ndjson --top-n 100 --format ndjson --output recs.ndjson
+
+Each line of the input file holds one user's onboarding answers (the
+arguments of create_preferences_from_answers, plus an optional user_id);
+empty lines and null use the default preferences.
+"""
+
+import csv
+import io
+import json
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+
+EXPORT_FORMATS = ('csv', 'ndjson')
+
+# Rows formatted per yielded block of text
+DEFAULT_EXPORT_CHUNK_ROWS = 4096
+
+# Users scored per get_recommendations_batch call by the batch job
+DEFAULT_EXPORT_BATCH_USERS = 1024
+
+# Characters replaced in download file names (whitespace, path separators
+# and characters Windows rejects)
+_UNSAFE_FILE_NAME_CHARS = re.compile(r'[\s/\\:*?"<>|\x00-\x1f]+')
+
+
+def iter_export_rows(
+    place_columns: Dict[str, np.ndarray],
+    positions: np.ndarray,
+    row_columns: Optional[Dict[str, np.ndarray]] = None,
+    columns: Optional[List[str]] = None,
+    output_format: str = 'csv',
+    header: bool = True,
+    chunk_rows: int = DEFAULT_EXPORT_CHUNK_ROWS
+) -> Iterator[str]:
+    """
+    Stream export rows as CSV or NDJSON text
+
+    Args:
+        place_columns: Column arrays over the whole catalog (row = place id)
+        positions: Place ids of the exported rows
+        row_columns: Column arrays aligned with positions (e.g. scores)
+        columns: Output column order (defaults to place_columns then
+            row_columns)
+        output_format: 'csv' or 'ndjson'
+        header: Whether to start CSV output with a header line
+        chunk_rows: Rows formatted per yielded block
+
+    Returns:
+        Iterator over blocks of complete lines (newline-terminated)
+    """
+    if output_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{output_format}' (expected one of {EXPORT_FORMATS})")
+    row_columns = row_columns or {}
+    if columns is None:
+        columns = list(place_columns) + list(row_columns)
+    positions = np.asarray(positions)
+
+    if output_format == 'csv' and header:
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator='\n').writerow(columns)
+        yield buffer.getvalue()
+
+    for start in range(0, len(positions), max(1, chunk_rows)):
+        stop = min(start + chunk_rows, len(positions))
+        block = positions[start:stop]
+        values = [
+            np.asarray(row_columns[column][start:stop]).tolist() if column in row_columns
+            else np.asarray(place_columns[column])[block].tolist()
+            for column in columns
+        ]
+
+        if output_format == 'csv':
+            buffer = io.StringIO()
+            csv.writer(buffer, lineterminator='\n').writerows(zip(*values))
+            yield buffer.getvalue()
+        else:
+            yield ''.join(
+                json.dumps(dict(zip(columns, row)), ensure_ascii=False) + '\n'
+                for row in zip(*values)
+            )
+
+
+def batch_row_columns(
+    results: List[Dict[str, np.ndarray]],
+    user_ids: Optional[Iterable[Any]] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Flatten get_recommendations_batch results into row-aligned arrays
+
+    Args:
+        results: Per-user dictionaries with 'positions' and 'scores'
+        user_ids: Optional id per user (defaults to the user's index)
+
+    Returns:
+        Dictionary with 'positions', 'user_id', 'rank' (1 = best) and
+        'similarity_score' arrays, one entry per exported row
+    """
+    lengths = np.array([len(result['positions']) for result in results], dtype=np.int64)
+    user_ids = np.arange(len(results)) if user_ids is None else np.array(list(user_ids), dtype=object)
+    ends = np.cumsum(lengths)
+    return {
+        'positions': np.concatenate(
+            [result['positions'] for result in results] + [np.empty(0, dtype=np.int64)]
+        ).astype(np.int64),
+        'user_id': np.repeat(user_ids, lengths),
+        'rank': np.arange(int(ends[-1]) if len(ends) else 0) - np.repeat(ends - lengths, lengths) + 1,
+        'similarity_score': np.concatenate(
+            [result['scores'] for result in results] + [np.empty(0, dtype=np.float32)]
+        ).astype(np.float64),
+    }
+
+
+def safe_file_stem(text: str, default: str = 'recommendations') -> str:
+    """
+    Turn a place or scenario name into a file name stem
+
+    Args:
+        text: Name to convert (non-ASCII letters are kept)
+        default: Stem used when nothing usable is left
+
+    Returns:
+        The name with runs of unsafe characters replaced by '_'
+    """
+    stem = _UNSAFE_FILE_NAME_CHARS.sub('_', str(text)).strip('._')
+    return stem or default
+
+
+def similar_places_file_name(place_names: Any, place_id: int) -> str:
+    """
+    File name of a similar-places download
+
+    Args:
+        place_names: Place names indexed by place id (a Series or array)
+        place_id: Id of the place the recommendations are similar to
+
+    Returns:
+        File name such as 'similar_to_Angkor_Wat.csv'
+    """
+    return f"similar_to_{safe_file_stem(place_names[place_id], default='place')}.csv"
+
+
+def read_answers(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield the onboarding answers on each line of an NDJSON file (None for defaults)"""
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            yield json.loads(line) if line else None
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    import time
+    from contextlib import redirect_stdout
+    from itertools import islice
+
+    from model_artifact import DEFAULT_MODEL_PATH
+    from recommend_places import PlaceRecommendationSystem
+
+    parser = argparse.ArgumentParser(description="Export cold-start recommendations for many users as CSV or NDJSON")
+    parser.add_argument('answers', help="NDJSON file with one user's onboarding answers per line")
+    parser.add_argument('--model-path', default=DEFAULT_MODEL_PATH)
+    parser.add_argument('--top-n', type=int, default=10)
+    parser.add_argument('--min-similarity', type=float, default=0.0)
+    parser.add_argument('--format', choices=EXPORT_FORMATS, default='csv')
+    parser.add_argument('--output', default='-', help="Output file ('-' for stdout)")
+    parser.add_argument('--batch-users', type=int, default=DEFAULT_EXPORT_BATCH_USERS)
+    args = parser.parse_args()
+
+    # Keep load messages out of exports written to stdout
+    with redirect_stdout(sys.stderr):
+        system = PlaceRecommendationSystem(args.model_path)
+    start = time.perf_counter()
+    n_users = n_rows = 0
+    output = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8', newline='')
+    try:
+        answers = read_answers(args.answers)
+        while True:
+            batch = list(islice(answers, args.batch_users))
+            if not batch:
+                break
+            user_ids = []
+            preferences_list = []
+            for offset, user_answers in enumerate(batch):
+                user_answers = dict(user_answers or {})
+                user_ids.append(user_answers.pop('user_id', n_users + offset))
+                preferences_list.append(
+                    system.create_preferences_from_answers(**user_answers) if user_answers else None
+                )
+
+            results = system.get_recommendations_batch(preferences_list, args.top_n, args.min_similarity)
+            for block in system.recommender.iter_batch_export_rows(
+                results, user_ids, args.format, header=n_users == 0
+            ):
+                output.write(block)
+            n_users += len(batch)
+            n_rows += sum(len(result['positions']) for result in results)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    print(f"✓ Exported {n_rows:,} recommendations for {n_users:,} users "
+          f"in {time.perf_counter() - start:.2f}s", file=sys.stderr)
@@ -0,0 +1,270 @@
+"""
+Recommendation Metrics Module
+
+This module provides the per-stage latency instrumentation of
+CBFRecommender: a stage timer threaded through each recommendation call,
+and a thread-safe metrics registry that turns the timings into
+histograms, keeps the breakdowns of the last requests, and renders
+everything in the Prometheus text exposition format.
+
+Timing is off unless the recommender is given a registry; it then uses
+NULL_TIMER, whose laps do nothing. Stage names are:
+
+    validate   preference validation
+    filter     candidate selection (or the profile cache lookup)
+    profile    profile vector (profile cache misses only)
+    geo        radius query (nearby recommendations)
+    neighbors  precomputed neighbour table (place recommendations)
+    search     similarity scoring and top-N selection
+    rerank     diversity re-ranking (when diversity > 0)
+    frame      DataFrame of the recommended places
+"""
+
+import bisect
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+
+# Upper bounds (seconds) of the latency histogram buckets
+DEFAULT_LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5
+)
+
+# Number of request breakdowns kept for display
+DEFAULT_RECENT_REQUESTS = 50
+
+STAGE_METRIC = 'recommendation_stage_seconds'
+REQUEST_METRIC = 'recommendation_request_seconds'
+
+_METRIC_HELP = {
+    STAGE_METRIC: 'Time spent in each stage of a recommendation request',
+    REQUEST_METRIC: 'Total time of a recommendation request',
+}
+
+
+class StageTimer:
+    """Accumulates the wall time between consecutive laps of one request"""
+
+    __slots__ = ('timings', '_last')
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+        self._last = time.perf_counter()
+
+    def lap(self, stage: str):
+        """
+        Charge the time since the previous lap (or the start) to a stage
+
+        Args:
+            stage: Stage name; repeated laps of a stage add up
+        """
+        now = time.perf_counter()
+        self.timings[stage] = self.timings.get(stage, 0.0) + now - self._last
+        self._last = now
+
+
+class _NullTimer:
+    """Stage timer used when timing is disabled"""
+
+    __slots__ = ()
+
+    def lap(self, stage: str):
+        pass
+
+
+NULL_TIMER = _NullTimer()
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense (not thread-safe)"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        """
+        Initialize an empty histogram
+
+        Args:
+            buckets: Upper bounds of the buckets (a +Inf bucket is added)
+        """
+        self.buckets = tuple(sorted(buckets))
+        self.bucket_counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        """Add one observation"""
+        self.bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative_counts(self) -> List[int]:
+        """Observations less than or equal to each bound, +Inf last"""
+        counts, total = [], 0
+        for bucket_count in self.bucket_counts:
+            total += bucket_count
+            counts.append(total)
+        return counts
+
+
+def _label_text(labels: Tuple[Tuple[str, str], ...]) -> str:
+    """Render labels as {name="value",...} with Prometheus escaping"""
+    if not labels:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(
+            name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        )
+        for name, value in labels
+    )
+    return '{' + pairs + '}'
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != float('inf') else '+Inf'
+
+
+class MetricsRegistry:
+    """Thread-safe store of latency histograms and recent request breakdowns"""
+
+    def __init__(
+        self,
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+        recent_requests: int = DEFAULT_RECENT_REQUESTS
+    ):
+        """
+        Initialize an empty registry
+
+        Args:
+            buckets: Upper bounds (seconds) of the histogram buckets
+            recent_requests: Number of request breakdowns kept by recent()
+        """
+        self.buckets = tuple(sorted(buckets))
+        self._histograms: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], Histogram] = {}
+        self._recent = deque(maxlen=recent_requests)
+        self._lock = threading.Lock()
+
+    def timer(self) -> StageTimer:
+        """Start timing a request"""
+        return StageTimer()
+
+    def observe(self, name: str, value: float, **labels: str):
+        """
+        Add one observation to the histogram of a metric and label set
+
+        Args:
+            name: Metric name
+            value: Observed value (seconds for latency metrics)
+            **labels: Label values identifying the series
+        """
+        with self._lock:
+            self._observe_locked(name, value, tuple(sorted(labels.items())))
+
+    def record_request(self, method: str, timer: StageTimer) -> Dict[str, float]:
+        """
+        Record the stage timings of a finished request
+
+        Args:
+            method: Recommendation method ('new_user', 'place', 'nearby', 'batch')
+            timer: Timer whose laps covered the request
+
+        Returns:
+            Stage timings in milliseconds, plus 'total_ms'
+        """
+        stage_seconds = dict(timer.timings)
+        total = sum(stage_seconds.values())
+        timings = {f'{stage}_ms': seconds * 1000 for stage, seconds in stage_seconds.items()}
+        timings['total_ms'] = total * 1000
+
+        with self._lock:
+            for stage, seconds in stage_seconds.items():
+                self._observe_locked(STAGE_METRIC, seconds, (('method', method), ('stage', stage)))
+            self._observe_locked(REQUEST_METRIC, total, (('method', method),))
+            self._recent.append({'time': time.time(), 'method': method, 'timings': timings})
+        return timings
+
+    def _observe_locked(self, name: str, value: float, labels: Tuple[Tuple[str, str], ...]):
+        """Add an observation; the caller holds the lock"""
+        key = (name, labels)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = Histogram(self.buckets)
+        histogram.observe(value)
+
+    def recent(self, n: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Get the breakdowns of the last requests, newest first
+
+        Args:
+            n: Maximum number of requests (all kept ones if None)
+
+        Returns:
+            List of dictionaries with 'time' (epoch seconds), 'method' and
+            'timings' (milliseconds per stage, plus 'total_ms')
+        """
+        with self._lock:
+            recent = list(self._recent)
+        recent.reverse()
+        return recent if n is None else recent[:n]
+
+    def summary(self, name: str = STAGE_METRIC) -> List[Dict[str, Any]]:
+        """
+        Get count, total and mean of each series of a metric
+
+        Args:
+            name: Metric name
+
+        Returns:
+            List of dictionaries with the series labels plus 'count',
+            'sum' (seconds) and 'mean_ms'
+        """
+        with self._lock:
+            series = [
+                (dict(labels), histogram.count, histogram.sum)
+                for (metric, labels), histogram in sorted(self._histograms.items())
+                if metric == name
+            ]
+        return [
+            {**labels, 'count': count, 'sum': total, 'mean_ms': total / count * 1000 if count else 0.0}
+            for labels, count, total in series
+        ]
+
+    def clear(self):
+        """Drop all observations and recent breakdowns"""
+        with self._lock:
+            self._histograms.clear()
+            self._recent.clear()
+
+    def render_prometheus(self) -> str:
+        """
+        Render all histograms in the Prometheus text exposition format
+
+        Returns:
+            Text for a /metrics endpoint (content type
+            'text/plain; version=0.0.4')
+        """
+        with self._lock:
+            series = [
+                (name, labels, list(histogram.buckets), histogram.cumulative_counts(),
+                 histogram.sum, histogram.count)
+                for (name, labels), histogram in sorted(self._histograms.items())
+            ]
+
+        lines = []
+        current = None
+        for name, labels, buckets, counts, total, count in series:
+            if name != current:
+                current = name
+                lines.append(f'# HELP {name} {_METRIC_HELP.get(name, name)}')
+                lines.append(f'# TYPE {name} histogram')
+            for bound, cumulative in zip(buckets + [float('inf')], counts):
+                bucket_labels = labels + (('le', _format_value(bound)),)
+                lines.append(f'{name}_bucket{_label_text(bucket_labels)} {cumulative}')
+            lines.append(f'{name}_sum{_label_text(labels)} {_format_value(total)}')
+            lines.append(f'{name}_count{_label_text(labels)} {count}')
+        return '\n'.join(lines) + '\n' if lines else ''
+
+
+# Registry shared by the recommenders of a process when timing is enabled
+METRICS = MetricsRegistry()
@@ -0,0 +1,547 @@
+"""
+Sparse Feature Module
+
+This module provides the sparse CBF feature space, an alternative to the
+three dense columns (category_id, ratings, reviews_count):
+
+    category one-hot            one column per category_id
+    province one-hot            one column per province_id
+    ratings                     min-max scaled
+    log reviews                 log1p(reviews_count), min-max scaled
+    name tokens                 hashed TF-IDF of the place name
+
+Each block is weighted and every row is L2-normalized at build time, so
+cosine similarity is a sparse dot product. Feature matrices are kept as
+plain CSR arrays (data, indices, indptr) so they are memory-mapped from the
+model artifact like the dense arrays; no scipy is needed at query time.
+
+Queries are scored column by column: a profile vector has a handful of
+non-zero columns and only those are read (frequent columns as dense
+arrays, the rest as short posting lists), so a query costs about as much
+as a dense scan of the few columns it touches.
+"""
+
+import re
+import zlib
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from neighbor_index import select_top_n
+
+
+# Arrays persisted with the model for the sparse feature space
+SPARSE_ARRAY_KEYS = ('sparse_data', 'sparse_indices', 'sparse_indptr', 'sparse_idf')
+
+DEFAULT_HASH_FEATURES = 1 << 12
+
+# Weight of each feature block before rows are L2-normalized
+DEFAULT_BLOCK_WEIGHTS = {
+    'category': 1.0,
+    'province': 0.5,
+    'ratings': 1.0,
+    'reviews': 1.0,
+    'text': 0.5,
+}
+
+# Words, including Khmer script (whose vowel signs are not \w)
+_TOKEN_PATTERN = re.compile(r'[\w\u1780-\u17ff]+')
+
+# Token columns scored densely while building neighbour lists: at most this
+# many, and only tokens found in more than 1/_DENSE_TOKEN_DF_DIVISOR of places
+_MAX_DENSE_TOKENS = 128
+_DENSE_TOKEN_DF_DIVISOR = 512
+
+# Columns held by at least 1/_HOT_COLUMN_DIVISOR of places are scored as
+# dense arrays at query time
+_HOT_COLUMN_DIVISOR = 16
+
+# Bytes per scored pair while building neighbour lists
+_BYTES_PER_SCORE = 16
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split a place name (or keyword) into lowercase tokens
+
+    Args:
+        text: Place name
+
+    Returns:
+        List of tokens
+    """
+    return _TOKEN_PATTERN.findall(str(text).lower())
+
+
+def hash_token(token: str, n_hash: int) -> int:
+    """Stable hash bucket of a token (independent of PYTHONHASHSEED)"""
+    return zlib.crc32(token.encode('utf-8')) % n_hash
+
+
+def _hashed_token_counts(texts: Iterable[str], n_hash: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Hashed token counts of several texts
+
+    Returns:
+        Tuple of (row, column, count) arrays, one entry per distinct
+        (text, bucket) pair, sorted by row then column
+    """
+    rows = []
+    columns = []
+    for row, text in enumerate(texts):
+        buckets = [hash_token(token, n_hash) for token in tokenize(text)]
+        rows.extend([row] * len(buckets))
+        columns.extend(buckets)
+
+    keys = np.asarray(rows, dtype=np.int64) * n_hash + np.asarray(columns, dtype=np.int64)
+    keys, counts = np.unique(keys, return_counts=True)
+    return keys // n_hash, keys % n_hash, counts.astype(np.float32)
+
+
+def _posting_lists(
+    rows: np.ndarray,
+    columns: np.ndarray,
+    values: np.ndarray,
+    n_features: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Column posting lists (CSC) of sparse entries
+
+    Returns:
+        Tuple of (offsets, rows, values); column j's entries are at
+        offsets[j]:offsets[j + 1], rows ascending within a column
+    """
+    order = np.argsort(columns, kind='stable')
+    offsets = np.zeros(n_features + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(np.bincount(columns, minlength=n_features))
+    return offsets, rows[order], values[order]
+
+
+def _min_max(values: np.ndarray, value_range: Tuple[float, float]) -> np.ndarray:
+    """Scale values to [0, 1] with a fitted (min, max) range"""
+    low, high = value_range
+    if high <= low:
+        return np.zeros(len(values), dtype=np.float32)
+    return ((np.asarray(values, dtype=np.float64) - low) / (high - low)).astype(np.float32)
+
+
+class SparseFeatureSpace:
+    """Vocabulary and scaling of the sparse feature space"""
+
+    def __init__(
+        self,
+        category_values: List[int],
+        province_values: List[int],
+        ratings_range: Tuple[float, float],
+        reviews_range: Tuple[float, float],
+        idf: np.ndarray,
+        weights: Optional[Dict[str, float]] = None
+    ):
+        """
+        Initialize the feature space
+
+        Args:
+            category_values: category_id of each category column
+            province_values: province_id of each province column
+            ratings_range: Fitted (min, max) of ratings
+            reviews_range: Fitted (min, max) of log1p(reviews_count)
+            idf: Inverse document frequency of each token bucket
+            weights: Block weights (defaults to DEFAULT_BLOCK_WEIGHTS)
+        """
+        self.category_values = [int(value) for value in category_values]
+        self.province_values = [int(value) for value in province_values]
+        self.ratings_range = tuple(float(value) for value in ratings_range)
+        self.reviews_range = tuple(float(value) for value in reviews_range)
+        self.idf = np.asarray(idf, dtype=np.float32)
+        self.weights = dict(DEFAULT_BLOCK_WEIGHTS, **(weights or {}))
+
+        self._category_index = pd.Index(self.category_values)
+        self._province_index = pd.Index(self.province_values)
+        self.province_offset = len(self.category_values)
+        self.ratings_column = self.province_offset + len(self.province_values)
+        self.reviews_column = self.ratings_column + 1
+        self.text_offset = self.reviews_column + 1
+        self.n_features = self.text_offset + self.n_hash
+
+    @property
+    def n_hash(self) -> int:
+        return len(self.idf)
+
+    @classmethod
+    def fit(
+        cls,
+        places_data: pd.DataFrame,
+        n_hash: int = DEFAULT_HASH_FEATURES,
+        weights: Optional[Dict[str, float]] = None
+    ) -> 'SparseFeatureSpace':
+        """
+        Fit the vocabulary, scaling ranges and token IDF on a catalog
+
+        Args:
+            places_data: Places with category_id, province_id, ratings,
+                reviews_count and name columns
+            n_hash: Number of token hash buckets
+            weights: Block weights (defaults to DEFAULT_BLOCK_WEIGHTS)
+
+        Returns:
+            Fitted SparseFeatureSpace
+        """
+        ratings = places_data['ratings'].to_numpy(dtype=np.float64)
+        log_reviews = np.log1p(places_data['reviews_count'].to_numpy(dtype=np.float64))
+
+        _, columns, _ = _hashed_token_counts(places_data['name'], n_hash)
+        document_frequency = np.bincount(columns, minlength=n_hash)
+        n_places = len(places_data)
+        idf = np.log((1 + n_places) / (1 + document_frequency)) + 1
+
+        return cls(
+            category_values=np.unique(places_data['category_id'].to_numpy()).tolist(),
+            province_values=np.unique(places_data['province_id'].to_numpy()).tolist(),
+            ratings_range=(ratings.min(), ratings.max()) if n_places else (0.0, 0.0),
+            reviews_range=(log_reviews.min(), log_reviews.max()) if n_places else (0.0, 0.0),
+            idf=idf,
+            weights=weights,
+        )
+
+    @classmethod
+    def from_header(cls, spec: Dict[str, Any], idf: np.ndarray) -> 'SparseFeatureSpace':
+        """Rebuild a feature space from its artifact header entry and IDF array"""
+        return cls(
+            spec['category_values'], spec['province_values'], spec['ratings_range'],
+            spec['reviews_range'], idf, spec.get('weights')
+        )
+
+    def to_header(self) -> Dict[str, Any]:
+        """Artifact header entry (the IDF array is stored as sparse_idf)"""
+        return {
+            'type': 'sparse',
+            'category_values': self.category_values,
+            'province_values': self.province_values,
+            'ratings_range': list(self.ratings_range),
+            'reviews_range': list(self.reviews_range),
+            'n_hash': self.n_hash,
+            'weights': self.weights,
+        }
+
+    def _text_block(self, texts: Iterable[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """TF-IDF token entries of texts, L2-normalized per text and weighted"""
+        rows, buckets, counts = _hashed_token_counts(texts, self.n_hash)
+        values = counts * self.idf[buckets]
+        norms = np.sqrt(np.bincount(rows, weights=values.astype(np.float64) ** 2))
+        values = values / norms[rows] * self.weights['text']
+        return rows, buckets + self.text_offset, values.astype(np.float32)
+
+    def transform(self, places_data: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Compute the L2-normalized sparse feature rows of places
+
+        The ratings and review columns are stored for every place, even
+        when zero, so they can be scored as contiguous columns.
+
+        Args:
+            places_data: Places with the columns used by fit()
+
+        Returns:
+            CSR arrays (data float32, indices int32, indptr int64)
+        """
+        n_places = len(places_data)
+        places = np.arange(n_places)
+        blocks = []
+
+        category_codes = self._category_index.get_indexer(places_data['category_id'].to_numpy())
+        known = category_codes >= 0
+        blocks.append((places[known], category_codes[known],
+                       np.full(known.sum(), self.weights['category'], dtype=np.float32)))
+
+        province_codes = self._province_index.get_indexer(places_data['province_id'].to_numpy())
+        known = province_codes >= 0
+        blocks.append((places[known], self.province_offset + province_codes[known],
+                       np.full(known.sum(), self.weights['province'], dtype=np.float32)))
+
+        ratings = _min_max(places_data['ratings'].to_numpy(), self.ratings_range)
+        blocks.append((places, np.full(n_places, self.ratings_column), ratings * self.weights['ratings']))
+        log_reviews = _min_max(np.log1p(places_data['reviews_count'].to_numpy(dtype=np.float64)),
+                               self.reviews_range)
+        blocks.append((places, np.full(n_places, self.reviews_column), log_reviews * self.weights['reviews']))
+
+        blocks.append(self._text_block(places_data['name']))
+
+        rows = np.concatenate([block[0] for block in blocks])
+        columns = np.concatenate([block[1] for block in blocks])
+        values = np.concatenate([block[2] for block in blocks]).astype(np.float32)
+
+        order = np.lexsort((columns, rows))
+        rows, columns, values = rows[order], columns[order], values[order]
+        norms = np.sqrt(np.bincount(rows, weights=values.astype(np.float64) ** 2, minlength=n_places))
+        norms[norms == 0] = 1.0
+        values = (values / norms[rows]).astype(np.float32)
+
+        indptr = np.zeros(n_places + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum(np.bincount(rows, minlength=n_places))
+        return values, columns.astype(np.int32), indptr
+
+    def profile_vector(
+        self,
+        category_ids: np.ndarray,
+        province_ids: Optional[List[int]],
+        rating: float,
+        reviews_count: float,
+        keywords: Iterable[str] = ()
+    ) -> np.ndarray:
+        """
+        Build a (not yet normalized) user profile vector in this space
+
+        Args:
+            category_ids: Selected category ids, or the category ids of the
+                candidate places (their mix becomes the category profile)
+            province_ids: Selected province ids (None for no preference)
+            rating: Profile rating
+            reviews_count: Profile review count
+            keywords: Subcategory keywords matched against name tokens
+
+        Returns:
+            Profile vector with shape (1, n_features)
+        """
+        vector = np.zeros(self.n_features, dtype=np.float64)
+
+        codes = self._category_index.get_indexer(np.asarray(category_ids).reshape(-1))
+        codes = codes[codes >= 0]
+        if len(codes):
+            shares = np.bincount(codes, minlength=len(self.category_values)) / len(codes)
+            vector[:self.province_offset] = shares * self.weights['category']
+
+        if province_ids:
+            codes = self._province_index.get_indexer(np.asarray(province_ids).reshape(-1))
+            codes = codes[codes >= 0]
+            if len(codes):
+                shares = np.bincount(codes, minlength=len(self.province_values)) / len(codes)
+                vector[self.province_offset:self.ratings_column] = shares * self.weights['province']
+
+        vector[self.ratings_column] = _min_max(np.array([rating]), self.ratings_range)[0] * self.weights['ratings']
+        vector[self.reviews_column] = _min_max(
+            np.log1p(np.array([max(float(reviews_count), 0.0)])), self.reviews_range
+        )[0] * self.weights['reviews']
+
+        keyword_text = ' '.join(keywords)
+        if keyword_text.strip():
+            _, columns, values = self._text_block([keyword_text])
+            np.add.at(vector, columns, values)
+
+        return vector.reshape(1, -1)
+
+
+class SparseIndex:
+    """Exact cosine search over sparse feature rows, scored by column"""
+
+    index_type = 'sparse'
+    exact = True
+
+    def __init__(self, data: np.ndarray, indices: np.ndarray, indptr: np.ndarray, n_features: int):
+        """
+        Initialize the index
+
+        Columns held by many places (numeric, category, frequent tokens)
+        are kept as dense contiguous arrays; the others as posting lists.
+
+        Args:
+            data: CSR values (L2-normalized rows)
+            indices: CSR column indices
+            indptr: CSR row offsets
+            n_features: Number of columns
+        """
+        self.data = data
+        self.indices = indices
+        self.indptr = indptr
+        self.n_places = len(indptr) - 1
+        self.n_features = n_features
+
+        row_of_entry = np.repeat(np.arange(self.n_places, dtype=np.int32), np.diff(indptr))
+        column_sizes = np.bincount(indices, minlength=n_features)
+        hot_columns = np.flatnonzero(column_sizes >= max(1, self.n_places // _HOT_COLUMN_DIVISOR))
+        self.hot_slot = np.full(n_features, -1, dtype=np.int64)
+        self.hot_slot[hot_columns] = np.arange(len(hot_columns))
+        slots = self.hot_slot[indices]
+        hot = slots >= 0
+        self.hot_values = np.zeros((len(hot_columns), self.n_places), dtype=np.float32)
+        self.hot_values[slots[hot], row_of_entry[hot]] = np.asarray(data)[hot]
+
+        # Posting lists of the other columns
+        self.column_offsets, self.column_rows, self.column_values = _posting_lists(
+            row_of_entry[~hot], indices[~hot], np.asarray(data)[~hot], n_features
+        )
+
+    def row_vector(self, place_id: int) -> np.ndarray:
+        """Dense feature vector of one place"""
+        start, stop = self.indptr[place_id], self.indptr[place_id + 1]
+        vector = np.zeros(self.n_features, dtype=np.float32)
+        vector[self.indices[start:stop]] = self.data[start:stop]
+        return vector
+
+    def row_vectors(self, place_ids: np.ndarray) -> np.ndarray:
+        """
+        Dense feature vectors of several places over the columns they use
+
+        Columns that are zero for all the places are dropped, so dot
+        products between the rows equal those of the full vectors.
+
+        Args:
+            place_ids: Place ids
+
+        Returns:
+            float32 matrix with one row per place id
+        """
+        place_ids = np.asarray(place_ids, dtype=np.int64)
+        starts, stops = self.indptr[place_ids], self.indptr[place_ids + 1]
+        lengths = stops - starts
+        entries = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        columns, slots = np.unique(self.indices[entries], return_inverse=True)
+        vectors = np.zeros((len(place_ids), len(columns)), dtype=np.float32)
+        vectors[np.repeat(np.arange(len(place_ids)), lengths), slots] = self.data[entries]
+        return vectors
+
+    def scores(self, query: np.ndarray, candidates: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Cosine scores of every (candidate) place for a query
+
+        Args:
+            query: L2-normalized dense query vector
+            candidates: Optional place ids to score
+
+        Returns:
+            float32 scores aligned with place ids (or with candidates)
+        """
+        n_scores = self.n_places if candidates is None else len(candidates)
+        scores = np.zeros(n_scores, dtype=np.float32)
+        posting_scores = scores if candidates is None else None
+        for column in np.flatnonzero(query):
+            weight = np.float32(query[column])
+            slot = self.hot_slot[column]
+            if slot >= 0:
+                values = self.hot_values[slot]
+                scores += weight * (values if candidates is None else values[candidates])
+                continue
+
+            start, stop = self.column_offsets[column], self.column_offsets[column + 1]
+            if stop > start:
+                if posting_scores is None:
+                    posting_scores = np.zeros(self.n_places, dtype=np.float32)
+                posting_scores[self.column_rows[start:stop]] += weight * self.column_values[start:stop]
+
+        if candidates is not None and posting_scores is not None:
+            scores += posting_scores[candidates]
+        return scores
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int,
+        candidates: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the k places most similar to a query
+
+        Args:
+            query: L2-normalized dense query vector
+            k: Number of places to return
+            candidates: Optional sorted place ids to restrict the search to
+
+        Returns:
+            Tuple of (place ids, cosine scores), best first
+        """
+        if candidates is None:
+            return select_top_n(self.scores(query), k)
+        candidates = np.asarray(candidates, dtype=np.int64)
+        return select_top_n(self.scores(query, candidates), k, candidates)
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Arrays to persist with the model (the CSR arrays are stored as sparse_*)"""
+        return {}
+
+
+def sparse_neighbor_lists(
+    data: np.ndarray,
+    indices: np.ndarray,
+    indptr: np.ndarray,
+    n_features: int,
+    first_text_column: int,
+    k: int,
+    memory_budget: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Build the exact top-K neighbour table of sparse feature rows
+
+    Rows are scored in tiles. Columns most places have (one-hot, numeric
+    and the most frequent tokens) are densified and scored with one matrix
+    multiply per tile; the remaining rare tokens are added from their
+    posting lists, which are short.
+
+    Args:
+        data, indices, indptr: CSR arrays of L2-normalized rows
+        n_features: Number of columns
+        first_text_column: First token column (earlier columns are always dense)
+        k: Number of neighbours per place
+        memory_budget: Bytes available for one scoring tile
+
+    Returns:
+        Tuple of (neighbor_ids, neighbor_scores) with shape (n_places, k),
+        laid out like cbf_recommender.build_neighbor_table
+    """
+    n_places = len(indptr) - 1
+    k = max(0, min(k, n_places - 1))
+    neighbor_ids = np.empty((n_places, k), dtype=np.int32)
+    neighbor_scores = np.empty((n_places, k), dtype=np.float32)
+    if k == 0:
+        return neighbor_ids, neighbor_scores
+
+    document_frequency = np.bincount(indices, minlength=n_features)
+    token_columns = np.arange(first_text_column, n_features)
+    frequent = token_columns[document_frequency[token_columns] > n_places // _DENSE_TOKEN_DF_DIVISOR]
+    frequent = frequent[np.argsort(-document_frequency[frequent], kind='stable')][:_MAX_DENSE_TOKENS]
+    dense_columns = np.concatenate([np.arange(first_text_column), np.sort(frequent)])
+
+    dense_position = np.full(n_features, -1, dtype=np.int64)
+    dense_position[dense_columns] = np.arange(len(dense_columns))
+    entry_rows = np.repeat(np.arange(n_places), np.diff(indptr))
+    entry_dense = dense_position[indices]
+    is_dense = entry_dense >= 0
+
+    dense = np.zeros((n_places, len(dense_columns)), dtype=np.float32)
+    dense[entry_rows[is_dense], entry_dense[is_dense]] = data[is_dense]
+
+    # Posting lists of the rare columns, and where each row's rare entries start
+    rare = ~is_dense
+    rare_entry_rows = entry_rows[rare]
+    rare_columns = indices[rare]
+    rare_values = data[rare]
+    posting_offsets, posting_rows, posting_values = _posting_lists(
+        rare_entry_rows, rare_columns, rare_values, n_features
+    )
+    rare_starts = np.searchsorted(rare_entry_rows, np.arange(n_places + 1))
+
+    block = max(1, memory_budget // max(1, n_places * _BYTES_PER_SCORE))
+    for start in range(0, n_places, block):
+        stop = min(start + block, n_places)
+        scores = dense[start:stop] @ dense.T
+
+        # Rare tokens shared with other places
+        first, last = rare_starts[start], rare_starts[stop]
+        if last > first:
+            columns = rare_columns[first:last]
+            lengths = posting_offsets[columns + 1] - posting_offsets[columns]
+            posting = np.repeat(posting_offsets[columns] - np.cumsum(lengths) + lengths, lengths)
+            posting += np.arange(lengths.sum())
+            local = np.repeat(rare_entry_rows[first:last] - start, lengths)
+            weights = np.repeat(rare_values[first:last], lengths) * posting_values[posting]
+            np.add.at(scores, (local, posting_rows[posting]), weights)
+
+        local_rows = np.arange(stop - start)
+        scores[local_rows, local_rows + start] = -np.inf
+
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        neighbor_ids[start:stop] = np.take_along_axis(top, order, axis=1)
+        neighbor_scores[start:stop] = np.take_along_axis(top_scores, order, axis=1)
+
+    return neighbor_ids, neighbor_scores
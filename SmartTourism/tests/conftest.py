@@ -0,0 +1,41 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# The SmartTourism modules are imported as top-level modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cbf_recommender import neighbor_rows
+from model_artifact import fit_scaler_params
+from neighbor_index import normalize_rows
+
+CATALOG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'clean_place_for_ml.csv')
+FEATURE_COLUMNS = ['category_id', 'ratings', 'reviews_count']
+
+
+@pytest.fixture
+def model_package():
+    """A small model package over the first 300 places of the catalog"""
+    places = pd.read_csv(CATALOG, encoding='latin1').head(300)
+    places.insert(0, 'place_id', np.arange(len(places)))
+    raw_features = places[FEATURE_COLUMNS].to_numpy(dtype=np.float64)
+    scaler_params = fit_scaler_params(raw_features)
+    scaled = raw_features * scaler_params['scale'] + scaler_params['min']
+    neighbor_ids, neighbor_scores = neighbor_rows(normalize_rows(scaled), np.arange(len(places)), 10)
+    return {
+        'places_data': places,
+        'feature_data': pd.DataFrame(
+            scaled, index=pd.RangeIndex(len(places), name='place_id'), columns=FEATURE_COLUMNS
+        ),
+        'feature_columns': FEATURE_COLUMNS,
+        'scaler_params': scaler_params,
+        'neighbor_ids': neighbor_ids,
+        'neighbor_scores': neighbor_scores,
+        'metadata': {
+            'training_date': '2024-01-01 00:00:00', 'n_places': len(places), 'neighbors_k': 10,
+            'model_type': 'Content-Based Filtering (Cosine Similarity)',
+        },
+    }
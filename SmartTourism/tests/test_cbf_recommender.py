@@ -0,0 +1,29 @@
+from cbf_recommender import CBFRecommender
+from model_artifact import save_model_artifact
+from recommendation_metrics import MetricsRegistry
+
+
+def _recommender(tmp_path, model_package, metrics=None):
+    artifact_dir = str(tmp_path / 'artifact')
+    save_model_artifact(model_package, artifact_dir)
+    return CBFRecommender(artifact_dir, metrics=metrics)
+
+
+def test_batch_results_carry_timings_when_enabled(tmp_path, model_package):
+    recommender = _recommender(tmp_path, model_package, MetricsRegistry())
+    preferences = recommender.onboarding.get_default_preferences()
+    results = recommender.get_recommendations_batch([preferences, preferences], top_n=5)
+
+    assert len(results) == 2
+    for result in results:
+        assert len(result['positions']) == 5
+        assert {'validate_ms', 'search_ms', 'total_ms'} <= set(result['timings'])
+        assert result['timings']['total_ms'] >= 0
+
+
+def test_batch_results_have_no_timings_when_disabled(tmp_path, model_package):
+    recommender = _recommender(tmp_path, model_package)
+    preferences = recommender.onboarding.get_default_preferences()
+    results = recommender.get_recommendations_batch([preferences], top_n=5)
+
+    assert set(results[0]) == {'positions', 'scores'}
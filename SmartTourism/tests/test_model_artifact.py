@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import model_artifact
+from model_artifact import load_model_artifact, save_model_artifact
+
+
+def _is_mapped(array: np.ndarray) -> bool:
+    while array is not None and not isinstance(array, np.memmap):
+        array = array.base
+    return array is not None
+
+
+@pytest.mark.parametrize('arrow_text', [True, False])
+def test_places_data_round_trip(tmp_path, model_package, monkeypatch, arrow_text):
+    if arrow_text and not model_artifact._ARROW_TEXT:
+        pytest.skip("pandas does not store text in Arrow here")
+    monkeypatch.setattr(model_artifact, '_ARROW_TEXT', arrow_text)
+    places = model_package['places_data']
+    places.loc[:2, 'name'] = ['ប្រាសាទអង្គរវត្ត', '', 'Psar Thmei / Central Market']
+    artifact_dir = save_model_artifact(model_package, str(tmp_path / 'artifact'))
+
+    loaded = load_model_artifact(artifact_dir)['places_data']
+
+    # name is stored as UTF-8 bytes, the province and category names as codes
+    assert loaded.columns.tolist() == places.columns.tolist()
+    for column in places.columns:
+        assert loaded[column].tolist() == places[column].tolist()
+        assert loaded[column].dtype == places[column].dtype
+    assert _is_mapped(loaded['ratings'].to_numpy())
+    assert (loaded['name'] == 'Psar Thmei / Central Market').sum() == 1
+    assert loaded.sort_values('name')['place_id'].tolist() == places.sort_values('name')['place_id'].tolist()
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cbf_recommender import neighbor_rows
+from model_artifact import load_model_package, publish_model_artifact, resolve_model_path
+from model_updater import IncrementalModelUpdater
+
+
+@pytest.fixture
+def model_path(tmp_path, model_package):
+    model_path = str(tmp_path / 'cbf_model')
+    publish_model_artifact(model_package, model_path)
+    return model_path
+
+
+def test_mixed_insert_and_partial_update_frame(model_path):
+    updater = IncrementalModelUpdater(model_path)
+    places = updater.model_package['places_data']
+    before = places.iloc[[5, 6]].copy()
+
+    inserts = places.iloc[:2].drop(columns='place_id').assign(name=['New Temple', 'ប្រាសាទថ្មី'])
+    partial_updates = pd.DataFrame({'place_id': [5, 6], 'ratings': [4.9, np.nan], 'province_id': [np.nan, 3]})
+    summary = updater.apply_changes(upserts=pd.concat([inserts, partial_updates]))
+
+    assert summary['n_updated'] == 2
+    assert len(summary['inserted_ids']) == 2
+    updated = updater.model_package['places_data']
+    assert updated['province_id'].dtype == places['province_id'].dtype
+    assert updated['category_id'].dtype == places['category_id'].dtype
+
+    # Columns an update leaves empty keep their values
+    assert updated.at[5, 'ratings'] == 4.9
+    assert updated.at[5, 'province_id'] == before.at[5, 'province_id']
+    assert updated.at[6, 'ratings'] == before.at[6, 'ratings']
+    assert updated.at[6, 'province_id'] == 3
+    for column in ('name', 'province_name', 'category_name', 'reviews_count'):
+        assert updated.loc[[5, 6], column].tolist() == before[column].tolist()
+
+    pointer = updater.publish()
+    published = load_model_package(resolve_model_path(model_path))['places_data']
+    assert pointer['version'] == 2
+    assert published['name'].tolist()[-2:] == ['New Temple', 'ប្រាសាទថ្មី']
+    assert published.at[6, 'province_id'] == 3
+
+
+def test_new_places_need_integer_columns(model_path):
+    updater = IncrementalModelUpdater(model_path)
+    inserts = updater.model_package['places_data'].iloc[:1].drop(columns='place_id').astype({'province_id': float})
+    inserts.loc[:, 'province_id'] = np.nan
+
+    with pytest.raises(ValueError, match='province_id'):
+        updater.apply_changes(upserts=inserts)
+
+
+def test_full_rebuild_within_memory_budget(model_path):
+    # A negative threshold forces the drift rebuild
+    updater = IncrementalModelUpdater(model_path, drift_threshold=-1, memory_budget_mb=1)
+    summary = updater.apply_changes(remove_ids=[3])
+
+    assert summary['full_rebuild']
+    package = updater.model_package
+    unit_features = package['unit_features']
+    _, expected_scores = neighbor_rows(unit_features, np.arange(len(unit_features)), 10)
+    np.testing.assert_allclose(package['neighbor_scores'], expected_scores, atol=1e-6)
+    picked = np.einsum('ij,ikj->ik', unit_features, unit_features[package['neighbor_ids']])
+    np.testing.assert_allclose(picked, package['neighbor_scores'], atol=1e-6)
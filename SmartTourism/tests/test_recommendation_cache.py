@@ -0,0 +1,59 @@
+import os
+import time
+
+import pandas as pd
+
+from model_artifact import save_model_artifact
+from recommend_places import PlaceRecommendationSystem
+from recommendation_cache import ResponseCache
+
+
+def test_clear_keeps_the_shared_disk_store(tmp_path):
+    writer = ResponseCache(ttl=60, disk_dir=str(tmp_path))
+    reader = ResponseCache(ttl=60, disk_dir=str(tmp_path))
+    writer.get_or_compute(('fresh', 1), lambda: 'fresh')
+    writer.get_or_compute(('old', 1), lambda: 'old')
+    old_path = writer._disk_path(('old', 1))
+    os.utime(old_path, (time.time() - 120, time.time() - 120))
+
+    # Another worker swapping models must not wipe entries it did not write
+    reader.clear()
+    assert reader.prune_disk() == 1
+    assert not os.path.exists(old_path)
+    assert reader.get_or_compute(('fresh', 1), lambda: 'recomputed') == 'fresh'
+    assert reader.stats()['disk_hits'] == 1
+
+
+def test_request_started_before_a_swap_is_not_served_after_it(tmp_path, model_package):
+    # An unpublished artifact keeps model_version 0 when it is rewritten
+    artifact_dir = str(tmp_path / 'artifact')
+    save_model_artifact(model_package, artifact_dir)
+    system = PlaceRecommendationSystem(artifact_dir, response_cache_dir=str(tmp_path / 'responses'))
+    old_recommender = system.recommender
+    compute = old_recommender.get_recommendations_for_new_user
+
+    def compute_then_swap(*args):
+        # The swap lands while this request is still computing
+        recommendations = compute(*args)
+        places = model_package['places_data'].copy()
+        places['name'] = places['name'] + ' (renamed)'
+        time.sleep(0.01)
+        save_model_artifact(dict(model_package, places_data=places), artifact_dir)
+        assert system.reload()
+        return recommendations
+
+    old_recommender.get_recommendations_for_new_user = compute_then_swap
+    before = system.get_recommendations(None, top_n=5)
+    after = system.get_recommendations(None, top_n=5)
+
+    assert system.recommender is not old_recommender
+    assert system.recommender.model_version == old_recommender.model_version
+    assert not before['name'].str.endswith('(renamed)').any()
+    assert after['name'].str.endswith('(renamed)').all()
+    pd.testing.assert_frame_equal(
+        after.reset_index(drop=True),
+        system.recommender.get_recommendations_for_new_user(
+            system.onboarding.get_default_preferences(), 5
+        ).reset_index(drop=True)
+    )
+    system.close()
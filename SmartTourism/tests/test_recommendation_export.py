@@ -0,0 +1,20 @@
+import numpy as np
+import pandas as pd
+
+from recommendation_export import safe_file_stem, similar_places_file_name
+
+
+def test_similar_places_file_name_from_place_id():
+    # The place page selects places by id (places_data is indexed by place_id)
+    names = pd.Series(['Angkor Wat', 'ប្រាសាទ បាយ័ន', 'Psar Thmei / Central Market'])
+
+    assert similar_places_file_name(names, 2) == 'similar_to_Psar_Thmei_Central_Market.csv'
+    assert similar_places_file_name(names, 1) == 'similar_to_ប្រាសាទ_បាយ័ន.csv'
+    assert similar_places_file_name(np.asarray(names, dtype=object), 0) == 'similar_to_Angkor_Wat.csv'
+    assert similar_places_file_name(pd.Series(['?']), 0) == 'similar_to_place.csv'
+
+
+def test_safe_file_stem_falls_back_to_default():
+    assert safe_file_stem('Family trip: Siem Reap') == 'Family_trip_Siem_Reap'
+    assert safe_file_stem(' ?* ') == 'recommendations'
+    assert safe_file_stem('..', default='place') == 'place'
@@ -0,0 +1 @@
+# Recommendation Service Application
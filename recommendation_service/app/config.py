@@ -0,0 +1,33 @@
+from pydantic_settings import BaseSettings
+from pathlib import Path
+from typing import Optional
+import os
+
+
+# SmartTourism sits next to this service in the repository
+DEFAULT_SMARTTOURISM_DIR = str(Path(__file__).resolve().parents[2] / "SmartTourism")
+
+
+class Settings(BaseSettings):
+    """Application settings"""
+    smarttourism_dir: str = DEFAULT_SMARTTOURISM_DIR
+    model_path: str = os.path.join(DEFAULT_SMARTTOURISM_DIR, "cbf_model")
+    cache_size: int = 256
+    hot_reload: bool = True
+    poll_interval: float = 5.0
+    response_cache_size: int = 4096
+    response_ttl: float = 300.0
+    response_cache_dir: Optional[str] = None
+    max_top_n: int = 100
+    max_batch_users: int = 500
+    max_radius_km: float = 200.0
+    collect_timings: bool = True
+    host: str = "0.0.0.0"
+    port: int = int(os.getenv("PORT", "8002"))
+    
+    class Config:
+        env_file = ".env"
+        case_sensitive = False
+
+
+settings = Settings()
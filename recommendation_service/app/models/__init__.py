@@ -0,0 +1 @@
+# Models module
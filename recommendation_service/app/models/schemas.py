@@ -0,0 +1,93 @@
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Literal, Optional
+
+from app.config import settings
+
+
+class Preferences(BaseModel):
+    """Onboarding answers used for cold-start recommendations"""
+    categories: Optional[List[int]] = Field(None, description="Category IDs (1-4); ignored when subcategories are given")
+    subcategories: Optional[List[str]] = Field(None, description="Tourist attraction subcategory IDs, e.g. [\"temples\", \"museums\"]")
+    min_rating: float = Field(4.0, description="Minimum rating (0.0, 3.0, 3.5, 4.0 or 4.5)")
+    popularity_preference: Literal["popular", "hidden_gems", "balanced"] = Field("balanced", description="Popularity preference")
+    provinces: Optional[List[str]] = Field(None, description="Province names, or null for all provinces")
+
+
+class NewUserRecommendationRequest(BaseModel):
+    """Request model for cold-start recommendations"""
+    preferences: Optional[Preferences] = Field(None, description="User preferences (default preferences if omitted)")
+    top_n: int = Field(10, description="Number of recommendations", ge=1, le=settings.max_top_n)
+    min_similarity: float = Field(0.0, description="Minimum similarity score", ge=-1, le=1)
+    diversity: float = Field(0.0, description="Weight of diversity when re-ranking the candidates (0 keeps the similarity order)", ge=0, le=1)
+
+
+class NearbyRecommendationRequest(BaseModel):
+    """Request model for recommendations near a location"""
+    latitude: float = Field(..., description="Latitude of the user in degrees", ge=-90, le=90)
+    longitude: float = Field(..., description="Longitude of the user in degrees", ge=-180, le=180)
+    radius_km: float = Field(10.0, description="Search radius in kilometers", gt=0, le=settings.max_radius_km)
+    preferences: Optional[Preferences] = Field(None, description="User preferences (default preferences if omitted and no place_id is given)")
+    place_id: Optional[int] = Field(None, description="Recommend places similar to this place instead of matching the preferences", ge=0)
+    top_n: int = Field(10, description="Number of recommendations", ge=1, le=settings.max_top_n)
+    distance_weight: float = Field(0.3, description="Weight of closeness in the ranking; the rest is similarity", ge=0, le=1)
+    min_similarity: float = Field(0.0, description="Minimum similarity score", ge=-1, le=1)
+
+
+class BatchRecommendationRequest(BaseModel):
+    """Request model for cold-start recommendations for many users"""
+    users: List[Optional[Preferences]] = Field(
+        ..., description="Preferences per user (null entries use default preferences)",
+        min_length=1, max_length=settings.max_batch_users
+    )
+    top_n: int = Field(10, description="Number of recommendations per user", ge=1, le=settings.max_top_n)
+    min_similarity: float = Field(0.0, description="Minimum similarity score", ge=-1, le=1)
+
+
+class Recommendation(BaseModel):
+    """Model representing a recommended place"""
+    place_id: int = Field(..., description="Place ID in the loaded model")
+    name: str = Field(..., description="Name of the place")
+    province_name: Optional[str] = Field(None, description="Province of the place")
+    category_name: Optional[str] = Field(None, description="Category of the place")
+    ratings: Optional[float] = Field(None, description="Average rating")
+    reviews_count: Optional[float] = Field(None, description="Number of reviews")
+    similarity_score: float = Field(..., description="Cosine similarity to the user profile or place")
+    distance_km: Optional[float] = Field(None, description="Distance from the requested location (nearby recommendations only)")
+    combined_score: Optional[float] = Field(None, description="Ranking score mixing similarity and closeness (nearby recommendations only)")
+
+
+class RecommendationResponse(BaseModel):
+    """Response model for a list of recommendations"""
+    model_version: int = Field(..., description="Version of the model that served the request")
+    total_count: int = Field(..., description="Number of recommendations")
+    recommendations: List[Recommendation] = Field(..., description="Recommended places, best first")
+    timings: Optional[Dict[str, float]] = Field(None, description="Milliseconds per stage plus total_ms (COLLECT_TIMINGS only; null when served from the response cache)")
+
+
+class BatchRecommendationResult(BaseModel):
+    """Recommendations for one user of a batch"""
+    total_count: int = Field(..., description="Number of recommendations")
+    recommendations: List[Recommendation] = Field(..., description="Recommended places, best first")
+
+
+class BatchRecommendationResponse(BaseModel):
+    """Response model for batch recommendations"""
+    model_version: int = Field(..., description="Version of the model that served the request")
+    results: List[BatchRecommendationResult] = Field(..., description="Results in the order of the requested users")
+    timings: Optional[Dict[str, float]] = Field(None, description="Milliseconds per stage of the whole batch plus total_ms (COLLECT_TIMINGS only)")
+
+
+class ModelStatusResponse(BaseModel):
+    """Response model for the loaded model"""
+    model_path: str = Field(..., description="Configured model path")
+    version: Optional[int] = Field(None, description="Loaded model version")
+    artifact: Optional[str] = Field(None, description="Loaded artifact or pickle path")
+    loaded_at: Optional[str] = Field(None, description="Time the model was loaded")
+    load_seconds: Optional[float] = Field(None, description="Model load time in seconds")
+    reload_count: int = Field(..., description="Number of model loads since startup")
+    watching: bool = Field(..., description="Whether new model versions are hot-swapped")
+    last_error: Optional[str] = Field(None, description="Last model load error")
+    n_places: int = Field(..., description="Number of places in the model")
+    memory: Dict[str, Any] = Field(default_factory=dict, description="Model memory footprint in bytes")
+    response_cache: Dict[str, Any] = Field(default_factory=dict, description="Response cache counters")
+
@@ -0,0 +1 @@
+# Routes module
@@ -0,0 +1,177 @@
+from fastapi import APIRouter, HTTPException, Path, Query
+from fastapi.responses import ORJSONResponse
+from typing import Annotated
+import logging
+
+from app.config import settings
+from app.models.schemas import (
+    NewUserRecommendationRequest, NearbyRecommendationRequest, BatchRecommendationRequest,
+    RecommendationResponse,
+    BatchRecommendationResponse, ModelStatusResponse
+)
+from app.services.recommender import recommendation_service
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/recommendations", tags=["recommendations"])
+
+# Recommendation endpoints are plain `def` functions: the numpy work is
+# CPU-bound, so FastAPI runs them in its threadpool instead of blocking the
+# event loop. They return ORJSONResponse directly, which skips response_model
+# validation (the models still document the responses).
+
+
+def _server_error(e: Exception) -> HTTPException:
+    """Log an unexpected error and turn it into a 500 response"""
+    logger.exception("Unhandled error during recommendation")
+    return HTTPException(
+        status_code=500,
+        detail=f"Internal server error: {type(e).__name__}: {str(e) or repr(e)}"
+    )
+
+
+@router.post(
+    "/new-user",
+    response_model=RecommendationResponse,
+    summary="Recommend places for a new user",
+    description="Cold-start recommendations from onboarding preferences (default preferences if omitted)"
+)
+def recommend_for_new_user(request_body: NewUserRecommendationRequest) -> ORJSONResponse:
+    """
+    Recommend places for a new user from their onboarding answers.
+
+    Args:
+        request_body: Preferences, number of recommendations, similarity threshold
+            and diversity
+
+    Returns:
+        RecommendationResponse with the recommended places
+
+    Raises:
+        HTTPException: If the preferences are invalid or recommendation fails
+    """
+    preferences = request_body.preferences.model_dump() if request_body.preferences else None
+    try:
+        return ORJSONResponse(recommendation_service.recommend_for_new_user(
+            preferences, request_body.top_n, request_body.min_similarity, request_body.diversity
+        ))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise _server_error(e)
+
+
+@router.get(
+    "/places/{place_id}",
+    response_model=RecommendationResponse,
+    summary="Recommend places similar to a place",
+    description="Place-to-place recommendations from the precomputed neighbour table"
+)
+def recommend_for_place(
+    place_id: Annotated[int, Path(description="Place ID", ge=0)],
+    top_n: Annotated[int, Query(description="Number of recommendations", ge=1, le=settings.max_top_n)] = 10,
+    min_similarity: Annotated[float, Query(description="Minimum similarity score", ge=-1, le=1)] = 0.0,
+    diversity: Annotated[float, Query(description="Weight of diversity when re-ranking the candidates", ge=0, le=1)] = 0.0
+) -> ORJSONResponse:
+    """
+    Recommend places similar to a place.
+
+    Args:
+        place_id: Place ID in the loaded model
+        top_n: Number of recommendations
+        min_similarity: Minimum similarity score
+        diversity: Weight of diversity in the re-ranking
+
+    Returns:
+        RecommendationResponse with the similar places
+
+    Raises:
+        HTTPException: If the place does not exist or recommendation fails
+    """
+    try:
+        return ORJSONResponse(recommendation_service.recommend_for_place(
+            place_id, top_n, min_similarity, diversity
+        ))
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise _server_error(e)
+
+
+@router.post(
+    "/nearby",
+    response_model=RecommendationResponse,
+    summary="Recommend places near a location",
+    description="Places within a radius of the user, ranked by similarity to their preferences (or to a place) and by closeness"
+)
+def recommend_nearby(request_body: NearbyRecommendationRequest) -> ORJSONResponse:
+    """
+    Recommend places near a location.
+
+    Args:
+        request_body: Location, radius, preferences or place ID, and ranking options
+
+    Returns:
+        RecommendationResponse with distance_km and combined_score per place
+
+    Raises:
+        HTTPException: If the place does not exist, the preferences are invalid,
+            the model has no coordinates or recommendation fails
+    """
+    preferences = request_body.preferences.model_dump() if request_body.preferences else None
+    try:
+        return ORJSONResponse(recommendation_service.recommend_nearby(
+            request_body.latitude, request_body.longitude, request_body.radius_km,
+            preferences, request_body.place_id, request_body.top_n,
+            request_body.distance_weight, request_body.min_similarity
+        ))
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise _server_error(e)
+
+
+@router.post(
+    "/batch",
+    response_model=BatchRecommendationResponse,
+    summary="Recommend places for many new users",
+    description="Cold-start recommendations for a batch of users, scored in one matrix pass"
+)
+def recommend_batch(request_body: BatchRecommendationRequest) -> ORJSONResponse:
+    """
+    Recommend places for many new users at once.
+
+    Args:
+        request_body: Preferences per user, number of recommendations and similarity threshold
+
+    Returns:
+        BatchRecommendationResponse with one result per user, in request order
+
+    Raises:
+        HTTPException: If any preferences are invalid or recommendation fails
+    """
+    preferences_list = [
+        preferences.model_dump() if preferences else None
+        for preferences in request_body.users
+    ]
+    try:
+        return ORJSONResponse(recommendation_service.recommend_batch(
+            preferences_list, request_body.top_n, request_body.min_similarity
+        ))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise _server_error(e)
+
+
+@router.get(
+    "/model",
+    response_model=ModelStatusResponse,
+    summary="Loaded model",
+    description="Version, load time and memory footprint of the loaded CBF model"
+)
+def model_status() -> ORJSONResponse:
+    """Loaded model status endpoint"""
+    return ORJSONResponse(recommendation_service.model_status())
@@ -0,0 +1,328 @@
+import logging
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.config import settings
+
+# The CBF engine is a set of flat modules in SmartTourism/
+if settings.smarttourism_dir not in sys.path:
+    sys.path.insert(0, settings.smarttourism_dir)
+
+from cbf_recommender import CBFRecommender, NEARBY_COLUMNS, RECOMMENDATION_COLUMNS  # noqa: E402
+from recommend_places import PlaceRecommendationSystem  # noqa: E402
+from recommendation_cache import preference_signature  # noqa: E402
+from recommendation_metrics import METRICS  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+# Columns copied from places_data into each recommendation
+PLACE_COLUMNS = [column for column in RECOMMENDATION_COLUMNS if column != 'similarity_score']
+
+
+class RecommendationService:
+    """Service wrapping the SmartTourism CBF recommendation system"""
+
+    def __init__(self):
+        self.system: Optional[PlaceRecommendationSystem] = None
+        # (recommender, column arrays), replaced as one reference on hot-swap
+        self._columns = (None, {})
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.system is not None
+
+    def load(self) -> float:
+        """
+        Load the model so the first request does not pay for it.
+
+        Returns:
+            Load time in seconds
+        """
+        start = time.perf_counter()
+        self.system = PlaceRecommendationSystem(
+            settings.model_path,
+            cache_size=settings.cache_size,
+            hot_reload=settings.hot_reload,
+            poll_interval=settings.poll_interval,
+            response_cache_size=settings.response_cache_size,
+            response_ttl=settings.response_ttl,
+            response_cache_dir=settings.response_cache_dir,
+            metrics=METRICS if settings.collect_timings else None
+        )
+        self._place_columns(self.system.recommender)
+        load_seconds = time.perf_counter() - start
+        logger.info("Loaded CBF model version %s in %.3fs",
+                    self.system.recommender.model_version, load_seconds)
+        return load_seconds
+
+    def close(self):
+        """Stop watching the model and release it"""
+        if self.system is not None:
+            self.system.close()
+            self.system = None
+
+    def recommend_for_new_user(
+        self,
+        preferences: Optional[Dict[str, Any]],
+        top_n: int,
+        min_similarity: float = 0.0,
+        diversity: float = 0.0
+    ) -> Dict[str, Any]:
+        """
+        Cold-start recommendations for one user.
+
+        Args:
+            preferences: Onboarding answers (default preferences if None)
+            top_n: Number of recommendations
+            min_similarity: Minimum similarity score
+            diversity: Weight of diversity in the MMR re-ranking
+
+        Returns:
+            Dictionary matching RecommendationResponse
+
+        Raises:
+            ValueError: If the preferences are invalid
+        """
+        recommender = self.system.recommender
+        user_preferences = self._user_preferences(recommender, preferences)
+        timings = {}
+
+        def compute():
+            recommendations = recommender.get_recommendations_for_new_user(
+                user_preferences, top_n, min_similarity, diversity
+            )
+            timings.update(recommendations.attrs.get('timings', {}))
+            return self._response(recommender, recommendations)
+
+        key = (
+            'api_new_user', preference_signature(user_preferences), top_n,
+            float(min_similarity), float(diversity), recommender.model_fingerprint
+        )
+        return self._with_timings(self.system.response_cache.get_or_compute(key, compute), timings)
+
+    def recommend_for_place(
+        self,
+        place_id: int,
+        top_n: int,
+        min_similarity: float = 0.0,
+        diversity: float = 0.0
+    ) -> Dict[str, Any]:
+        """
+        Places similar to a place.
+
+        Args:
+            place_id: Place ID in the loaded model
+            top_n: Number of recommendations
+            min_similarity: Minimum similarity score
+            diversity: Weight of diversity in the MMR re-ranking
+
+        Returns:
+            Dictionary matching RecommendationResponse
+
+        Raises:
+            LookupError: If the place ID does not exist
+        """
+        recommender = self.system.recommender
+        timings = {}
+
+        def compute():
+            recommendations = recommender.get_recommendations_for_place_id(
+                place_id, top_n, min_similarity, diversity=diversity
+            )
+            if isinstance(recommendations, str):
+                raise LookupError(recommendations)
+            timings.update(recommendations.attrs.get('timings', {}))
+            return self._response(recommender, recommendations)
+
+        key = (
+            'api_place', place_id, top_n, float(min_similarity), float(diversity),
+            recommender.model_fingerprint
+        )
+        return self._with_timings(self.system.response_cache.get_or_compute(key, compute), timings)
+
+    def recommend_nearby(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        preferences: Optional[Dict[str, Any]],
+        place_id: Optional[int],
+        top_n: int,
+        distance_weight: float,
+        min_similarity: float = 0.0
+    ) -> Dict[str, Any]:
+        """
+        Places within a radius that best match a user or a place.
+
+        Not cached: coordinates rarely repeat exactly.
+
+        Args:
+            latitude: Latitude of the user in degrees
+            longitude: Longitude of the user in degrees
+            radius_km: Search radius in kilometers
+            preferences: Onboarding answers (default preferences if None
+                and no place_id is given)
+            place_id: Optional place ID to find similar places to
+            top_n: Number of recommendations
+            distance_weight: Weight of closeness in the ranking
+            min_similarity: Minimum similarity score
+
+        Returns:
+            Dictionary matching RecommendationResponse, with distance_km and
+            combined_score in each recommendation
+
+        Raises:
+            LookupError: If the place ID does not exist
+            ValueError: If the preferences are invalid or the model has no
+                place coordinates
+        """
+        recommender = self.system.recommender
+        if place_id is not None and not 0 <= place_id < len(recommender.model_package['places_data']):
+            raise LookupError(f"Place id {place_id} not found in dataset")
+        user_preferences = None
+        if preferences is not None or place_id is None:
+            user_preferences = self._user_preferences(recommender, preferences)
+
+        recommendations = recommender.get_nearby_recommendations(
+            latitude, longitude, radius_km, user_preferences, place_id, top_n,
+            distance_weight, min_similarity
+        )
+        records = self._records(
+            recommender,
+            recommendations['place_id'].to_numpy(),
+            recommendations['similarity_score'].to_numpy(),
+            {column: recommendations[column].to_numpy() for column in NEARBY_COLUMNS}
+        )
+        return self._with_timings({
+            'model_version': recommender.model_version,
+            'total_count': len(records),
+            'recommendations': records
+        }, recommendations.attrs.get('timings'))
+
+    def recommend_batch(
+        self,
+        preferences_list: List[Optional[Dict[str, Any]]],
+        top_n: int,
+        min_similarity: float = 0.0
+    ) -> Dict[str, Any]:
+        """
+        Cold-start recommendations for many users in one pass.
+
+        Args:
+            preferences_list: Onboarding answers per user (None uses defaults)
+            top_n: Number of recommendations per user
+            min_similarity: Minimum similarity score
+
+        Returns:
+            Dictionary matching BatchRecommendationResponse
+
+        Raises:
+            ValueError: If any user's preferences are invalid
+        """
+        recommender = self.system.recommender
+        user_preferences = [
+            self._user_preferences(recommender, preferences)
+            for preferences in preferences_list
+        ]
+        batch = recommender.get_recommendations_batch(user_preferences, top_n, min_similarity)
+
+        results = []
+        for result in batch:
+            records = self._records(recommender, result['positions'], result['scores'])
+            results.append({'total_count': len(records), 'recommendations': records})
+
+        timings = batch[0].get('timings') if batch else None
+        return self._with_timings(
+            {'model_version': recommender.model_version, 'results': results}, timings
+        )
+
+    def model_status(self) -> Dict[str, Any]:
+        """Loaded model version, load time, size, memory footprint and cache counters"""
+        recommender = self.system.recommender
+        status = self.system.model_status()
+        status['n_places'] = len(recommender.model_package['places_data'])
+        status['memory'] = recommender.memory_footprint()
+        status['response_cache'] = self.system.response_cache_stats()
+        return status
+
+    def metrics_text(self) -> str:
+        """Stage and request latency histograms in the Prometheus text format"""
+        return METRICS.render_prometheus()
+
+    def _user_preferences(
+        self,
+        recommender: CBFRecommender,
+        preferences: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Validate onboarding answers and turn them into recommender preferences"""
+        if preferences is None:
+            return recommender.onboarding.get_default_preferences()
+        return recommender.onboarding.create_user_preferences(**preferences)
+
+    def _response(self, recommender: CBFRecommender, recommendations) -> Dict[str, Any]:
+        """Build a RecommendationResponse dictionary from a recommendation frame"""
+        records = self._records(
+            recommender,
+            recommendations['place_id'].to_numpy(),
+            recommendations['similarity_score'].to_numpy()
+        )
+        return {
+            'model_version': recommender.model_version,
+            'total_count': len(records),
+            'recommendations': records
+        }
+
+    def _with_timings(
+        self,
+        response: Dict[str, Any],
+        timings: Optional[Dict[str, float]]
+    ) -> Dict[str, Any]:
+        """
+        Add the stage timings of this request to a response.
+
+        Only done when COLLECT_TIMINGS is on. Cached responses are shared, so
+        the timings go into a copy; a response served from the cache gets
+        None because nothing was computed for it.
+        """
+        if not settings.collect_timings:
+            return response
+        return {**response, 'timings': timings or None}
+
+    def _records(
+        self,
+        recommender: CBFRecommender,
+        place_ids: np.ndarray,
+        scores: np.ndarray,
+        extra: Optional[Dict[str, np.ndarray]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Build JSON-ready recommendation records straight from column arrays.
+
+        Indexing a few numpy columns and converting with tolist() yields
+        native Python values, which is much cheaper than going through
+        DataFrame.to_dict() or pydantic validation on every request.
+        Columns in extra (aligned with place_ids) are appended as is.
+        """
+        columns = self._place_columns(recommender)
+        values = [columns[column][place_ids].tolist() for column in PLACE_COLUMNS]
+        values.append(np.asarray(scores, dtype=np.float64).tolist())
+        keys = PLACE_COLUMNS + ['similarity_score']
+        for column, array in (extra or {}).items():
+            values.append(np.asarray(array, dtype=np.float64).tolist())
+            keys.append(column)
+        return [dict(zip(keys, row)) for row in zip(*values)]
+
+    def _place_columns(self, recommender: CBFRecommender) -> Dict[str, np.ndarray]:
+        """Column arrays of places_data, rebuilt when a new model is swapped in"""
+        columns_recommender, columns = self._columns
+        if columns_recommender is not recommender:
+            places = recommender.model_package['places_data']
+            columns = {column: places[column].to_numpy() for column in PLACE_COLUMNS}
+            self._columns = (recommender, columns)
+        return columns
+
+
+recommendation_service = RecommendationService()
@@ -0,0 +1,122 @@
+"""
+Local load generator for the recommendation service.
+
+Sends a mix of cold-start, place-to-place and batch requests from a number
+of concurrent clients and reports throughput and p50/p99 latency per
+endpoint.
+
+Usage:
+    uvicorn main:app --port 8002 --workers 1
+    python load_test.py --url http://localhost:8002 --concurrency 16 --requests 5000
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from collections import defaultdict
+
+import httpx
+import numpy as np
+
+
+SUBCATEGORIES = ["temples", "museums", "parks", "monuments", "palaces", "markets", "water_attractions"]
+PROVINCES = ["Phnom Penh", "Siem Reap", "Sihanoukville", "Battambang", "Kampot"]
+
+
+def random_preferences(rng: random.Random) -> dict:
+    """Random onboarding answers"""
+    return {
+        "subcategories": rng.sample(SUBCATEGORIES, rng.randint(1, 3)),
+        "min_rating": rng.choice([0.0, 3.5, 4.0, 4.5]),
+        "popularity_preference": rng.choice(["popular", "hidden_gems", "balanced"]),
+        "provinces": rng.sample(PROVINCES, 1) if rng.random() < 0.5 else None,
+    }
+
+
+def make_request(rng: random.Random, endpoint: str, n_places: int, top_n: int, batch_size: int):
+    """Method, path and JSON body of one request"""
+    if endpoint == "new-user":
+        return "POST", "/api/recommendations/new-user", {
+            "preferences": random_preferences(rng), "top_n": top_n
+        }
+    if endpoint == "place":
+        return "GET", f"/api/recommendations/places/{rng.randrange(n_places)}?top_n={top_n}", None
+    return "POST", "/api/recommendations/batch", {
+        "users": [random_preferences(rng) for _ in range(batch_size)], "top_n": top_n
+    }
+
+
+async def client_worker(client, queue, latencies, errors):
+    """Send queued requests one at a time and record their latency"""
+    while True:
+        try:
+            endpoint, method, path, body = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, path, json=body)
+            ok = response.status_code == 200
+        except httpx.HTTPError:
+            ok = False
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if ok:
+            latencies[endpoint].append(elapsed_ms)
+        else:
+            errors[endpoint] += 1
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    endpoints = args.endpoints.split(",")
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=60) as client:
+        status = (await client.get("/api/recommendations/model")).json()
+        n_places = args.places or status["n_places"]
+        print(f"Model version {status.get('version')} at {args.url}, "
+              f"{args.concurrency} clients, {args.requests} requests")
+
+        queue = asyncio.Queue()
+        for _ in range(args.requests):
+            endpoint = rng.choice(endpoints)
+            queue.put_nowait((endpoint, *make_request(rng, endpoint, n_places, args.top_n, args.batch_size)))
+
+        latencies = defaultdict(list)
+        errors = defaultdict(int)
+        start = time.perf_counter()
+        await asyncio.gather(*[
+            client_worker(client, queue, latencies, errors) for _ in range(args.concurrency)
+        ])
+        elapsed = time.perf_counter() - start
+
+    total = sum(len(values) for values in latencies.values())
+    print(f"  {'endpoint':<10} {'ok':>7} {'errors':>7} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for endpoint in endpoints:
+        values = np.array(latencies[endpoint])
+        if len(values) == 0:
+            print(f"  {endpoint:<10} {0:>7} {errors[endpoint]:>7}")
+            continue
+        print(f"  {endpoint:<10} {len(values):>7} {errors[endpoint]:>7} "
+              f"{np.percentile(values, 50):>9.2f} {np.percentile(values, 99):>9.2f} {values.max():>9.2f}")
+    print(f"  Throughput: {total / elapsed:.0f} requests/s over {elapsed:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the recommendation service")
+    parser.add_argument("--url", default="http://localhost:8002")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--endpoints", default="new-user,place,batch",
+                        help="Comma-separated mix of new-user, place and batch")
+    parser.add_argument("--top-n", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--places", type=int, default=None,
+                        help="Number of place IDs to query (defaults to the loaded model's)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
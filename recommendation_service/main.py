@@ -0,0 +1,78 @@
+from contextlib import asynccontextmanager
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, PlainTextResponse
+from app.routes.recommendations import router as recommendations_router
+from app.services.recommender import recommendation_service
+from app.config import settings
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Preload the model before serving requests and release it on shutdown"""
+    recommendation_service.load()
+    yield
+    recommendation_service.close()
+
+
+# Create FastAPI application
+app = FastAPI(
+    title="Place Recommendation API",
+    description="Content-based place recommendations for new users and similar places",
+    version="1.0.0",
+    docs_url="/docs",
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
+)
+
+# Configure CORS
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],  # Update this in production to specific origins
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+# Include routers
+app.include_router(recommendations_router)
+
+
+@app.get("/")
+async def root():
+    """Root endpoint"""
+    return {
+        "message": "Place Recommendation API",
+        "version": "1.0.0",
+        "docs": "/docs",
+        "algorithm": "Content-Based Filtering"
+    }
+
+
+@app.get("/health")
+async def health():
+    """Health check endpoint"""
+    return {
+        "status": "healthy" if recommendation_service.is_loaded else "loading",
+        "model_path": settings.model_path
+    }
+
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Recommendation latency histograms for Prometheus scraping"""
+    return PlainTextResponse(
+        recommendation_service.metrics_text(),
+        media_type="text/plain; version=0.0.4"
+    )
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(
+        "main:app",
+        host=settings.host,
+        port=settings.port
+    )
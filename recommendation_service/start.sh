@@ -0,0 +1 @@
+uvicorn main:app --host 0.0.0.0 --port $PORT